@@ -0,0 +1,55 @@
+def keyword_value(keywords, keyword, default=None):
+    # Extract a value if keyword has a numeric parameter, e.g. "Commander 2"
+    for item in keywords:
+        if item.startswith(keyword):
+            parts = item.split()
+            for p in parts[1:]:
+                if p.isdigit():
+                    return int(p)
+    return default
+
+
+def keyword_dice(keywords, keyword):
+    # Extract the die of every "<keyword> <Die>" entry, e.g. "Attack Augmentation Blue"
+    dice = []
+    for item in keywords:
+        if item.startswith(keyword):
+            parts = item.split()
+            if len(parts) > 2:
+                dice.append(parts[2])
+    return tuple(dice)
+
+
+class Abilities:
+    """
+    A unit's keywords parsed once into flags and parameters, so the attack and
+    defend paths never scan keyword strings.
+    """
+    __slots__ = (
+        'slayer', 'lucky', 'assassin', 'camouflage', 'sharpshooter', 'withering_fire',
+        'relentless', 'overwatch', 'disengage', 'regenerate', 'last_stand',
+        'shields', 'degrade', 'commander', 'attack_augmentation', 'crushing_charge',
+    )
+
+    def __init__(self, keywords):
+        self.slayer = 'Slayer' in keywords
+        self.lucky = 'Lucky' in keywords
+        self.assassin = 'Assassin' in keywords
+        self.camouflage = 'Camouflage' in keywords
+        self.sharpshooter = 'Sharpshooter' in keywords
+        self.withering_fire = 'Withering Fire' in keywords
+        self.relentless = 'Relentless' in keywords
+        self.overwatch = 'Overwatch' in keywords
+        self.disengage = 'Disengage' in keywords
+        self.regenerate = 'Regenerate' in keywords
+        self.last_stand = 'Last Stand' in keywords
+        self.shields = keyword_value(keywords, 'Shields', default=0)
+        self.degrade = keyword_value(keywords, 'Degrade', default=0)
+        self.commander = keyword_value(keywords, 'Commander', default=0)
+        # One extra die per model for each entry
+        self.attack_augmentation = keyword_dice(keywords, 'Attack Augmentation')
+        self.crushing_charge = keyword_dice(keywords, 'Crushing Charge')
+
+    def __repr__(self):
+        active = [name for name in self.__slots__ if getattr(self, name)]
+        return f"Abilities({', '.join(active)})"
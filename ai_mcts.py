@@ -0,0 +1,301 @@
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import util
+import game
+import game_rng
+import ai_third_input
+from events import bus
+from fight import simulate_fight
+from game_state import GameState
+from spatial import SpatialIndex, CHARGE_RANGE
+
+# Choices making up one activation, decided in this order. Units with Regenerate that have
+# lost models can also spend the activation on REGENERATE instead of moving, shooting and charging
+MOVES = ('heuristic', 'objective', 'enemy', 'hold')
+REGENERATE = 'regenerate'
+SHOTS = ('nearest', 'weakest', None)
+CHARGES = (True, False)
+# UCB1 exploration constant, for rewards in [0, 1]
+EXPLORATION = math.sqrt(2)
+
+
+def available_units(player):
+    """Indices (into player.units) of the units that can still activate this turn."""
+    return [i for i, u in enumerate(player.units) if u.is_alive() and not u.has_activated]
+
+
+def action_options(player, prefix):
+    """
+    Options for the next choice after prefix: the unit, then its move, shot and charge.
+    A unit locked in melee without Disengage can only fight, and a regenerating unit does
+    nothing else, so their remaining choices are None.
+    """
+    level = len(prefix)
+    if level == 0:
+        return available_units(player)
+    unit = player.units[prefix[0]]
+    if unit.melee_target is not None and not unit.abilities.disengage:
+        return (None,)
+    if level == 1:
+        if unit.abilities.regenerate and unit.num_models < unit.initial_num_models:
+            return MOVES + (REGENERATE,)
+        return MOVES
+    if prefix[1] == REGENERATE:
+        return (None,)
+    return (SHOTS, CHARGES)[level - 2]
+
+
+def apply_action(action, active_player, opposing_player, battlefield, rng=None, index=None):
+    """
+    Play one activation chosen by the search: (unit index, move, shot, charge).
+    Follows ai_third_input's rules for units in melee (fight, or Disengage first).
+    Returns the activated unit.
+    """
+    unit_index, move, shot, charge = action
+    unit = active_player.units[unit_index]
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
+
+    if unit.melee_target is not None and unit.abilities.disengage:
+        away_position = (unit.position[0] + unit.movement, unit.position[1] + unit.movement)
+        unit.position = util.move_towards(unit.position, away_position, unit.movement)
+        unit.melee_target.melee_target = None
+        unit.melee_target = None
+    elif unit.melee_target is not None:
+        ai_third_input.melee_fight(unit, unit.melee_target, active_player, rng)
+        unit.has_activated = True
+        return unit
+
+    if move == REGENERATE:
+        unit.regenerate(rng)
+        unit.has_activated = True
+        return unit
+
+    target_position = None
+    if move == 'heuristic':
+        target_position = ai_third_input.decide_move_target(unit, active_player, opposing_player, battlefield, index)
+    elif move == 'objective':
+        control_points = battlefield.get_control_points()
+        if control_points:
+            cp = min(control_points, key=lambda cp: util.distance((cp.x, cp.y), unit.position))
+            target_position = (cp.x, cp.y)
+    elif move == 'enemy':
+        enemy = index.nearest_enemy(unit)
+        if enemy is not None:
+            target_position = enemy.position
+    if target_position:
+        unit.position = util.move_towards(unit.position, target_position, unit.movement)
+
+    if shot is not None:
+        targets = [e for e in index.enemies_within(unit, unit.attack_range) if not index.is_engaged(e)]
+        if targets:
+            if shot == 'nearest':
+                target = min(targets, key=lambda e: util.distance(unit.position, e.position))
+            else:
+                target = min(targets, key=lambda e: e.current_wounds_sum())
+            simulate_fight(unit, target, active_player, rng=rng)
+
+    if charge:
+        enemies = index.enemies_within(unit, CHARGE_RANGE)
+        if enemies:
+            target = min(enemies, key=lambda e: util.distance(unit.position, e.position))
+            dist = util.distance(unit.position, target.position)
+            charge_roll = ai_third_input.roll_2d6(rng)
+            if target.abilities.overwatch and not target.has_activated:
+                target.attack(unit, 'missile', charging=False, rng=rng)
+            if charge_roll >= dist and unit.is_alive():
+                simulate_fight(unit, target, active_player, 0, 'melee', charging=True, rng=rng)
+                unit.melee_target = target
+                target.melee_target = unit
+
+    unit.has_activated = True
+    return unit
+
+
+def _select(stats, player, tree_rng, exploration):
+    # Walk down the tree of choices by UCB1, trying unvisited options first
+    prefix = ()
+    for _ in range(4):
+        options = action_options(player, prefix)
+        unvisited = [o for o in options if prefix + (o,) not in stats]
+        if unvisited:
+            prefix += (tree_rng.choice(unvisited),)
+            continue
+        log_n = math.log(stats[prefix][0])
+
+        def ucb(option):
+            visits, value = stats[prefix + (option,)]
+            return value / visits + exploration * math.sqrt(log_n / visits)
+
+        prefix += (max(options, key=ucb),)
+    return prefix
+
+
+def _rollout(state, active_is_a, action, rng):
+    # Play the action in a fork, then the rest of the game with the heuristic AI on both sides
+    player_a, player_b, battlefield, rng, loop = state.fork(rng)
+    player_a.controller = player_b.controller = None
+    active, opposing = (player_a, player_b) if active_is_a else (player_b, player_a)
+    unit = apply_action(action, active, opposing, battlefield, rng, loop.index)
+    loop.activation_done(unit.ap_cost)
+    game.play_game(player_a, player_b, battlefield, rng, loop)
+    if active.score > opposing.score:
+        return 1.0
+    if active.score < opposing.score:
+        return 0.0
+    return 0.5
+
+
+def search(state, active_is_a, seed, budget_ms=None, rollouts=None, exploration=EXPLORATION, stream=0):
+    """
+    MCTS over the choices of one activation from a GameState taken in the deciding
+    player's controller. Each iteration selects an action down the tree (unit, move, shot,
+    charge) with UCB1 and scores it by one heuristic rollout to the end of the game.
+    Runs until budget_ms or `rollouts` iterations, whichever comes first (at least one).
+
+    Returns statistics for every visited prefix of an action: {prefix: [visits, total reward]}.
+    """
+    player = state.player_a if active_is_a else state.player_b
+    stats = {}
+    tree_rng = random.Random(seed)
+    deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+    previous_active = bus.active
+    bus.active = False  # Rollouts are not part of the game's log
+    try:
+        i = 0
+        while i == 0 or ((rollouts is None or i < rollouts) and (deadline is None or time.perf_counter() < deadline)):
+            action = _select(stats, player, tree_rng, exploration)
+            rng = game_rng.GameRNG(np.random.SeedSequence(seed, spawn_key=(stream, i)))
+            reward = _rollout(state, active_is_a, action, rng)
+            for depth in range(len(action) + 1):
+                entry = stats.setdefault(action[:depth], [0, 0.0])
+                entry[0] += 1
+                entry[1] += reward
+            i += 1
+    finally:
+        bus.active = previous_active
+    return stats
+
+
+def _search_worker(args):
+    player_a, player_b, battlefield, loop, active_is_a, seed, budget_ms, rollouts, exploration, stream = args
+    state = GameState(player_a, player_b, battlefield, None, loop, capture_rng=False)
+    return search(state, active_is_a, seed, budget_ms, rollouts, exploration, stream)
+
+
+def best_action(stats, player):
+    """The most visited option at each level of the tree."""
+    prefix = ()
+    for _ in range(4):
+        options = [o for o in action_options(player, prefix) if prefix + (o,) in stats]
+        prefix += (max(options, key=lambda o: stats[prefix + (o,)][0]),)
+    return prefix
+
+
+def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number, rng=None, index=None,
+                     budget_ms=200, rollouts=None, workers=1, exploration=EXPLORATION, pool=None):
+    """
+    Controller with ai_third_input.ai_activate_unit's signature that picks the activation
+    by MCTS (see search). budget_ms and rollouts bound the search per decision; with
+    workers > 1 that many processes search independently (root parallelization) and
+    their statistics are summed. They run on pool if given, else on a pool started for
+    this decision alone (MCTSController keeps one for the whole game).
+    Falls back to the heuristic AI outside game.play_game.
+    """
+    if active_player.turn is None:
+        return ai_third_input.ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number, rng, index)
+    if not available_units(active_player):
+        return None
+
+    state = GameState.of_turn(active_player, capture_rng=False)
+    active_is_a = active_player is state.player_a
+    seed = game_rng.resolve(rng).ai.getrandbits(63)
+    if workers > 1:
+        player_a, player_b, fork_battlefield, _, loop = state.fork()
+        player_a.controller = player_b.controller = None
+        jobs = [
+            (player_a, player_b, fork_battlefield, loop, active_is_a, seed, budget_ms,
+             None if rollouts is None else -(-rollouts // workers), exploration, stream)
+            for stream in range(workers)
+        ]
+        if pool is None:
+            with ProcessPoolExecutor(max_workers=workers) as decision_pool:
+                parts = list(decision_pool.map(_search_worker, jobs))
+        else:
+            parts = pool.map(_search_worker, jobs)
+        stats = {}
+        for part in parts:
+            for prefix, (visits, value) in part.items():
+                entry = stats.setdefault(prefix, [0, 0.0])
+                entry[0] += visits
+                entry[1] += value
+    else:
+        stats = search(state, active_is_a, seed, budget_ms, rollouts, exploration)
+
+    action = best_action(stats, active_player)
+    return apply_action(action, active_player, opposing_player, battlefield, rng, index)
+
+
+class MCTSController:
+    """
+    Player.controller running ai_activate_unit with fixed search settings.
+    With workers > 1 it starts a process pool on its first decision and keeps it until
+    close(); use it as a context manager to have that done on exit.
+    """
+
+    def __init__(self, budget_ms=200, rollouts=None, workers=1, exploration=EXPLORATION):
+        self.budget_ms = budget_ms
+        self.rollouts = rollouts
+        self.workers = workers
+        self.exploration = exploration
+        self.pool = None
+
+    def __call__(self, active_player, opposing_player, battlefield, active_a, turn_number, rng=None, index=None):
+        if self.workers > 1 and self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return ai_activate_unit(
+            active_player, opposing_player, battlefield, active_a, turn_number, rng, index,
+            self.budget_ms, self.rollouts, self.workers, self.exploration, self.pool,
+        )
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    import main
+
+    parser = argparse.ArgumentParser(description="Play the MCTS AI against the heuristic AI.")
+    parser.add_argument("--games", type=int, default=20, help="Games to play; MCTS alternates sides.")
+    parser.add_argument("--value", type=int, default=22, help="Total unit value for each player.")
+    parser.add_argument("--budget-ms", type=float, default=200, help="Search time per decision.")
+    parser.add_argument("--rollouts", type=int, help="Rollouts per decision (default: only the time budget).")
+    parser.add_argument("--workers", type=int, default=1, help="Processes searching each decision.")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed.")
+    args = parser.parse_args()
+
+    points = 0.0
+    start = time.perf_counter()
+    with MCTSController(args.budget_ms, args.rollouts, args.workers) as controller:
+        for game_index in range(args.games):
+            mcts_first = game_index % 2 == 0
+            rng = game_rng.GameRNG.for_game(args.seed, game_index)
+            player1, player2 = main.play_one_game(
+                args.value, rng, controllers=(controller, None) if mcts_first else (None, controller),
+            )
+            mcts, heuristic = (player1, player2) if mcts_first else (player2, player1)
+            points += 1.0 if mcts.score > heuristic.score else 0.5 if mcts.score == heuristic.score else 0.0
+    print(f"MCTS vs heuristic: {points}/{args.games} points ({points / args.games:.1%}) "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -1,26 +1,27 @@
 import util
 import board_state
-import random
+import game_rng
 import math
+from events import bus, MessageEvent
+from spatial import SpatialIndex, CHARGE_RANGE, ENGAGEMENT_RANGE
 
-def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number):
+def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number, rng=None, index=None):
     available_units = [u for u in active_player.units if u.is_alive() and not u.has_activated]
     if not available_units:
         return None
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
 
     # Sort units by priority:
     # 1. Highest AP first
     # 2. Units currently in melee (so they can free up and shoot/attack again)
     # 3. As a tiebreaker, random or additional heuristics can apply
     # Check if unit is in melee by seeing if any enemy is within 1"
-    def in_melee(u):
-        return any(e.is_alive() and util.distance(u.position, e.position) <= 1 for e in opposing_player.units)
-
-    available_units.sort(key=lambda u: (u.ap_cost, in_melee(u)), reverse=True)
+    available_units.sort(key=lambda u: (u.ap_cost, index.is_engaged(u)), reverse=True)
 
     chosen_unit = available_units[0]
 
-    if chosen_unit.melee_target is not None and 'Disengage' in chosen_unit.keywords:
+    if chosen_unit.melee_target is not None and chosen_unit.abilities.disengage:
         # Unit tries to disengage: move away from enemy before doing anything else
         away_position = (chosen_unit.position[0] + chosen_unit.movement, chosen_unit.position[1] + chosen_unit.movement)
         chosen_unit.position = util.move_towards(chosen_unit.position, away_position, chosen_unit.movement)
@@ -28,46 +29,48 @@ def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn
         chosen_unit.melee_target = None  # now not in melee
     elif chosen_unit.melee_target is not None:
         # No Disengage: fight melee
-        melee_fight(chosen_unit, chosen_unit.melee_target, active_player)
+        melee_fight(chosen_unit, chosen_unit.melee_target, active_player, rng)
         chosen_unit.has_activated = True
         return chosen_unit
 
     # Consider Regenerate (small chance if wounded)
-    if 'Regenerate' in chosen_unit.keywords and random.random() < 0.1:
-        chosen_unit.regenerate()
+    if chosen_unit.abilities.regenerate and game_rng.resolve(rng).ai.random() < 0.1:
+        chosen_unit.regenerate(rng)
         chosen_unit.has_activated = True
         return chosen_unit
 
     # Determine movement target
-    move_target = decide_move_target(chosen_unit, active_player, opposing_player, battlefield)
+    move_target = decide_move_target(chosen_unit, active_player, opposing_player, battlefield, index)
     if move_target:
         move_distance = chosen_unit.movement
         chosen_unit.position = util.move_towards(chosen_unit.position, move_target, move_distance)
 
     # Attempt missile attack
-    try_missile_attack(chosen_unit, active_player, opposing_player)
+    try_missile_attack(chosen_unit, active_player, opposing_player, rng, index)
 
     # Attempt charge, with preference to help units in melee
-    try_charge(chosen_unit, active_player, opposing_player)
+    try_charge(chosen_unit, active_player, opposing_player, rng, index)
 
     chosen_unit.has_activated = True
     return chosen_unit
 
 
-def decide_move_target(chosen_unit, active_player, opposing_player, battlefield):
+def decide_move_target(chosen_unit, active_player, opposing_player, battlefield, index=None):
     """Decide where the chosen unit should move.
        Preferences:
        1. Move towards a control point that is less contested or unoccupied by enemies.
        2. If no suitable CP, move towards the nearest enemy.
     """
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
     control_points = battlefield.get_control_points()
     alive_enemies = [e for e in opposing_player.units if e.is_alive()]
+    enemy_team = index.enemy_team(chosen_unit)
 
     # Helper to measure how contested a CP is: number of enemy units within 6"
     def enemy_presence_at_cp(cp):
         radius = 6
-        enemy_count = sum(1 for e in alive_enemies if util.distance((cp.x, cp.y), e.position) <= radius)
-        return enemy_count
+        return len(index.units_within((cp.x, cp.y), radius, enemy_team))
 
     # Pick a CP with minimal enemy presence
     if control_points:
@@ -79,46 +82,47 @@ def decide_move_target(chosen_unit, active_player, opposing_player, battlefield)
             return (best_cp.x, best_cp.y)
 
     # If no good CP or prefer enemies, go for the nearest enemy
-    if alive_enemies:
-        nearest_enemy = min(alive_enemies, key=lambda e: util.distance(chosen_unit.position, e.position))
+    nearest_enemy = index.nearest_enemy(chosen_unit)
+    if nearest_enemy is not None:
         return nearest_enemy.position
 
     # If no enemies and no CP worth taking, just stand still
     return None
 
 
-def try_missile_attack(chosen_unit, active_player, opposing_player):
+def try_missile_attack(chosen_unit, active_player, opposing_player, rng=None, index=None):
     # Fire at a random valid target if in range and not engaged in melee
-    alive_enemies = [e for e in opposing_player.units if e.is_alive()]
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
     viable_targets = [
-        e for e in alive_enemies 
-        if util.distance(chosen_unit.position, e.position) <= chosen_unit.attack_range
-        and not any(util.distance(e.position, ally.position) <= 1 for ally in active_player.units if ally.is_alive())
+        e for e in index.enemies_within(chosen_unit, chosen_unit.attack_range)
+        if not index.is_engaged(e)
     ]
     if viable_targets:
         # Prefer enemy units that are currently in melee with our allies (to free them)
         # If none in melee, pick a random target
         ally_stuck_in_melee = set(
-            friendly for friendly in active_player.units if friendly.is_alive() and 
-            any(util.distance(friendly.position, ene.position) <= 1 for ene in opposing_player.units if ene.is_alive())
+            friendly for friendly in active_player.units if friendly.is_alive() and index.is_engaged(friendly)
         )
         if ally_stuck_in_melee:
             # Find enemies engaged with these allies
             engaged_enemies = [e for e in viable_targets
-                                if any(util.distance(e.position, f.position) <= 1 for f in ally_stuck_in_melee)]
+                                if any(f in ally_stuck_in_melee for f in index.enemies_within(e, ENGAGEMENT_RANGE))]
             if engaged_enemies:
-                enemy_target = random.choice(engaged_enemies)
+                enemy_target = game_rng.resolve(rng).ai.choice(engaged_enemies)
             else:
-                enemy_target = random.choice(viable_targets)
+                enemy_target = game_rng.resolve(rng).ai.choice(viable_targets)
         else:
-            enemy_target = random.choice(viable_targets)
+            enemy_target = game_rng.resolve(rng).ai.choice(viable_targets)
 
         from fight import simulate_fight
-        simulate_fight(chosen_unit, enemy_target, active_player)
+        simulate_fight(chosen_unit, enemy_target, active_player, rng=rng)
 
 
-def try_charge(chosen_unit, active_player, opposing_player):
+def try_charge(chosen_unit, active_player, opposing_player, rng=None, index=None):
     from fight import simulate_fight, melee_favorable
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
 
     # Identify if there is a friendly unit stuck in melee, and if so, try to charge the enemy it's fighting
     ally_in_melee = [
@@ -126,18 +130,20 @@ def try_charge(chosen_unit, active_player, opposing_player):
         friendly.melee_target is not None
     ]
 
-    enemies_in_range = [e for e in opposing_player.units if e.is_alive() and util.distance(chosen_unit.position, e.position) <= 12]
+    enemies_in_range = index.enemies_within(chosen_unit, CHARGE_RANGE)
 
     if not enemies_in_range:
-        print("no enemies in range")
+        if bus.active:
+            bus.emit(MessageEvent("no enemies in range"))
         return
 
     # If we have allies in melee, try to charge the enemy that traps them
     if ally_in_melee:
         # Find all enemies trapping allies
+        ally_in_melee = set(ally_in_melee)
         enemies_trapping_allies = [
-            e for e in enemies_in_range 
-            if any(util.distance(e.position, f.position) <= 1 for f in ally_in_melee)
+            e for e in enemies_in_range
+            if any(f in ally_in_melee for f in index.enemies_within(e, ENGAGEMENT_RANGE))
         ]
         if enemies_trapping_allies:
             # Charge the closest enemy that is trapping an ally
@@ -148,22 +154,22 @@ def try_charge(chosen_unit, active_player, opposing_player):
         enemy_target = min(enemies_in_range, key=lambda e: util.distance(chosen_unit.position, e.position))
 
     dist = util.distance(chosen_unit.position, enemy_target.position)
-    charge_roll = roll_2d6()
+    charge_roll = roll_2d6(rng)
 
     # Overwatch check
-    if 'Overwatch' in enemy_target.keywords and not enemy_target.has_activated:
+    if enemy_target.abilities.overwatch and not enemy_target.has_activated:
         # Enemy gets a missile attack before movement
-        enemy_target.attack(chosen_unit, 'missile', charging=False)
+        enemy_target.attack(chosen_unit, 'missile', charging=False, rng=rng)
 
-    if charge_roll >= dist and melee_favorable(chosen_unit, enemy_target):
-        simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', charging=True)
+    if charge_roll >= dist and chosen_unit.is_alive() and melee_favorable(chosen_unit, enemy_target, overwatch=False):
+        simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', charging=True, rng=rng)
         chosen_unit.melee_target = enemy_target
         enemy_target.melee_target = chosen_unit
 
 
-def melee_fight(chosen_unit, enemy_target, active_player):
+def melee_fight(chosen_unit, enemy_target, active_player, rng=None):
     from fight import simulate_fight
-    simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee')
+    simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', rng=rng)
 
 
 def find_unit_by_id_or_name(units, identifier):
@@ -180,5 +186,6 @@ def find_unit_by_id_or_name(units, identifier):
         return None
 
 
-def roll_2d6():
-    return random.randint(1, 6) + random.randint(1, 6)
+def roll_2d6(rng=None):
+    dice = game_rng.resolve(rng).dice
+    return dice.randint(1, 6) + dice.randint(1, 6)
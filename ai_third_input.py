@@ -1,23 +1,23 @@
 import util
 import board_state
-import random
+import game_rng
 import math
+from spatial import SpatialIndex, CHARGE_RANGE, ENGAGEMENT_RANGE
 
-def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number):
+def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number, rng=None, index=None):
     available_units = [u for u in active_player.units if u.is_alive() and not u.has_activated]
     if not available_units:
         return None
-
-    def in_melee(u):
-        return any(e.is_alive() and util.distance(u.position, e.position) <= 1 for e in opposing_player.units)
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
 
     # Sort units by priority (Highest AP, then units in melee)
-    available_units.sort(key=lambda u: (u.ap_cost, in_melee(u)), reverse=True)
+    available_units.sort(key=lambda u: (u.ap_cost, index.is_engaged(u)), reverse=True)
 
     chosen_unit = available_units[0]
 
     # Handle if unit is currently in melee
-    if chosen_unit.melee_target is not None and 'Disengage' in chosen_unit.keywords:
+    if chosen_unit.melee_target is not None and chosen_unit.abilities.disengage:
         # Disengage
         away_position = (chosen_unit.position[0] + chosen_unit.movement, chosen_unit.position[1] + chosen_unit.movement)
         chosen_unit.position = util.move_towards(chosen_unit.position, away_position, chosen_unit.movement)
@@ -26,33 +26,33 @@ def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn
         chosen_unit.melee_target = None
     elif chosen_unit.melee_target is not None:
         # Fight melee
-        melee_fight(chosen_unit, chosen_unit.melee_target, active_player)
+        melee_fight(chosen_unit, chosen_unit.melee_target, active_player, rng)
         chosen_unit.has_activated = True
         return chosen_unit
 
     # Consider Regenerate
-    if 'Regenerate' in chosen_unit.keywords and random.random() < 0.1:
-        chosen_unit.regenerate()
+    if chosen_unit.abilities.regenerate and game_rng.resolve(rng).ai.random() < 0.1:
+        chosen_unit.regenerate(rng)
         chosen_unit.has_activated = True
         return chosen_unit
 
     # Determine movement target based on new priorities
-    move_target = decide_move_target(chosen_unit, active_player, opposing_player, battlefield)
+    move_target = decide_move_target(chosen_unit, active_player, opposing_player, battlefield, index)
     if move_target:
         move_distance = chosen_unit.movement
         chosen_unit.position = util.move_towards(chosen_unit.position, move_target, move_distance)
 
     # Attempt missile attack
-    try_missile_attack(chosen_unit, active_player, opposing_player)
+    try_missile_attack(chosen_unit, active_player, opposing_player, rng, index)
 
     # Attempt charge
-    try_charge(chosen_unit, active_player, opposing_player)
+    try_charge(chosen_unit, active_player, opposing_player, rng, index)
 
     chosen_unit.has_activated = True
     return chosen_unit
 
 
-def decide_move_target(chosen_unit, active_player, opposing_player, battlefield):
+def decide_move_target(chosen_unit, active_player, opposing_player, battlefield, index=None):
     """
     New Priority:
     1. If unit has stronger melee (more melee dice than missile dice):
@@ -63,31 +63,28 @@ def decide_move_target(chosen_unit, active_player, opposing_player, battlefield)
 
     'Not engaged' enemy: an enemy that does not have a melee_target and is not within 1" of any friendly unit.
     """
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
     control_points = battlefield.get_control_points()
     alive_enemies = [e for e in opposing_player.units if e.is_alive()]
+    enemy_team = index.enemy_team(chosen_unit)
 
     melee_dice_count = len(chosen_unit.base_melee_attack_dice)
     missile_dice_count = len(chosen_unit.base_missile_attack_dice)
 
     def enemy_presence_at_cp(cp):
         radius = 6
-        return sum(1 for e in alive_enemies if util.distance((cp.x, cp.y), e.position) <= radius)
+        return len(index.units_within((cp.x, cp.y), radius, enemy_team))
 
     def is_enemy_engaged(enemy):
         # Enemy engaged if it has a melee_target or is within 1" of any friendly unit
-        if enemy.melee_target is not None:
-            return True
-        # Check proximity to any friendly unit
-        if any(util.distance(enemy.position, f.position) <= 1 for f in active_player.units if f.is_alive()):
-            return True
-        return False
+        return enemy.melee_target is not None or index.is_engaged(enemy)
 
     # 1. Melee preferred: Find a not engaged enemy
     if melee_dice_count > missile_dice_count:
-        not_engaged_enemies = [e for e in alive_enemies if not is_enemy_engaged(e)]
-        if not_engaged_enemies:
-            # Move towards the nearest non-engaged enemy
-            target_enemy = min(not_engaged_enemies, key=lambda e: util.distance(chosen_unit.position, e.position))
+        # Move towards the nearest non-engaged enemy
+        target_enemy = index.nearest_enemy(chosen_unit, where=lambda e: not is_enemy_engaged(e))
+        if target_enemy is not None:
             return target_enemy.position
         # If no not-engaged enemy found, fall through to next logic
 
@@ -113,49 +110,51 @@ def decide_move_target(chosen_unit, active_player, opposing_player, battlefield)
     return None
 
 
-def try_missile_attack(chosen_unit, active_player, opposing_player):
-    alive_enemies = [e for e in opposing_player.units if e.is_alive()]
+def try_missile_attack(chosen_unit, active_player, opposing_player, rng=None, index=None):
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
     viable_targets = [
-        e for e in alive_enemies 
-        if util.distance(chosen_unit.position, e.position) <= chosen_unit.attack_range
-        and not any(util.distance(e.position, ally.position) <= 1 for ally in active_player.units if ally.is_alive())
+        e for e in index.enemies_within(chosen_unit, chosen_unit.attack_range)
+        if not index.is_engaged(e)
     ]
     if viable_targets:
         ally_stuck_in_melee = {
-            friendly for friendly in active_player.units if friendly.is_alive() and 
-            any(util.distance(friendly.position, ene.position) <= 1 for ene in opposing_player.units if ene.is_alive())
+            friendly for friendly in active_player.units if friendly.is_alive() and index.is_engaged(friendly)
         }
         if ally_stuck_in_melee:
             engaged_enemies = [e for e in viable_targets
-                                if any(util.distance(e.position, f.position) <= 1 for f in ally_stuck_in_melee)]
+                                if any(f in ally_stuck_in_melee for f in index.enemies_within(e, ENGAGEMENT_RANGE))]
             if engaged_enemies:
-                enemy_target = random.choice(engaged_enemies)
+                enemy_target = game_rng.resolve(rng).ai.choice(engaged_enemies)
             else:
-                enemy_target = random.choice(viable_targets)
+                enemy_target = game_rng.resolve(rng).ai.choice(viable_targets)
         else:
-            enemy_target = random.choice(viable_targets)
+            enemy_target = game_rng.resolve(rng).ai.choice(viable_targets)
 
         from fight import simulate_fight
-        simulate_fight(chosen_unit, enemy_target, active_player)
+        simulate_fight(chosen_unit, enemy_target, active_player, rng=rng)
 
 
-def try_charge(chosen_unit, active_player, opposing_player):
+def try_charge(chosen_unit, active_player, opposing_player, rng=None, index=None):
     from fight import simulate_fight, melee_favorable
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
 
     ally_in_melee = [
         friendly for friendly in active_player.units if friendly.is_alive() and 
         friendly.melee_target is not None
     ]
 
-    enemies_in_range = [e for e in opposing_player.units if e.is_alive() and util.distance(chosen_unit.position, e.position) <= 12]
+    enemies_in_range = index.enemies_within(chosen_unit, CHARGE_RANGE)
     if not enemies_in_range:
         return
 
     # If we have allies in melee, try to charge the enemy that traps them
     if ally_in_melee:
+        ally_in_melee = set(ally_in_melee)
         enemies_trapping_allies = [
-            e for e in enemies_in_range 
-            if any(util.distance(e.position, f.position) <= 1 for f in ally_in_melee)
+            e for e in enemies_in_range
+            if any(f in ally_in_melee for f in index.enemies_within(e, ENGAGEMENT_RANGE))
         ]
         if enemies_trapping_allies:
             enemy_target = min(enemies_trapping_allies, key=lambda e: util.distance(chosen_unit.position, e.position))
@@ -165,21 +164,21 @@ def try_charge(chosen_unit, active_player, opposing_player):
         enemy_target = min(enemies_in_range, key=lambda e: util.distance(chosen_unit.position, e.position))
 
     dist = util.distance(chosen_unit.position, enemy_target.position)
-    charge_roll = roll_2d6()
+    charge_roll = roll_2d6(rng)
 
     # Overwatch check
-    if 'Overwatch' in enemy_target.keywords and not enemy_target.has_activated:
-        enemy_target.attack(chosen_unit, 'missile', charging=False)
+    if enemy_target.abilities.overwatch and not enemy_target.has_activated:
+        enemy_target.attack(chosen_unit, 'missile', charging=False, rng=rng)
 
-    if charge_roll >= dist and melee_favorable(chosen_unit, enemy_target):
-        simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', charging=True)
+    if charge_roll >= dist and chosen_unit.is_alive() and melee_favorable(chosen_unit, enemy_target, overwatch=False):
+        simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', charging=True, rng=rng)
         chosen_unit.melee_target = enemy_target
         enemy_target.melee_target = chosen_unit
 
 
-def melee_fight(chosen_unit, enemy_target, active_player):
+def melee_fight(chosen_unit, enemy_target, active_player, rng=None):
     from fight import simulate_fight
-    simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee')
+    simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', rng=rng)
 
 
 def find_unit_by_id_or_name(units, identifier):
@@ -196,5 +195,6 @@ def find_unit_by_id_or_name(units, identifier):
         return None
 
 
-def roll_2d6():
-    return random.randint(1, 6) + random.randint(1, 6)
+def roll_2d6(rng=None):
+    dice = game_rng.resolve(rng).dice
+    return dice.randint(1, 6) + dice.randint(1, 6)
@@ -1,8 +1,9 @@
 import util
 import board_state
-import random
+import game_rng
+from spatial import SpatialIndex, CHARGE_RANGE, ENGAGEMENT_RANGE
 
-def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number):
+def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number, rng=None, index=None):
     """
     Automated version of user_activate_unit:
     - No human input.
@@ -25,14 +26,15 @@ def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn
     if not available_units:
         return None
 
-    chosen_unit = random.choice(available_units)
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
+
+    streams = game_rng.resolve(rng)
+    chosen_unit = streams.ai.choice(available_units)
     # Check if unit is in melee
-    enemy_in_melee = next(
-        (e for e in opposing_player.units if e.is_alive() and util.distance(chosen_unit.position, e.position) <= 1),
-        None
-    )
+    enemy_in_melee = next(iter(index.enemies_within(chosen_unit, ENGAGEMENT_RANGE)), None)
 
-    if enemy_in_melee and 'Disengage' in chosen_unit.keywords:
+    if enemy_in_melee and chosen_unit.abilities.disengage:
         # Move away from enemy before doing anything else
         # Just pick a direction away from enemy and move full movement
         away_position = (chosen_unit.position[0] + 5, chosen_unit.position[1] + 5)  # Arbitrary
@@ -41,92 +43,95 @@ def ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn
 
     elif enemy_in_melee:
         # If no Disengage, just fight melee
-        melee_fight(chosen_unit, enemy_in_melee, active_player)
+        melee_fight(chosen_unit, enemy_in_melee, active_player, rng)
         chosen_unit.has_activated = True
         return chosen_unit
 
-    # Decide if Regenerate (if 'Regenerate' in chosen_unit.keywords)
+    # Decide if Regenerate (if chosen_unit.abilities.regenerate)
     # For simplicity, 10% chance to regenerate if wounded:
-    if 'Regenerate' in chosen_unit.keywords and random.random() < 0.1:
-        chosen_unit.regenerate()
+    if chosen_unit.abilities.regenerate and streams.ai.random() < 0.1:
+        chosen_unit.regenerate(rng)
         chosen_unit.has_activated = True
         return chosen_unit
 
     # Normal move/attack/charge logic unchanged
-    move_target = decide_move_target(chosen_unit, opposing_player, battlefield)
+    move_target = decide_move_target(chosen_unit, opposing_player, battlefield, rng)
     if move_target:
         move_distance = chosen_unit.movement
         chosen_unit.position = util.move_towards(chosen_unit.position, move_target, move_distance)
 
     # Attempt missile attack
-    try_missile_attack(chosen_unit, active_player, opposing_player)
+    try_missile_attack(chosen_unit, active_player, opposing_player, rng, index)
 
     # Attempt charge
-    try_charge(chosen_unit, opposing_player, active_player)
+    try_charge(chosen_unit, opposing_player, active_player, rng, index)
 
     chosen_unit.has_activated = True
     return chosen_unit
 
-def decide_move_target(chosen_unit, opposing_player, battlefield):
+def decide_move_target(chosen_unit, opposing_player, battlefield, rng=None):
+    ai_rng = game_rng.resolve(rng).ai
     # Decide whether to move towards a control point or an enemy
     control_points = battlefield.get_control_points()
     alive_enemies = [e for e in opposing_player.units if e.is_alive()]
 
     # If no enemies, go for control point
     if not alive_enemies and control_points:
-        cp = random.choice(control_points)
+        cp = ai_rng.choice(control_points)
         return (cp.x, cp.y)
 
     # If no control points, go for enemy
     if not control_points and alive_enemies:
-        e = random.choice(alive_enemies)
+        e = ai_rng.choice(alive_enemies)
         return e.position
 
     # Otherwise randomly pick what to move towards
-    if random.random() < 0.5 and control_points:
-        cp = random.choice(control_points)
+    if ai_rng.random() < 0.5 and control_points:
+        cp = ai_rng.choice(control_points)
         return (cp.x, cp.y)
     else:
-        e = random.choice(alive_enemies) if alive_enemies else None
+        e = ai_rng.choice(alive_enemies) if alive_enemies else None
         return e.position if e else None
 
-def try_missile_attack(chosen_unit, active_player, opposing_player):
+def try_missile_attack(chosen_unit, active_player, opposing_player, rng=None, index=None):
     # Fire at a random valid target if in range and not engaged in melee
-    alive_enemies = [e for e in opposing_player.units if e.is_alive()]
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
     # Exclude enemies engaged in melee
     viable_targets = [
-        e for e in alive_enemies 
-        if util.distance(chosen_unit.position, e.position) <= chosen_unit.attack_range
-        and not any(util.distance(e.position, ally.position) <= 1 for ally in active_player.units if ally.is_alive())
+        e for e in index.enemies_within(chosen_unit, chosen_unit.attack_range)
+        if not index.is_engaged(e)
     ]
     if viable_targets:
-        enemy_target = random.choice(viable_targets)
+        enemy_target = game_rng.resolve(rng).ai.choice(viable_targets)
         from fight import simulate_fight
-        simulate_fight(chosen_unit, enemy_target, active_player)
+        simulate_fight(chosen_unit, enemy_target, active_player, rng=rng)
 
-def try_charge(chosen_unit, opposing_player, active_player):
+def try_charge(chosen_unit, opposing_player, active_player, rng=None, index=None):
     from fight import simulate_fight, melee_favorable
-    enemies_in_range = [e for e in opposing_player.units if e.is_alive() and util.distance(chosen_unit.position, e.position) <= 12]
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
+    enemies_in_range = index.enemies_within(chosen_unit, CHARGE_RANGE)
     if not enemies_in_range:
         return
     enemy_target = min(enemies_in_range, key=lambda e: util.distance(chosen_unit.position, e.position))
     dist = util.distance(chosen_unit.position, enemy_target.position)
-    charge_roll = roll_2d6()
+    charge_roll = roll_2d6(rng)
 
     # Overwatch: If enemy has Overwatch and not activated, enemy fires before charge roll is even executed.
     # This should happen before the charge distance roll in a full implementation.
     # For simplicity, assume Overwatch is triggered here if conditions met:
-    if 'Overwatch' in enemy_target.keywords and not enemy_target.has_activated:
+    if enemy_target.abilities.overwatch and not enemy_target.has_activated:
         # Enemy gets a missile attack before movement
-        enemy_target.attack(chosen_unit, 'missile', charging=False)
+        enemy_target.attack(chosen_unit, 'missile', charging=False, rng=rng)
 
-    if charge_roll >= dist and melee_favorable(chosen_unit, enemy_target):
-        simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', charging=True)
+    if charge_roll >= dist and chosen_unit.is_alive() and melee_favorable(chosen_unit, enemy_target, overwatch=False):
+        simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', charging=True, rng=rng)
 
 
-def melee_fight(chosen_unit, enemy_target, active_player):
+def melee_fight(chosen_unit, enemy_target, active_player, rng=None):
     from fight import simulate_fight
-    simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee')
+    simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', rng=rng)
 
 def find_unit_by_id_or_name(units, identifier):
     try:
@@ -141,5 +146,6 @@ def find_unit_by_id_or_name(units, identifier):
             return matches[0]
         return None
 
-def roll_2d6():
-    return random.randint(1, 6) + random.randint(1, 6)
+def roll_2d6(rng=None):
+    dice = game_rng.resolve(rng).dice
+    return dice.randint(1, 6) + dice.randint(1, 6)
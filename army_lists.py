@@ -0,0 +1,116 @@
+import math
+import random
+from collections import Counter
+from itertools import combinations_with_replacement
+
+
+def multinomial(counts):
+    """Number of distinct orderings of a multiset with the given multiplicities."""
+    orderings = math.factorial(sum(counts))
+    for count in counts:
+        orderings //= math.factorial(count)
+    return orderings
+
+
+def alias_table(weights):
+    """
+    Vose's alias method: tables for drawing index i with probability weights[i] / sum(weights)
+    in O(1) per draw. Returns (prob, alias) lists.
+    """
+    n = len(weights)
+    total = float(sum(weights))
+    scaled = [w * n / total for w in weights]
+    prob = [0.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        (small if scaled[l] < 1.0 else large).append(l)
+    # Whatever is left is 1 up to rounding
+    for i in large + small:
+        prob[i] = 1.0
+    return prob, alias
+
+
+class ArmyLists:
+    """
+    Every army (multiset of template names) whose total AP cost fits a budget,
+    indexed once so armies can be drawn in O(1) or enumerated in full.
+
+    weighting decides how likely each army is:
+      'sequence' - proportional to its number of orderings, which is the distribution
+                   of drawing units one by one uniformly and rejecting over-budget lists;
+      'multiset' - every army equally likely;
+      a callable - weight(army) for an army given as a sorted tuple of names.
+    """
+
+    def __init__(self, templates, target, tolerance=10, sizes=(5,), weighting='sequence'):
+        """
+        :param templates: Dict of unit templates with an "ap_cost" each.
+        :param target: Budget to match.
+        :param tolerance: Armies must cost strictly less than tolerance away from target;
+                          0 requires an exact match (up to float rounding).
+        :param sizes: Army sizes (number of units) to include.
+        """
+        self.target = target
+        self.tolerance = tolerance
+        self.sizes = tuple(sizes)
+        self.weighting = weighting
+        names = sorted(templates)
+        costs = {name: templates[name]["ap_cost"] for name in names}
+
+        self.armies = []
+        self.costs = []
+        for size in self.sizes:
+            for army in combinations_with_replacement(names, size):
+                cost = sum(costs[name] for name in army)
+                if self._fits(cost):
+                    self.armies.append(army)
+                    self.costs.append(cost)
+
+        if weighting == 'sequence':
+            self.weights = [multinomial(Counter(army).values()) for army in self.armies]
+        elif weighting == 'multiset':
+            self.weights = [1] * len(self.armies)
+        elif callable(weighting):
+            self.weights = [weighting(army) for army in self.armies]
+        else:
+            raise ValueError(f"Unknown weighting: {weighting!r}")
+
+        if self.armies and sum(self.weights) > 0:
+            self._prob, self._alias = alias_table(self.weights)
+        else:
+            self._prob, self._alias = [], []
+
+    def _fits(self, cost):
+        if self.tolerance == 0:
+            return math.isclose(cost, self.target, rel_tol=1e-9, abs_tol=1e-9)
+        return abs(cost - self.target) < self.tolerance
+
+    def __len__(self):
+        return len(self.armies)
+
+    def __iter__(self):
+        """Every valid army with its cost, for exhaustive sweeps."""
+        return iter(zip(self.armies, self.costs))
+
+    def sample_index(self, rng=random):
+        if not self._prob:
+            raise ValueError(f"No army of size {self.sizes} costs within {self.tolerance} of {self.target}")
+        i = rng.randrange(len(self._prob))
+        return i if rng.random() < self._prob[i] else self._alias[i]
+
+    def sample(self, rng=random):
+        """
+        Draw an army as a list of template names. With 'sequence' weighting the units come
+        in a random order, so lists are distributed exactly as with rejection sampling.
+        """
+        army = list(self.armies[self.sample_index(rng)])
+        if self.weighting == 'sequence':
+            rng.shuffle(army)
+        return army
@@ -0,0 +1,191 @@
+import numpy as np
+from unit import Unit
+
+# Attributes that never change during a game; ArrayUnit keeps these as plain attributes
+STATIC_ATTRIBUTES = (
+    'name', 'initial_num_models', 'wounds_per_model', 'armor', 'movement',
+    'base_missile_attack_dice', 'base_melee_attack_dice', 'attack_range', 'id',
+    'special_rules', 'keywords', 'last_stand_active', 'degrade_amount', 'commander_value',
+    'abilities', '_attack_pools',
+)
+
+
+class BattleArrays:
+    """
+    Struct-of-arrays backend: the mutable state of every unit in a battle lives in
+    contiguous NumPy arrays indexed by unit id (the unit's row), and each Unit is an
+    ArrayUnit view onto its row.
+
+    wounds[uid, slot] holds each model's current wounds; slots beyond a unit's
+    starting model count are padding and stay at 0.
+    """
+
+    def __init__(self, units, owners):
+        count = len(units)
+        slots = max((u.initial_num_models for u in units), default=0)
+
+        self.wounds = np.zeros((count, slots), dtype=np.int64)
+        self.model_slots = np.array([u.initial_num_models for u in units], dtype=np.int64)
+        self.wounds_per_model = np.array([u.wounds_per_model for u in units], dtype=np.int64)
+        self.models_alive = np.zeros(count, dtype=np.int64)
+        self.regenerated = np.zeros(count, dtype=np.int64)
+        self.positions = np.full((count, 2), np.nan)
+        self.has_activated = np.zeros(count, dtype=bool)
+        self.alive = np.zeros(count, dtype=bool)
+        self.ap_cost = np.array([u.ap_cost for u in units], dtype=np.float64)
+        self.shields_remaining = np.array([u.shields_remaining for u in units], dtype=np.int64)
+        self.pending_casualties = np.array([u.pending_casualties for u in units], dtype=np.int64)
+        self.owner = np.array(owners, dtype=np.int64)
+
+        self.units = []
+        for uid, unit in enumerate(units):
+            # Models beyond the starting count (from Regenerate) fill dead slots first
+            current = [m.current_wounds for m in unit.models]
+            alive = [w for w in current if w > 0]
+            dead = [w for w in current if w <= 0]
+            row = (alive + dead)[:unit.initial_num_models]
+            self.wounds[uid, :len(row)] = row
+            self.models_alive[uid] = len(alive)
+            self.has_activated[uid] = unit.has_activated
+            self.alive[uid] = unit.alive
+            if unit.position is not None:
+                self.positions[uid] = unit.position
+            self.units.append(ArrayUnit(self, uid, unit))
+
+        # Views point at each other for melee locks, not at the original objects
+        view_by_source = {id(source): view for source, view in zip(units, self.units)}
+        for source, view in zip(units, self.units):
+            if source.melee_target is not None:
+                view.melee_target = view_by_source.get(id(source.melee_target), source.melee_target)
+
+    @classmethod
+    def adopt(cls, *players):
+        """Move every unit of the given players onto one array backend, replacing player.units with views."""
+        units = [u for p in players for u in p.units]
+        owners = [i for i, p in enumerate(players) for _ in p.units]
+        arrays = cls(units, owners)
+        start = 0
+        for p in players:
+            p.units = arrays.units[start:start + len(p.units)]
+            start += len(p.units)
+        return arrays
+
+    # Whole-army queries
+
+    def alive_mask(self):
+        """Units with at least one model alive (Last Stand pending casualties not included)."""
+        return self.models_alive > 0
+
+    def wounds_remaining(self):
+        return np.clip(self.wounds, 0, None).sum(axis=1)
+
+    def total_ap_on_table(self, owner):
+        return float(self.ap_cost[(self.owner == owner) & self.alive_mask()].sum())
+
+    def distances_to(self, point):
+        """Manhattan distance (util.distance) from every unit to a point."""
+        return np.abs(self.positions - np.asarray(point, dtype=np.float64)).sum(axis=1)
+
+    def nbytes(self):
+        return sum(a.nbytes for a in vars(self).values() if isinstance(a, np.ndarray))
+
+
+class ModelView:
+    """A model as a view onto one cell of BattleArrays.wounds."""
+    __slots__ = ('_row', '_slot', 'max_wounds')
+
+    def __init__(self, row, slot, max_wounds):
+        self._row = row
+        self._slot = slot
+        self.max_wounds = max_wounds
+
+    @property
+    def current_wounds(self):
+        return int(self._row[self._slot])
+
+    @current_wounds.setter
+    def current_wounds(self, value):
+        self._row[self._slot] = value
+
+    def take_wound(self, damage):
+        self._row[self._slot] -= damage
+
+    def is_alive(self):
+        return self._row[self._slot] > 0
+
+
+def _array_field(name, cast):
+    def getter(self):
+        return cast(getattr(self._arrays, name)[self.uid])
+
+    def setter(self, value):
+        getattr(self._arrays, name)[self.uid] = value
+
+    return property(getter, setter)
+
+
+class ArrayUnit(Unit):
+    """
+    A Unit whose mutable state is stored in a BattleArrays row.
+    Everything that reads or writes unit state goes through the arrays, so
+    whole-army queries on BattleArrays always see the current game.
+    """
+
+    num_models = _array_field('models_alive', int)
+    has_activated = _array_field('has_activated', bool)
+    alive = _array_field('alive', bool)
+    ap_cost = _array_field('ap_cost', float)
+    shields_remaining = _array_field('shields_remaining', int)
+    pending_casualties = _array_field('pending_casualties', int)
+
+    def __init__(self, arrays, uid, source):
+        # Deliberately does not call Unit.__init__: state comes from the source unit
+        self._arrays = arrays
+        self.uid = uid
+        for attribute in STATIC_ATTRIBUTES:
+            setattr(self, attribute, getattr(source, attribute))
+        self.melee_target = None
+        self._wounds_row = arrays.wounds[uid]
+        self.models = [
+            ModelView(self._wounds_row, slot, source.wounds_per_model)
+            for slot in range(source.initial_num_models)
+        ]
+
+    @property
+    def position(self):
+        x, y = self._arrays.positions[self.uid].tolist()
+        if x != x:  # NaN: not deployed yet
+            return None
+        return (x, y)
+
+    @position.setter
+    def position(self, value):
+        self._arrays.positions[self.uid] = (np.nan, np.nan) if value is None else value
+        if self.spatial_index is not None:
+            self.spatial_index.move(self)
+        if self.board is not None:
+            self.board.unit_changed(self)
+
+    def is_alive(self):
+        if self._arrays.models_alive[self.uid] > 0:
+            return True
+        return self.last_stand_active and self.pending_casualties > 0 and not self.has_activated
+
+    def current_wounds_sum(self):
+        return int(self._wounds_row.sum())
+
+    def calculate_total_wounds(self):
+        total_possible_wounds = (len(self.models) + self._arrays.regenerated[self.uid]) * self.wounds_per_model
+        return int(total_possible_wounds - np.clip(self._wounds_row, 0, None).sum())
+
+    def check_casualties(self):
+        alive_models = int(np.count_nonzero(self._wounds_row > 0))
+        self.num_models = alive_models
+        if alive_models == 0:
+            self.alive = False
+
+    def _restore_models(self, amount):
+        # Regenerated models refill dead slots instead of being appended to the model list
+        dead_slots = np.flatnonzero(self._wounds_row[:len(self.models)] <= 0)[:amount]
+        self._wounds_row[dead_slots] = self.wounds_per_model
+        self._arrays.regenerated[self.uid] += amount
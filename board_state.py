@@ -1,5 +1,11 @@
+import bisect
 import math
 
+
+def euclidean_distance(pos1, pos2):
+    return math.sqrt((pos1[0] - pos2[0])**2 + (pos1[1] - pos2[1])**2)
+
+
 def get_board_state(player_a, player_b, battlefield, turn, active_player):
     def euclidean_distance(pos1, pos2):
         return math.sqrt((pos1[0] - pos2[0])**2 + (pos1[1] - pos2[1])**2)
@@ -150,3 +156,253 @@ def get_board_visualization(player_a, player_b, battlefield, state):
         lines.append(' '.join(grid[row]))
 
     return "\n".join(lines)
+
+
+# Radius within which units of both sides make a control point contested
+CONTESTED_RADIUS = 3
+
+
+class BoardState:
+    """
+    The data of get_board_state, kept up to date incrementally.
+
+    Units report changes (a move, wounds taken, death or regeneration) through
+    unit.board, which only marks them dirty. Reading state() refreshes just the
+    dirty units: their control point distances, their contribution to each
+    control point's contested count and the per-player nearest distance. A
+    player's nearest distance to a control point is only rescanned when the
+    unit that held it moved away or died.
+    """
+
+    def __init__(self, player_a, player_b, battlefield):
+        self.player_a = player_a
+        self.player_b = player_b
+        self.battlefield = battlefield
+        self.players = (player_a, player_b)
+        self.cp_positions = [(cp.x, cp.y) for cp in battlefield.control_points]
+        num_cps = len(self.cp_positions)
+
+        # Per unit: (player index, board id), and what it last contributed
+        self._slot = {}
+        self._position = {}
+        self._cp_distances = {}
+        self._alive = {}
+        self._wounds = {}
+        # Per control point and player: units within CONTESTED_RADIUS, nearest alive unit
+        self._in_range = [[0, 0] for _ in range(num_cps)]
+        self._nearest = [[None, None] for _ in range(num_cps)]
+        self._nearest_distance = [[float('inf'), float('inf')] for _ in range(num_cps)]
+        self._cp_data = None
+        # Cached rendering, built by the first visualization() call
+        self._grid = None
+
+        # Last Stand units can stay alive until they activate, which isn't reported,
+        # so they are re-checked on every read
+        self._always_check = []
+        board_id = 1
+        for index, player in enumerate(self.players):
+            for unit in player.units:
+                self._slot[unit] = (index, board_id)
+                self._alive[unit] = False
+                self._cp_distances[unit] = None
+                unit.board = self
+                if unit.last_stand_active:
+                    self._always_check.append(unit)
+                board_id += 1
+        self._dirty = set(self._slot)
+
+    def unit_changed(self, unit):
+        """Called by a unit after it moved, took wounds, died or regenerated."""
+        self._dirty.add(unit)
+        if self._grid is not None:
+            self._grid.dirty.add(unit)
+
+    def _refresh(self):
+        dirty = self._dirty
+        dirty.update(self._always_check)
+        if not dirty:
+            return
+        stale = set()
+        for unit in dirty:
+            if unit in self._slot:
+                self._refresh_unit(unit, stale)
+        dirty.clear()
+
+        for i, player_index in stale:
+            self._rescan_nearest(i, player_index)
+        self._cp_data = None
+
+    def _refresh_unit(self, unit, stale):
+        player_index, _ = self._slot[unit]
+        old_alive = self._alive[unit]
+        old_distances = self._cp_distances[unit]
+
+        position = unit.position
+        if position != self._position.get(unit):
+            self._position[unit] = position
+            self._cp_distances[unit] = None if position is None else [
+                euclidean_distance(position, cp) for cp in self.cp_positions
+            ]
+        distances = self._cp_distances[unit]
+        alive = unit.is_alive() and distances is not None
+        self._alive[unit] = alive
+        self._wounds[unit] = unit.current_wounds_sum()
+
+        for i in range(len(self.cp_positions)):
+            in_range = self._in_range[i]
+            if old_alive and old_distances[i] <= CONTESTED_RADIUS:
+                in_range[player_index] -= 1
+            if alive and distances[i] <= CONTESTED_RADIUS:
+                in_range[player_index] += 1
+
+            if alive and distances[i] < self._nearest_distance[i][player_index]:
+                self._nearest[i][player_index] = unit
+                self._nearest_distance[i][player_index] = distances[i]
+            elif self._nearest[i][player_index] is unit:
+                # The nearest unit moved away or died; someone else may be nearer now
+                stale.add((i, player_index))
+
+    def _rescan_nearest(self, i, player_index):
+        nearest, best = None, float('inf')
+        for unit in self.players[player_index].units:
+            if self._alive.get(unit) and self._cp_distances[unit][i] < best:
+                nearest, best = unit, self._cp_distances[unit][i]
+        self._nearest[i][player_index] = nearest
+        self._nearest_distance[i][player_index] = best
+
+    def _control_points_data(self):
+        if self._cp_data is None:
+            self._cp_data = []
+            for i, (x, y) in enumerate(self.cp_positions):
+                dist_a, dist_b = self._nearest_distance[i]
+                self._cp_data.append({
+                    'id': i + 1,
+                    'x': x,
+                    'y': y,
+                    'is_contested': self._in_range[i][0] > 0 and self._in_range[i][1] > 0,
+                    'distance_to_cp': {
+                        self.player_a.name: dist_a if dist_a != float('inf') else None,
+                        self.player_b.name: dist_b if dist_b != float('inf') else None,
+                    },
+                })
+        return self._cp_data
+
+    def _units_data(self, player):
+        units_data = []
+        for u in player.units:
+            _, board_id = self._slot[u]
+            unit_data = {
+                'id': board_id,
+                'name': u.name,
+                'position': u.position,
+                'template': u.name,
+                'total_wounds_remaining': self._wounds[u],
+                'has_activated': u.has_activated,
+            }
+            distances = self._cp_distances[u]
+            if distances:
+                unit_data['distance_to_cp'] = min(distances)
+            units_data.append(unit_data)
+        return units_data
+
+    def state(self, turn, active_player):
+        """The board as a dict with the same shape as get_board_state."""
+        self._refresh()
+        return {
+            'battlefield': {
+                'width': self.battlefield.width,
+                'height': self.battlefield.height,
+                'control_points': self._control_points_data(),
+            },
+            'players': {
+                self.player_a.name: {
+                    'score': self.player_a.score,
+                    'units': self._units_data(self.player_a),
+                },
+                self.player_b.name: {
+                    'score': self.player_b.score,
+                    'units': self._units_data(self.player_b),
+                },
+            },
+            'turn': turn,
+            'active_player': active_player.name if active_player else None,
+        }
+
+    def visualization(self):
+        """The same text as get_board_visualization, redrawing only the rows units moved in or out of."""
+        if self._grid is None:
+            self._grid = BoardGrid(self)
+        return self._grid.render()
+
+
+class BoardGrid:
+    """
+    Cached character grid for BoardState.visualization.
+
+    Each cell keeps its labels ordered as get_board_visualization draws them
+    (control points, then Player A's units, then Player B's), and each row
+    keeps its rendered line until a label in it changes.
+    """
+    scale = 4
+
+    def __init__(self, board):
+        self.board = board
+        self.width_cells = board.battlefield.width // self.scale
+        self.height_cells = board.battlefield.height // self.scale
+        self.cells = {}
+        self.lines = ['' for _ in range(self.height_cells)]
+        self.dirty_rows = set(range(self.height_cells))
+        self.dirty = set(board._slot)
+        # Cell each unit is drawn in, or None
+        self.unit_cells = {}
+
+        for i, (x, y) in enumerate(board.cp_positions):
+            self._add(self._cell((x, y)), (0, i), f"C{i + 1}")
+
+    def _cell(self, position):
+        if position is None:
+            return None
+        cx = int(position[0] // self.scale)
+        cy = int(position[1] // self.scale)
+        if 0 <= cy < self.height_cells and 0 <= cx < self.width_cells:
+            return (cx, cy)
+        return None
+
+    def _add(self, cell, rank, label):
+        if cell is not None:
+            bisect.insort(self.cells.setdefault(cell, []), (rank, label))
+            self.dirty_rows.add(cell[1])
+
+    def _remove(self, cell, rank, label):
+        if cell is not None:
+            entries = self.cells[cell]
+            entries.remove((rank, label))
+            if not entries:
+                del self.cells[cell]
+            self.dirty_rows.add(cell[1])
+
+    def render(self):
+        board = self.board
+        for unit in self.dirty:
+            if unit not in board._slot:
+                continue
+            player_index, board_id = board._slot[unit]
+            cell = self._cell(unit.position)
+            old_cell = self.unit_cells.get(unit)
+            if cell == old_cell and unit in self.unit_cells:
+                continue
+            label = f"{'AB'[player_index]}{board_id}"
+            rank = (1 + player_index, board_id)
+            if unit in self.unit_cells:
+                self._remove(old_cell, rank, label)
+            self._add(cell, rank, label)
+            self.unit_cells[unit] = cell
+        self.dirty.clear()
+
+        for row in self.dirty_rows:
+            self.lines[row] = ' '.join(
+                '|'.join(label for _, label in self.cells[(cx, row)]) if (cx, row) in self.cells else '.'
+                for cx in range(self.width_cells)
+            )
+        self.dirty_rows.clear()
+        return "\n".join(self.lines)
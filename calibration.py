@@ -0,0 +1,262 @@
+import argparse
+import copy
+import math
+import os
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import game_rng
+import lockstep
+import main
+
+# z for a two-sided 95% interval
+Z_95 = 1.959963984540054
+# Lowest AP a template may be calibrated down to
+MIN_AP = 0.5
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    """Wilson score interval for a proportion; draws may be counted as half successes."""
+    if trials <= 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return centre - half_width, centre + half_width
+
+
+def _play_chunk(args):
+    """
+    Play games [start, stop) with the given templates.
+    Returns per-side template counts (sides, 2, templates), points scored by each side
+    (a win is 1, a draw 0.5) and the number of games each row stands for.
+    """
+    templates, total_value, seed, start, stop, backend, games_per_scenario = args
+    names = list(templates)
+    column = {name: i for i, name in enumerate(names)}
+    counts, points, games = [], [], []
+
+    def side_counts(units):
+        row = np.zeros(len(names), dtype=np.int64)
+        for unit in units:
+            row[column[unit.name]] += 1
+        return row
+
+    if backend == 'lockstep':
+        for scenario in range(start, stop):
+            rng = game_rng.GameRNG.for_game(seed, scenario)
+            armies = [
+                [main.build_unit_from_template(name, templates[name])
+                 for name in main.select_units_for_value(total_value, rng, templates)]
+                for _ in range(2)
+            ]
+            battle = lockstep.play_lockstep(armies[0], armies[1], games_per_scenario, rng.np_dice)
+            winners = battle.winners()
+            p1_points = np.count_nonzero(winners == 0) + 0.5 * np.count_nonzero(winners == -1)
+            counts.append([side_counts(armies[0]), side_counts(armies[1])])
+            points.append([p1_points, games_per_scenario - p1_points])
+            games.append(games_per_scenario)
+    else:
+        for game_index in range(start, stop):
+            # The same game index gets the same streams in every iteration (common random numbers)
+            rng = game_rng.GameRNG.for_game(seed, game_index)
+            player1, player2 = main.play_one_game(total_value, rng, backend, templates)
+            if player1.score > player2.score:
+                p1_points = 1.0
+            elif player2.score > player1.score:
+                p1_points = 0.0
+            else:
+                p1_points = 0.5
+            counts.append([side_counts(player1.units), side_counts(player2.units)])
+            points.append([p1_points, 1.0 - p1_points])
+            games.append(1)
+
+    return (
+        np.array(counts, dtype=np.int64).reshape(-1, 2, len(names)),
+        np.array(points, dtype=np.float64).reshape(-1, 2),
+        np.array(games, dtype=np.int64),
+    )
+
+
+def play_games(templates, total_value, n_tasks, seed=0, workers=None, chunk_size=None,
+               backend='objects', games_per_scenario=50):
+    """
+    Play a batch for calibration and return (counts, points, games) as in _play_chunk.
+    n_tasks is the number of games, or of scenarios with the lockstep backend.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, min(500, n_tasks // (workers * 4) or 1))
+    chunks = [
+        (templates, total_value, seed, start, min(start + chunk_size, n_tasks), backend, games_per_scenario)
+        for start in range(0, n_tasks, chunk_size)
+    ]
+    if workers == 1:
+        parts = [_play_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_play_chunk, chunks))
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+
+def template_win_rates(counts, points, games):
+    """
+    Per template: points per game of the sides that fielded it, and the games behind that rate.
+    Each side counts once however many copies of the template it fielded.
+    """
+    fielded = counts > 0
+    side_games = np.broadcast_to(games[:, None, None], fielded.shape)
+    template_points = (fielded * points[:, :, None]).sum(axis=(0, 1))
+    template_games = (fielded * side_games).sum(axis=(0, 1))
+    rates = np.divide(template_points, template_games, out=np.full(len(template_games), 0.5), where=template_games > 0)
+    return rates, template_points, template_games
+
+
+def rescale_costs(ap, budget, floor=MIN_AP):
+    """
+    Scale AP costs to add up to budget without letting any fall below floor.
+    Costs that would end up under the floor are held at it and the rest share what is left.
+    """
+    ap = np.maximum(floor, np.asarray(ap, dtype=np.float64))
+    held = np.zeros(len(ap), dtype=bool)
+    while not held.all():
+        free = np.flatnonzero(~held)
+        scaled = ap[free] * (budget - floor * held.sum()) / ap[free].sum()
+        below = scaled < floor
+        if not below.any():
+            ap[free] = scaled
+            break
+        held[free[below]] = True
+    ap[held] = floor
+    return ap
+
+
+class CalibrationResult:
+    """AP costs found by calibrate() and the history of every iteration."""
+
+    def __init__(self, ap_costs, history, games, converged):
+        self.ap_costs = ap_costs
+        self.history = history
+        self.games = games
+        self.converged = converged
+
+    def templates(self, base=None):
+        """A copy of base (unit_templates by default) with the calibrated AP costs."""
+        templates = copy.deepcopy(main.unit_templates if base is None else base)
+        for name, ap_cost in self.ap_costs.items():
+            templates[name]["ap_cost"] = ap_cost
+        return templates
+
+    def summary(self):
+        status = "converged" if self.converged else "not converged"
+        lines = [f"--- Calibration {status} after {len(self.history)} iterations, {self.games} games ---"]
+        last = self.history[-1] if self.history else None
+        for name, ap_cost in self.ap_costs.items():
+            if last is None:
+                lines.append(f"{name}: AP={ap_cost:.2f}")
+                continue
+            # The rates belong to the costs the last iteration played with, not to the update after it
+            low, high = last['intervals'][name]
+            line = (f"{name}: AP={last['ap_costs'][name]:.2f} "
+                    f"(win rate {last['rates'][name]:.3f}, CI {low:.3f}-{high:.3f})")
+            if not self.converged:
+                line += f", next AP={ap_cost:.2f}"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def calibrate(templates=None, total_value=22, games_per_iteration=2000, max_iterations=40,
+              gain=8.0, decay=0.602, tolerance=0.03, seed=0, workers=None, backend='objects',
+              games_per_scenario=50, progress=None):
+    """
+    Tune every template's AP cost toward a 50% win rate with Robbins-Monro stochastic approximation.
+
+    Each iteration plays a batch of games at the current costs and moves each template's cost by
+    gain / k**decay times (its sides' win rate - 0.5): templates that win too often get dearer.
+    Costs are then rescaled to keep their total, so the points budget keeps its meaning.
+    Every iteration reuses the same seed, so game i sees the same deployment, dice and AI streams
+    each time (common random numbers) and differences between iterations come from the costs.
+
+    Stops when every template's Wilson interval (95% jointly across templates) contains 0.5
+    and is no wider than +/- tolerance, or after max_iterations.
+
+    Args:
+        templates (dict): Starting templates; defaults to main.unit_templates. Not modified.
+        total_value (int): Points budget of each army.
+        games_per_iteration (int): Games per iteration (scenarios with the lockstep backend).
+        gain (float): AP change per unit of win rate deviation at the first iteration.
+        decay (float): Step size exponent; steps shrink as 1 / k**decay.
+        tolerance (float): Required half-width of every template's interval.
+        seed (int): Master seed shared by all iterations.
+        workers (int): Worker processes; defaults to the CPU count.
+        backend (str): 'objects', 'arrays' or 'lockstep'.
+        games_per_scenario (int): Lockstep games per pair of armies.
+        progress: Optional callable, called with each iteration's history entry.
+
+    Returns:
+        CalibrationResult
+    """
+    templates = copy.deepcopy(main.unit_templates if templates is None else templates)
+    names = list(templates)
+    ap = np.array([templates[name]["ap_cost"] for name in names], dtype=np.float64)
+    budget = ap.sum()
+    history = []
+    games_played = 0
+    converged = False
+
+    for k in range(1, max_iterations + 1):
+        for name, ap_cost in zip(names, ap):
+            templates[name]["ap_cost"] = float(ap_cost)
+        counts, points, games = play_games(
+            templates, total_value, games_per_iteration, seed, workers,
+            backend=backend, games_per_scenario=games_per_scenario,
+        )
+        games_played += int(games.sum())
+        rates, template_points, template_games = template_win_rates(counts, points, games)
+        # Bonferroni-adjusted, so all templates' intervals hold together at 95%
+        z = NormalDist().inv_cdf(1 - 0.05 / (2 * len(names)))
+        intervals = [wilson_interval(p, n, z) for p, n in zip(template_points, template_games)]
+
+        entry = {
+            'iteration': k,
+            'ap_costs': dict(zip(names, ap.tolist())),
+            'rates': dict(zip(names, rates.tolist())),
+            'intervals': dict(zip(names, intervals)),
+        }
+        history.append(entry)
+        if progress is not None:
+            progress(entry)
+
+        if all(low <= 0.5 <= high and (high - low) / 2 <= tolerance for low, high in intervals):
+            converged = True
+            break
+
+        ap = rescale_costs(ap + gain / k ** decay * (rates - 0.5), budget)
+
+    return CalibrationResult(dict(zip(names, ap.tolist())), history, games_played, converged)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate unit template AP costs toward a 50% win rate.")
+    parser.add_argument("--value", type=int, default=22, help="Total unit value for each player.")
+    parser.add_argument("--games", type=int, default=2000, help="Games per iteration (scenarios with lockstep).")
+    parser.add_argument("--iterations", type=int, default=40, help="Maximum iterations.")
+    parser.add_argument("--gain", type=float, default=8.0, help="AP step per unit of win rate deviation.")
+    parser.add_argument("--tolerance", type=float, default=0.03, help="Required confidence interval half-width.")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed shared by every iteration.")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count).")
+    parser.add_argument("--backend", choices=("objects", "arrays", "lockstep"), default="objects", help="Game engine.")
+    parser.add_argument("--games-per-scenario", type=int, default=50, help="Lockstep games per pair of armies.")
+    args = parser.parse_args()
+
+    def report(entry):
+        rates = ", ".join(f"{name}={rate:.3f}" for name, rate in entry['rates'].items())
+        print(f"Iteration {entry['iteration']}: {rates}")
+
+    result = calibrate(
+        total_value=args.value, games_per_iteration=args.games, max_iterations=args.iterations,
+        gain=args.gain, tolerance=args.tolerance, seed=args.seed, workers=args.workers,
+        backend=args.backend, games_per_scenario=args.games_per_scenario, progress=report,
+    )
+    print(result.summary())
@@ -0,0 +1,136 @@
+from functools import lru_cache
+import numpy as np
+from pool_stats import pool_signature, distribution_for_signature
+
+
+class CasualtyDistribution:
+    """
+    Exact outcome of one Unit.attack -> Unit.defend exchange.
+
+    outcomes maps (models_killed, wounds_remaining) to its probability.
+    killed_pmf[k] is the probability of exactly k models being killed.
+    """
+
+    def __init__(self, outcomes, num_models):
+        self.outcomes = outcomes
+        self.num_models = num_models
+        self.killed_pmf = np.zeros(num_models + 1)
+        for (killed, _), p in outcomes.items():
+            self.killed_pmf[killed] += p
+
+    def expected_killed(self):
+        return float(np.arange(len(self.killed_pmf)) @ self.killed_pmf)
+
+    def variance_killed(self):
+        values = np.arange(len(self.killed_pmf))
+        mean = values @ self.killed_pmf
+        return float(((values - mean) ** 2) @ self.killed_pmf)
+
+    def wipe_probability(self):
+        """Probability that every model in the defending unit is killed."""
+        return float(self.killed_pmf[-1]) if self.num_models else 0.0
+
+    def expected_wounds_remaining(self):
+        return float(sum(wounds * p for (_, wounds), p in self.outcomes.items()))
+
+
+def _step(v, fail_chance, next_state):
+    # One wound against the model at the front of the queue: saved wounds leave
+    # the state alone, failed ones move it to next_state.
+    failed = v * fail_chance
+    return v - failed + np.bincount(next_state, weights=failed, minlength=len(v))
+
+
+@lru_cache(maxsize=4096)
+def _resolve(signature, slayer, armor_save, can_save_mortal, shields, wounds):
+    """
+    Markov chain over the defender's wound state.
+
+    Wounds always go to the first alive model in targeting order, so the whole
+    unit is described by (index of the model taking wounds, its wounds left).
+    The chain has one state per remaining wound plus a terminal "wiped out" state.
+    """
+    pmf = distribution_for_signature(signature, slayer).pmf
+
+    states = [(i, w) for i, max_w in enumerate(wounds) for w in range(max_w, 0, -1)]
+    terminal = len(states)
+    index = {state: k for k, state in enumerate(states)}
+
+    # Each unsaved wound does 1 damage; doubles are already split into two
+    # normal wounds by the dice, so there is no 2-damage transition to model.
+    next_state = np.empty(terminal + 1, dtype=np.intp)
+    for k, (i, w) in enumerate(states):
+        if w > 1:
+            next_state[k] = index[(i, w - 1)]
+        elif i + 1 < len(wounds):
+            next_state[k] = index[(i + 1, wounds[i + 1])]
+        else:
+            next_state[k] = terminal
+    next_state[terminal] = terminal
+
+    fail_chance = np.full(terminal + 1, (armor_save - 1) / 6)
+    fail_chance[terminal] = 0.0
+    mortal_fail_chance = fail_chance if can_save_mortal else np.where(np.arange(terminal + 1) < terminal, 1.0, 0.0)
+
+    # Shields soak wounds from the back of the queue (normals first), so
+    # regroup the rolled pool by how many mortals and normals actually land.
+    assigned = {}
+    for n, m in zip(*np.nonzero(pmf)):
+        to_assign = max(n + m - shields, 0)
+        landed_mortal = min(m, to_assign)
+        landed_normal = min(n, to_assign - landed_mortal)
+        key = (landed_mortal, landed_normal)
+        assigned[key] = assigned.get(key, 0.0) + pmf[n, m]
+
+    max_mortal = max(m for m, _ in assigned)
+    max_normal = max(n for _, n in assigned)
+    final = np.zeros(terminal + 1)
+    after_mortals = np.zeros(terminal + 1)
+    after_mortals[0] = 1.0
+    for m in range(max_mortal + 1):
+        v = after_mortals
+        for n in range(max_normal + 1):
+            p = assigned.get((m, n))
+            if p:
+                final += p * v
+            v = _step(v, fail_chance, next_state)
+        after_mortals = _step(after_mortals, mortal_fail_chance, next_state)
+
+    outcomes = {}
+    for k, (i, w) in enumerate(states):
+        if final[k] > 0:
+            key = (i, w + sum(wounds[i + 1:]))
+            outcomes[key] = outcomes.get(key, 0.0) + float(final[k])
+    if final[terminal] > 0:
+        outcomes[(len(wounds), 0)] = float(final[terminal])
+    return outcomes
+
+
+def casualty_distribution(attacker, defender, phase, charging=False):
+    """
+    Exact distribution of models killed and wounds remaining when attacker
+    attacks defender, following the same rules as Unit.attack and Unit.defend:
+    Withering Fire/Relentless/Camouflage save modifiers, shields, mortal-first
+    wound ordering, Lucky, Slayer and Assassin casualty ordering.
+    """
+    dice_pool = attacker.get_attack_dice(phase, charging=charging)
+    armor_save = defender.get_modified_armor_save(
+        attacker.get_armor_save_modifier(phase), phase=phase, attacker=attacker
+    )
+
+    wounds = [m.current_wounds for m in defender.models if m.is_alive()]
+    if attacker.abilities.assassin:
+        wounds.reverse()
+
+    if not wounds:
+        return CasualtyDistribution({(0, 0): 1.0}, 0)
+
+    outcomes = _resolve(
+        pool_signature(dice_pool),
+        attacker.abilities.slayer,
+        armor_save,
+        defender.abilities.lucky,
+        defender.shields_remaining,
+        tuple(wounds),
+    )
+    return CasualtyDistribution(outcomes, len(wounds))
@@ -1,4 +1,5 @@
 import random
+import numpy as np
 
 # Define Dice Types with their respective outcomes
 DICE_TYPES = {
@@ -15,28 +16,100 @@ DICE_TYPES = {
     'Crimson': {'normal_wounds': 1, 'double_wounds': 4, 'mortal_wounds': 0, 'double_mortal_wounds': 0},
 }
 
-def roll_dice(dice_type):
-    result = {'normal': 0, 'double': 0, 'mortal': 0, 'double_mortal': 0}
-    dice_stats = DICE_TYPES[dice_type]
-    die_faces = []
+# What each face is worth once rolled, as (normal, mortal) wounds.
+# A double counts as 2 normal wounds and a double mortal as 2 mortal wounds.
+FACE_WOUNDS = {
+    'normal': (1, 0),
+    'double': (2, 0),
+    'mortal': (0, 1),
+    'double_mortal': (0, 2),
+    'miss': (0, 0),
+}
 
+
+def _build_die_faces(dice_stats):
     # Build the die faces according to the dice stats
+    die_faces = []
     die_faces.extend(['normal'] * dice_stats.get('normal_wounds', 0))
     die_faces.extend(['double'] * dice_stats.get('double_wounds', 0))
     die_faces.extend(['mortal'] * dice_stats.get('mortal_wounds', 0))
     die_faces.extend(['double_mortal'] * dice_stats.get('double_mortal_wounds', 0))
     # Fill the remaining faces with 'miss' to make a total of 6 faces
     die_faces.extend(['miss'] * (6 - len(die_faces)))
+    return die_faces
+
+
+# Precompiled per-color face tables, built once at import.
+# DIE_FACES[color] is a tuple of six (normal, mortal) outcomes in face order.
+DIE_FACES = {
+    dice_type: tuple(FACE_WOUNDS[face] for face in _build_die_faces(stats))
+    for dice_type, stats in DICE_TYPES.items()
+}
+
+# Array versions of the same tables for vectorised rolling, indexed [color, face].
+COLOR_INDEX = {dice_type: i for i, dice_type in enumerate(DICE_TYPES)}
+FACE_NORMAL = np.array([[n for n, _ in DIE_FACES[c]] for c in DICE_TYPES], dtype=np.int64)
+FACE_MORTAL = np.array([[m for _, m in DIE_FACES[c]] for c in DICE_TYPES], dtype=np.int64)
+
+# Slayer tables: how many faces produce mortal wounds, the chance a mortal
+# face is a double mortal, and the normal wounds on the remaining faces
+# (padded with zeros) for the final, non-mortal roll of a Slayer die.
+MORTAL_FACE_COUNT = (FACE_MORTAL > 0).sum(axis=1)
+DOUBLE_MORTAL_SHARE = np.divide(
+    (FACE_MORTAL == 2).sum(axis=1), MORTAL_FACE_COUNT,
+    out=np.zeros(len(DICE_TYPES)), where=MORTAL_FACE_COUNT > 0,
+)
+NON_MORTAL_FACE_NORMAL = np.zeros((len(DICE_TYPES), 6), dtype=np.int64)
+for _i, _row in enumerate(FACE_NORMAL):
+    _kept = _row[FACE_MORTAL[_i] == 0]
+    NON_MORTAL_FACE_NORMAL[_i, :len(_kept)] = _kept
+
+
+def roll_dice(dice_type, rng=random):
+    result = {'normal': 0, 'double': 0, 'mortal': 0, 'double_mortal': 0}
 
     # Roll the die by randomly selecting one face
-    roll = random.choice(die_faces)
-    if roll == 'double':
-        # Add 2 normal wounds instead of 1 double wound
-        result['normal'] += 2
-    elif roll == 'double_mortal':
-        # Add 2 mortal wounds instead of 1 double mortal wound
-        result['mortal'] += 2
-    elif roll != 'miss':
-        result[roll] += 1
-
-    return result
\ No newline at end of file
+    normal, mortal = rng.choice(DIE_FACES[dice_type])
+    result['normal'] += normal
+    result['mortal'] += mortal
+
+    return result
+
+
+def pool_indices(pool):
+    """Convert a list of dice colors into an array of rows of the face tables."""
+    return np.array([COLOR_INDEX[dice_type] for dice_type in pool], dtype=np.intp)
+
+
+def roll_pool(pool, rng, n_trials=1, slayer=False):
+    """
+    Roll a whole dice pool, or n_trials independent repetitions of it, in one go.
+
+    :param pool: A list of dice types, e.g. ['Black', 'Green', 'Green'].
+    :param rng: A numpy Generator, e.g. np.random.default_rng(seed).
+    :param n_trials: Number of independent rolls of the pool.
+    :param slayer: Re-roll dice that generate mortal wounds until they generate no more.
+    :return: Dict of integer arrays of shape (n_trials,) keyed 'normal', 'double' and 'mortal',
+             matching Unit.roll_attack_dice (doubles are already counted as two normal wounds).
+    """
+    colors = pool_indices(pool)
+    size = (n_trials, len(colors))
+
+    if not slayer:
+        faces = rng.integers(0, 6, size=size)
+        normal = FACE_NORMAL[colors, faces].sum(axis=1)
+        mortal = FACE_MORTAL[colors, faces].sum(axis=1)
+    else:
+        # Each die rolls K mortal faces before its first non-mortal face, so K is
+        # geometric; of those K, a binomial share are double mortals.
+        mortal_rolls = rng.geometric(1 - MORTAL_FACE_COUNT[colors] / 6, size=size) - 1
+        double_mortals = rng.binomial(mortal_rolls, DOUBLE_MORTAL_SHARE[colors])
+        last_faces = rng.integers(0, 6 - MORTAL_FACE_COUNT[colors], size=size)
+        normal = NON_MORTAL_FACE_NORMAL[colors, last_faces].sum(axis=1)
+        mortal = (mortal_rolls + double_mortals).sum(axis=1)
+
+    return {
+        'normal': normal.astype(np.int64),
+        'double': np.zeros(n_trials, dtype=np.int64),
+        'mortal': mortal.astype(np.int64),
+    }
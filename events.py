@@ -0,0 +1,253 @@
+import json
+import sys
+
+
+class Event:
+    """
+    Base class for engine events.
+
+    Events only hold raw values; text is built in text(), which only a
+    TextSink ever calls, so headless runs never format anything.
+    """
+    kind = 'event'
+    __slots__ = ()
+
+    def to_dict(self):
+        data = {'event': self.kind}
+        for name in self.__slots__:
+            data[name] = getattr(self, name)
+        return data
+
+    def text(self):
+        return str(self.to_dict())
+
+
+class MessageEvent(Event):
+    kind = 'message'
+    __slots__ = ('message',)
+
+    def __init__(self, message):
+        self.message = message
+
+    def text(self):
+        return self.message
+
+
+class TurnStartEvent(Event):
+    kind = 'turn_start'
+    __slots__ = ('turn', 'ap', 'player_a', 'player_b', 'battlefield', 'active_player', 'board')
+
+    def __init__(self, turn, ap, player_a, player_b, battlefield, active_player, board=None):
+        self.turn = turn
+        self.ap = ap
+        self.player_a = player_a
+        self.player_b = player_b
+        self.battlefield = battlefield
+        self.active_player = active_player
+        self.board = board
+
+    def to_dict(self):
+        return {'event': self.kind, 'turn': self.turn, 'ap': self.ap}
+
+    def text(self):
+        from board_state import get_board_state, get_board_visualization
+        if self.board is not None:
+            visualization = self.board.visualization()
+        else:
+            state = get_board_state(self.player_a, self.player_b, self.battlefield, self.turn, self.active_player)
+            visualization = get_board_visualization(self.player_a, self.player_b, self.battlefield, state)
+        ap_text = ', '.join(f"{name}={ap}" for name, ap in self.ap.items())
+        return (
+            f"\n===== START OF TURN {self.turn} =====\n"
+            f"Board state at start of turn:\n{visualization}\n"
+            f"AP: {ap_text}"
+        )
+
+
+class ActivationEvent(Event):
+    kind = 'activation'
+    __slots__ = ('player', 'unit', 'ap_spent')
+
+    def __init__(self, player, unit, ap_spent):
+        self.player = player
+        self.unit = unit
+        self.ap_spent = ap_spent
+
+    def text(self):
+        return f"{self.player}'s unit {self.unit} spent {self.ap_spent} AP this activation."
+
+
+class AttackEvent(Event):
+    kind = 'attack'
+    __slots__ = ('attacker', 'target', 'phase', 'charging', 'num_models', 'dice_pool', 'wounds')
+
+    def __init__(self, attacker, target, phase, charging, num_models, dice_pool, wounds):
+        self.attacker = attacker
+        self.target = target
+        self.phase = phase
+        self.charging = charging
+        self.num_models = num_models
+        self.dice_pool = dice_pool
+        self.wounds = wounds
+
+    def text(self):
+        lines = [f"{self.attacker} ({self.num_models} models) is attacking {self.target} in the {self.phase} phase."]
+        if self.charging:
+            lines.append(f"{self.attacker} is charging into combat!")
+        lines.append(f"{self.attacker} is rolling {len(self.dice_pool)} dice: {self.dice_pool}")
+        lines.append(f"{self.attacker} inflicted the following wounds: {self.wounds}")
+        return "\n".join(lines)
+
+
+class DefendEvent(Event):
+    kind = 'defend'
+    __slots__ = ('defender', 'incoming', 'armor_save', 'modifier', 'shielded')
+
+    def __init__(self, defender, incoming, armor_save, modifier, shielded):
+        self.defender = defender
+        self.incoming = incoming
+        self.armor_save = armor_save
+        self.modifier = modifier
+        self.shielded = shielded
+
+    def text(self):
+        lines = [
+            f"{self.defender} is defending against {sum(self.incoming.values())} incoming wounds: {self.incoming}",
+            f"{self.defender}'s armor save is {self.armor_save} (modifier: {self.modifier}).",
+        ]
+        if self.shielded > 0:
+            lines.append(f"{self.defender} absorbed {self.shielded} wounds with shields.")
+        return "\n".join(lines)
+
+
+class SaveEvent(Event):
+    """A successful save; roll is None when saves were rolled as a batch."""
+    kind = 'save'
+    __slots__ = ('defender', 'wound_type', 'roll', 'count')
+
+    def __init__(self, defender, wound_type, roll, count=1):
+        self.defender = defender
+        self.wound_type = wound_type
+        self.roll = roll
+        self.count = count
+
+    def text(self):
+        if self.roll is None:
+            return f"{self.defender} saved against {self.count} {self.wound_type} wounds."
+        return f"{self.defender} saved against {self.wound_type} damage with a roll of {self.roll}."
+
+
+class ModelLostEvent(Event):
+    kind = 'model_lost'
+    __slots__ = ('unit', 'wound_type')
+
+    def __init__(self, unit, wound_type):
+        self.unit = unit
+        self.wound_type = wound_type
+
+    def text(self):
+        return f"{self.unit} lost a model to {self.wound_type} damage."
+
+
+class CasualtyEvent(Event):
+    """Emitted after a unit resolves an attack: casualties taken and models left."""
+    kind = 'casualty'
+    __slots__ = ('unit', 'casualties', 'models_remaining')
+
+    def __init__(self, unit, casualties, models_remaining):
+        self.unit = unit
+        self.casualties = casualties
+        self.models_remaining = models_remaining
+
+    def text(self):
+        lines = [f"{self.unit} took {self.casualties} casualties this phase."]
+        if self.models_remaining == 0:
+            lines.append(f"{self.unit} has been wiped out.")
+        else:
+            lines.append(f"{self.unit} has {self.models_remaining} models remaining.")
+        return "\n".join(lines)
+
+
+class ScoreEvent(Event):
+    kind = 'score'
+    __slots__ = ('turn', 'scores')
+
+    def __init__(self, turn, scores):
+        self.turn = turn
+        self.scores = scores
+
+    def text(self):
+        score_text = ', '.join(f"{name}={score}" for name, score in self.scores.items())
+        return f"End of Turn {self.turn} Scores: {score_text}"
+
+
+class GameEndEvent(Event):
+    kind = 'game_end'
+    __slots__ = ('winner', 'scores')
+
+    def __init__(self, winner, scores):
+        self.winner = winner
+        self.scores = scores
+
+    def text(self):
+        if self.winner is None:
+            a, b = self.scores.values()
+            return f"It's a draw! Final Score: {a} vs {b}"
+        loser_score = next(score for name, score in self.scores.items() if name != self.winner)
+        return f"{self.winner} wins! Final Score: {self.scores[self.winner]} vs {loser_score}"
+
+
+class EventBus:
+    """
+    Fan-out of engine events to subscribed sinks.
+
+    Emitters check bus.active before building an event, so with nothing
+    subscribed an emit site costs one attribute lookup.
+    """
+
+    def __init__(self):
+        self.sinks = []
+        self.active = False
+
+    def subscribe(self, sink):
+        self.sinks.append(sink)
+        self.active = True
+        return sink
+
+    def unsubscribe(self, sink):
+        self.sinks.remove(sink)
+        self.active = bool(self.sinks)
+
+    def emit(self, event):
+        for sink in self.sinks:
+            sink.handle(event)
+
+
+class NullSink:
+    """Accepts every event and does nothing with it."""
+
+    def handle(self, event):
+        pass
+
+
+class TextSink:
+    """Human-readable log, the same text the engine used to print."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def handle(self, event):
+        print(event.text(), file=self.stream or sys.stdout)
+
+
+class JsonLinesSink:
+    """One JSON object per event, for machine-readable game logs."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def handle(self, event):
+        self.stream.write(json.dumps(event.to_dict()) + "\n")
+
+
+bus = EventBus()
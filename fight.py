@@ -1,14 +1,100 @@
 import random
+from events import bus, MessageEvent
+from casualties import casualty_distribution
+import matchups
 
-def melee_favorable(attacker, defender):
+# Rounds of melee melee_favorable looks ahead: the charge, then the reply
+FAVORABLE_ROUNDS = 1
+
+_table = None
+
+
+def _matchup_table():
+    global _table
+    if _table is None:
+        _table = matchups.load_matchup_table()
+    return _table
+
+
+def _interpolate(values, a, d):
+    """Bilinear lookup in values[attacker_models, defender_models] at fractional model counts."""
+    a0, d0 = int(a), int(d)
+    fa, fd = a - a0, d - d0
+    a1 = min(a0 + 1, values.shape[0] - 1)
+    d1 = min(d0 + 1, values.shape[1] - 1)
+    low = values[a0, d0] * (1 - fd) + values[a0, d1] * fd
+    high = values[a1, d0] * (1 - fd) + values[a1, d1] * fd
+    return float(low * (1 - fa) + high * fa)
+
+
+def expected_casualties(attacker, defender, phase, charging=False, attacker_models=None, defender_models=None):
+    """
+    Expected models killed by one attack, with either side optionally at a (possibly
+    fractional) lower model count. Template units are read from the matchup table; units
+    with keywords or unknown names fall back to an exact casualty_distribution.
+    """
+    if attacker_models is None:
+        attacker_models = attacker.num_models
+    if defender_models is None:
+        defender_models = defender.num_models
+    if attacker_models <= 0 or defender_models <= 0:
+        return 0.0
+
+    table = _matchup_table()
+    i = table.index.get(attacker.name)
+    j = table.index.get(defender.name)
+    if i is not None and j is not None and not attacker.keywords and not defender.keywords:
+        values = table.expected[i, j, matchups.PHASES.index(phase), int(bool(charging))]
+        return min(_interpolate(values, attacker_models, defender_models), defender_models)
+
+    killed = casualty_distribution(attacker, defender, phase, charging).expected_killed()
+    return min(killed * attacker_models / max(attacker.num_models, 1), defender_models)
+
+
+def melee_favorable(attacker, defender, rounds=FAVORABLE_ROUNDS, overwatch=True, attacker_models=None,
+                    defender_models=None):
     """
-    Placeholder for melee favorability logic.
-    Eventually, this might be replaced with a more complex, possibly ML-driven decision.
-    For now, let's just return True.
+    Whether charging defender is expected to pay off.
+
+    Plays the exchange forward on expected casualties: Overwatch fire on the way in (if
+    overwatch and the defender can still fire it), the charge with its Crushing Charge
+    dice, the defender's reply, and further rounds up to rounds. Losses are weighted by
+    each unit's AP per model; the charge is favorable when it trades at least evenly and
+    deals some damage, so a charger Overwatch would wipe out never is.
+    Armor and special rules are priced in by the casualty tables.
+
+    :param rounds: Rounds of melee to look ahead; each is an attack and a reply.
+    :param overwatch: Count Overwatch fire; pass False once it has already been resolved.
+    :param attacker_models, defender_models: Model counts to judge at, instead of the units' own.
     """
-    return True
+    a = float(attacker.num_models if attacker_models is None else attacker_models)
+    d = float(defender.num_models if defender_models is None else defender_models)
+    taken = dealt = 0.0
+
+    if overwatch and defender.abilities.overwatch and not defender.has_activated:
+        lost = expected_casualties(defender, attacker, 'missile', False, d, a)
+        a -= lost
+        taken += lost
+    if a <= 0:
+        return False
+
+    for round_index in range(rounds):
+        if a <= 0:
+            break
+        killed = expected_casualties(attacker, defender, 'melee', round_index == 0, a, d)
+        d -= killed
+        dealt += killed
+        if d <= 0:
+            break
+        lost = expected_casualties(defender, attacker, 'melee', False, d, a)
+        a -= lost
+        taken += lost
+
+    attacker_value = attacker.ap_cost / attacker.initial_num_models
+    defender_value = defender.ap_cost / defender.initial_num_models
+    return dealt > 0 and dealt * defender_value >= taken * attacker_value
 
-def simulate_fight(unit_a, unit_b, active_player, initial_distance=24, phase='missile', charging=False):
+def simulate_fight(unit_a, unit_b, active_player, initial_distance=24, phase='missile', charging=False, rng=None):
     """
     Simulates a fight between two units, tracking kills and updating active player's stats.
     :param unit_a: The attacking unit.
@@ -16,6 +102,7 @@ def simulate_fight(unit_a, unit_b, active_player, initial_distance=24, phase='mi
     :param initial_distance: Starting distance between the units.
     :param active_player: The player controlling the attacking unit.
     :param phase: The phase of the fight ('missile' or 'melee').
+    :param rng: Optional GameRNG for the dice and save rolls.
     """
     # Initial conditions
     distance = initial_distance
@@ -33,7 +120,7 @@ def simulate_fight(unit_a, unit_b, active_player, initial_distance=24, phase='mi
     # Perform a single ranged attack if possible
     if phase == 'missile':
         initial_models = unit_b.num_models
-        unit_a.attack(unit_b, 'missile', charging=False)
+        unit_a.attack(unit_b, 'missile', charging=False, rng=rng)
         total_wounds_by_phase[active_unit.name]['missile'] += defending_unit.calculate_total_wounds()
 
         # Count kills from missile attack
@@ -54,9 +141,10 @@ def simulate_fight(unit_a, unit_b, active_player, initial_distance=24, phase='mi
 
     # Perform a melee attack if in melee phase
     if phase == 'melee':
-        print(f"{active_unit.name} is doing melee")
+        if bus.active:
+            bus.emit(MessageEvent(f"{active_unit.name} is doing melee"))
         initial_models = unit_b.num_models
-        unit_a.attack(unit_b, 'melee', charging=charging)
+        unit_a.attack(unit_b, 'melee', charging=charging, rng=rng)
         total_wounds_by_phase[active_unit.name]['melee'] += defending_unit.calculate_total_wounds()
 
         # Count kills from melee attack
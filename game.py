@@ -3,24 +3,53 @@ import ai_third_input
 from fight import simulate_fight, melee_favorable
 import ap
 import util
+import game_rng
 import random
-from board_state import get_board_state, get_board_visualization
-
-def play_game(player_a, player_b, battlefield):
-    # Run a fixed number of turns, for example
-    for turn_number in range(1, 5):
-        print(f"\n===== START OF TURN {turn_number} =====")
-        play_turn(player_a, player_b, battlefield, turn_number)
+from events import bus, TurnStartEvent, ActivationEvent, ScoreEvent, GameEndEvent, MessageEvent
+from spatial import SpatialIndex
+from board_state import BoardState
+
+# Turns in a game
+TURNS = 4
+
+
+def play_game(player_a, player_b, battlefield, rng=None, loop=None):
+    """
+    Play a game to the end. rng is an optional game_rng.GameRNG; with the same seed a game
+    replays exactly. Pass loop (an ActivationLoop, e.g. from GameState.fork) to continue a
+    game from the middle of that turn instead of from the start. Without rng the game
+    gets its own GameRNG, seeded from the random module.
+    """
+    rng = game_rng.ensure(rng)
+    # Board data for the turn reports, updated as units move and take wounds. Only the
+    # reports read it, so headless games skip the bookkeeping (TurnStartEvent can still
+    # build the board from scratch if the bus is switched on mid-game)
+    board = BoardState(player_a, player_b, battlefield) if bus.active else None
+    first_turn = 1
+    if loop is not None:
+        loop.run()
+        end_turn(player_a, player_b, battlefield, loop.turn_number)
+        first_turn = loop.turn_number + 1
+    for turn_number in range(first_turn, TURNS + 1):
+        play_turn(player_a, player_b, battlefield, turn_number, rng, board)
 
     # End of game
-    if player_a.score > player_b.score:
-        print(f"{player_a.name} wins! Final Score: {player_a.score} vs {player_b.score}")
-    elif player_b.score > player_a.score:
-        print(f"{player_b.name} wins! Final Score: {player_b.score} vs {player_a.score}")
-    else:
-        print(f"It's a draw! Final Score: {player_a.score} vs {player_b.score}")
-
-def play_turn(player_a, player_b, battlefield, turn_number):
+    if bus.active:
+        if player_a.score > player_b.score:
+            winner = player_a.name
+        elif player_b.score > player_a.score:
+            winner = player_b.name
+        else:
+            winner = None
+        bus.emit(GameEndEvent(winner, {player_a.name: player_a.score, player_b.name: player_b.score}))
+
+def play_turn(player_a, player_b, battlefield, turn_number, rng=None, board=None):
+    loop = start_turn(player_a, player_b, battlefield, turn_number, rng, board)
+    loop.run()
+    end_turn(player_a, player_b, battlefield, turn_number)
+
+def start_turn(player_a, player_b, battlefield, turn_number, rng=None, board=None):
+    """Allocate AP, reset activations and report the turn; returns the turn's ActivationLoop."""
     # Determine AP for both
     ap_a, ap_b = ap.determine_ap_allocation(player_a, player_b)
 
@@ -32,64 +61,122 @@ def play_turn(player_a, player_b, battlefield, turn_number):
     for u in player_a.units + player_b.units:
         u.has_activated = False
 
-    # Print board state at start of turn
-    state = get_board_state(player_a, player_b, battlefield, turn_number, first_player if first_player_is_active else second_player)
-    visualization = get_board_visualization(player_a, player_b, battlefield, state)
-    print("Board state at start of turn:")
-    print(visualization)
-    print(f"AP: {player_a.name}={ap_a}, {player_b.name}={ap_b}")
-
-    # Activation loop
-    while first_ap > 0 or second_ap > 0:
-        all_a_done = all(not u.is_alive() or u.has_activated for u in first_player.units)
-        all_b_done = all(not u.is_alive() or u.has_activated for u in second_player.units)
-
-        if all_a_done and all_b_done:
-            print("All units on both sides activated or dead. Ending turn early.")
-            break
-
-        # If first player cannot activate a unit, we let them spend 1 AP doing nothing
-        if first_ap > 0 and all_a_done:
-            print(f"{first_player.name} has no units to activate. Forcing AP usage.")
-            first_ap -= 1
-
-        # If second player cannot activate a unit, we do the same
-        if second_ap > 0 and all_b_done:
-            print(f"{second_player.name} has no units to activate. Forcing AP usage.")
-            second_ap -= 1
-
-        # If after this both have no units and no AP to do anything meaningful, we might just break out
-        if all_a_done and all_b_done:
-            break
-
-        # Try to activate first player's unit if they still have AP and not done
-        if first_ap > 0 and not all_a_done:
-            ap_spent = activate_unit_this_turn(first_player, second_player, battlefield, first_ap, first_player_is_active, turn_number)
-            first_ap -= ap_spent
-
-        # Try to activate second player's unit if they still have AP and not done
-        if second_ap > 0 and not all_b_done:
-            ap_spent = activate_unit_this_turn(second_player, first_player, battlefield, second_ap, not first_player_is_active, turn_number)
-            second_ap -= ap_spent
-
-        # If no progress is made in a loop iteration (no AP spent), consider breaking out.
-        if ap_spent == 0 and all_a_done and all_b_done:
-            # Safety check to avoid infinite loop
-            break
+    # Report the board state at start of turn; it is only rendered if a sink asks for the text
+    if bus.active:
+        bus.emit(TurnStartEvent(
+            turn_number, {player_a.name: ap_a, player_b.name: ap_b}, player_a, player_b, battlefield,
+            first_player if first_player_is_active else second_player, board,
+        ))
 
+    return ActivationLoop(player_a, player_b, battlefield, turn_number, first_ap, second_ap, rng)
+
+def end_turn(player_a, player_b, battlefield, turn_number):
     # Scoring Phase
     score_control_points(player_a, player_b, battlefield)
-    print(f"End of Turn {turn_number} Scores: {player_a.name}={player_a.score}, {player_b.name}={player_b.score}")
-
-def activate_unit_this_turn(active_player, opposing_player, battlefield, ap_available, active_a, turn_number):
-    
-    if active_a:
-        chosen_unit = ai_third_input.ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number)
-    else:
-        chosen_unit = ai_third_input.ai_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number)
+    if bus.active:
+        bus.emit(ScoreEvent(turn_number, {player_a.name: player_a.score, player_b.name: player_b.score}))
+
+
+# ActivationLoop.next_step: what the loop does next in the current round
+ROUND_START, FIRST_ACTIVATION, SECOND_ACTIVATION = 0, 1, 2
+
+
+class ActivationLoop:
+    """
+    The alternating activations of one turn, kept as explicit state so a game can be
+    snapshot (game_state.GameState) and resumed between or during activations.
+
+    Each round checks who can still act, then activates a unit of the first player, then
+    one of the second. next_step says which of those comes next; it only advances once an
+    activation returns, so a snapshot taken by a controller while it decides resumes with
+    that same decision. all_a_done / all_b_done are as checked at the start of the round.
+    While the loop runs, each player's `turn` attribute points to it.
+    """
+
+    def __init__(self, player_a, player_b, battlefield, turn_number, first_ap, second_ap, rng=None,
+                 next_step=ROUND_START, all_a_done=False, all_b_done=False):
+        self.player_a = player_a
+        self.player_b = player_b
+        self.battlefield = battlefield
+        self.turn_number = turn_number
+        self.first_ap = first_ap
+        self.second_ap = second_ap
+        self.rng = rng
+        self.next_step = next_step
+        self.all_a_done = all_a_done
+        self.all_b_done = all_b_done
+        self.first_player_is_active = turn_number % 2 == 1
+        self.first_player, self.second_player = (
+            (player_a, player_b) if self.first_player_is_active else (player_b, player_a)
+        )
+        # Proximity queries for the AI; follows unit moves for the rest of the turn
+        self.index = SpatialIndex(player_a, player_b)
+
+    def run(self):
+        first_player, second_player = self.first_player, self.second_player
+        first_player.turn = second_player.turn = self
+        while self.next_step != ROUND_START or self.first_ap > 0 or self.second_ap > 0:
+            if self.next_step == ROUND_START:
+                all_a_done = self.all_a_done = all(not u.is_alive() or u.has_activated for u in first_player.units)
+                all_b_done = self.all_b_done = all(not u.is_alive() or u.has_activated for u in second_player.units)
+
+                if all_a_done and all_b_done:
+                    if bus.active:
+                        bus.emit(MessageEvent("All units on both sides activated or dead. Ending turn early."))
+                    break
+
+                # If first player cannot activate a unit, we let them spend 1 AP doing nothing
+                if self.first_ap > 0 and all_a_done:
+                    if bus.active:
+                        bus.emit(MessageEvent(f"{first_player.name} has no units to activate. Forcing AP usage."))
+                    self.first_ap -= 1
+
+                # If second player cannot activate a unit, we do the same
+                if self.second_ap > 0 and all_b_done:
+                    if bus.active:
+                        bus.emit(MessageEvent(f"{second_player.name} has no units to activate. Forcing AP usage."))
+                    self.second_ap -= 1
+                self.next_step = FIRST_ACTIVATION
+
+            # Try to activate first player's unit if they still have AP and not done
+            if self.next_step == FIRST_ACTIVATION:
+                ap_spent = 0
+                if self.first_ap > 0 and not self.all_a_done:
+                    ap_spent = activate_unit_this_turn(
+                        first_player, second_player, self.battlefield, self.first_ap,
+                        self.first_player_is_active, self.turn_number, self.rng, self.index,
+                    )
+                self.activation_done(ap_spent)
+
+            # Try to activate second player's unit if they still have AP and not done
+            ap_spent = 0
+            if self.second_ap > 0 and not self.all_b_done:
+                ap_spent = activate_unit_this_turn(
+                    second_player, first_player, self.battlefield, self.second_ap,
+                    not self.first_player_is_active, self.turn_number, self.rng, self.index,
+                )
+            self.activation_done(ap_spent)
+        first_player.turn = second_player.turn = None
+
+    def activation_done(self, ap_spent):
+        """
+        Charge the pending activation's AP and move on to the next step. run() calls this
+        after each activation; lookahead AIs call it after playing a move in a forked game.
+        """
+        if self.next_step == FIRST_ACTIVATION:
+            self.first_ap -= ap_spent
+            self.next_step = SECOND_ACTIVATION
+        else:
+            self.second_ap -= ap_spent
+            self.next_step = ROUND_START
+
+def activate_unit_this_turn(active_player, opposing_player, battlefield, ap_available, active_a, turn_number, rng=None, index=None):
+    activate = active_player.controller or ai_third_input.ai_activate_unit
+    chosen_unit = activate(active_player, opposing_player, battlefield, active_a, turn_number, rng, index)
     # After AI moves and optionally attacks/charges, mark AP spent
     if chosen_unit:
-        print(f"{active_player.name}'s unit {chosen_unit.name} spent {chosen_unit.ap_cost} AP this activation.")
+        if bus.active:
+            bus.emit(ActivationEvent(active_player.name, chosen_unit.name, chosen_unit.ap_cost))
         return chosen_unit.ap_cost
     else:
         return 0
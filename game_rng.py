@@ -0,0 +1,74 @@
+import random
+import numpy as np
+
+# Independent sub-streams per source of randomness, so changing how one part of
+# the game draws numbers (e.g. a different army) leaves the others untouched.
+STREAMS = ('army', 'deployment', 'dice', 'saves', 'ai')
+
+
+class GameRNG:
+    """
+    Random streams for one game, all derived from a single seed.
+
+    army, deployment, dice, saves and ai are random.Random instances for the
+    scalar draws in the engine; np_dice and np_saves are numpy Generators for
+    the vectorised paths (dice.roll_pool and batched saves).
+
+    Two games played with the same seed are identical, and two army variants
+    played with the same seed see common random numbers for deployment, dice,
+    saves and AI choices.
+    """
+
+    def __init__(self, seed=None):
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_seq = seed
+        else:
+            self.seed_seq = np.random.SeedSequence(seed)
+        for name, child in zip(STREAMS, self.seed_seq.spawn(len(STREAMS))):
+            py_seq, np_seq = child.spawn(2)
+            setattr(self, name, random.Random(int(py_seq.generate_state(1, np.uint64)[0])))
+            setattr(self, 'np_' + name, np.random.default_rng(np_seq))
+
+    @classmethod
+    def for_game(cls, master_seed, game_index):
+        """Streams for one game of a batch; depends only on the master seed and the game's index."""
+        return cls(np.random.SeedSequence(master_seed, spawn_key=(game_index,)))
+
+
+class _GlobalStreams:
+    """
+    The module-level random state, used when no GameRNG is passed in.
+    The numpy streams are seeded from it on first use and then kept, so batched rolls
+    don't build a Generator each time. Games started without a GameRNG get one of their
+    own instead (see ensure), which random.seed() still fixes.
+    """
+    army = deployment = dice = saves = ai = random
+
+    def __init__(self):
+        self._np_dice = None
+        self._np_saves = None
+
+    @property
+    def np_dice(self):
+        if self._np_dice is None:
+            self._np_dice = np.random.default_rng(random.getrandbits(64))
+        return self._np_dice
+
+    @property
+    def np_saves(self):
+        if self._np_saves is None:
+            self._np_saves = np.random.default_rng(random.getrandbits(64))
+        return self._np_saves
+
+
+GLOBAL = _GlobalStreams()
+
+
+def resolve(rng):
+    """Return rng, or the global streams if it is None."""
+    return GLOBAL if rng is None else rng
+
+
+def ensure(rng):
+    """Return rng, or a GameRNG seeded from the module-level random state if it is None."""
+    return GameRNG(random.getrandbits(128)) if rng is None else rng
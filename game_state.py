@@ -0,0 +1,167 @@
+import random
+import numpy as np
+import game_rng
+from game import ActivationLoop
+from model import Model
+from battle_arrays import ArrayUnit
+
+
+def _model(max_wounds, current_wounds):
+    model = object.__new__(Model)
+    model.max_wounds = max_wounds
+    model.current_wounds = current_wounds
+    return model
+
+
+class GameState:
+    """
+    Snapshot of a game in progress: every unit's mutable state (models' wounds, position,
+    melee target, activation, shields, Last Stand casualties), each player's score, kills
+    and AP carry-over, the turn's ActivationLoop (AP left, which activation is next)
+    and the GameRNG streams. The battlefield does not change during a game and is shared.
+
+    restore() writes the snapshot back into the objects it was taken from, the cheap way
+    to try a move and undo it. fork() builds an independent copy of the game in the
+    snapshot's state, which game.play_game(..., loop=...) can play on without touching the
+    original. Snapshots are tuples of plain values, so taking one costs a few microseconds
+    per unit.
+
+    Only object-backend units are supported (not BattleArrays), and the global random
+    state is not captured when the game runs without a GameRNG.
+    """
+
+    __slots__ = ('player_a', 'player_b', 'battlefield', 'rng', 'loop', 'units', 'unit_rows', 'player_rows',
+                 'loop_row', 'rng_states')
+
+    def __init__(self, player_a, player_b, battlefield, rng=None, loop=None, capture_rng=True):
+        """
+        capture_rng=False skips the RNG streams (most of the cost of a snapshot); restore()
+        then leaves them alone and fork() needs its own rng.
+        """
+        self.player_a = player_a
+        self.player_b = player_b
+        self.battlefield = battlefield
+        self.rng = rng
+        self.loop = loop
+        self.units = units = player_a.units + player_b.units
+        if any(isinstance(unit, ArrayUnit) for unit in units):
+            raise TypeError("GameState does not support BattleArrays units")
+
+        rank = {id(unit): i for i, unit in enumerate(units)}
+        self.unit_rows = tuple(
+            (
+                unit.num_models, unit.alive, unit._position,
+                -1 if unit.melee_target is None else rank[id(unit.melee_target)],
+                unit.has_activated, unit.shields_remaining, unit.pending_casualties,
+                tuple(model.current_wounds for model in unit.models),
+            )
+            for unit in units
+        )
+        self.player_rows = tuple(
+            (player.score, player.melee_kills, player.missile_kills, player.remaining_ap)
+            for player in (player_a, player_b)
+        )
+        self.loop_row = None if loop is None else (
+            loop.turn_number, loop.first_ap, loop.second_ap, loop.next_step, loop.all_a_done, loop.all_b_done,
+        )
+        self.rng_states = None if rng is None or not capture_rng else tuple(
+            (getattr(rng, name).getstate(), getattr(rng, 'np_' + name).bit_generator.state)
+            for name in game_rng.STREAMS
+        )
+
+    @classmethod
+    def of_turn(cls, player, capture_rng=True):
+        """Snapshot the game a player is taking a turn in (from inside its controller)."""
+        loop = player.turn
+        return cls(loop.player_a, loop.player_b, loop.battlefield, loop.rng, loop, capture_rng)
+
+    def restore(self):
+        """Put the captured objects back in the snapshot's state."""
+        units = self.units
+        for unit, row in zip(units, self.unit_rows):
+            num_models, alive, position, target, has_activated, shields, pending, wounds = row
+            unit.num_models = num_models
+            unit.alive = alive
+            unit.melee_target = None if target < 0 else units[target]
+            unit.has_activated = has_activated
+            unit.shields_remaining = shields
+            unit.pending_casualties = pending
+            models = unit.models
+            if len(models) != len(wounds):
+                del models[len(wounds):]
+                models.extend(Model(unit.wounds_per_model) for _ in range(len(wounds) - len(models)))
+            for model, current_wounds in zip(models, wounds):
+                model.current_wounds = current_wounds
+            if unit._position != position:
+                unit.position = position
+            elif unit.board is not None:
+                unit.board.unit_changed(unit)
+
+        for player, row in zip((self.player_a, self.player_b), self.player_rows):
+            player.score, player.melee_kills, player.missile_kills, player.remaining_ap = row
+
+        if self.loop is not None:
+            (self.loop.turn_number, self.loop.first_ap, self.loop.second_ap, self.loop.next_step,
+             self.loop.all_a_done, self.loop.all_b_done) = self.loop_row
+
+        if self.rng_states is not None:
+            for name, (py_state, np_state) in zip(game_rng.STREAMS, self.rng_states):
+                getattr(self.rng, name).setstate(py_state)
+                getattr(self.rng, 'np_' + name).bit_generator.state = np_state
+
+    def fork(self, rng=None):
+        """
+        A new, independent game in the snapshot's state.
+        Returns (player_a, player_b, battlefield, rng, loop); loop is None if none was captured.
+        Pass rng (a GameRNG) to play the fork with other random streams than the original,
+        e.g. for independent rollouts; otherwise it continues the captured streams.
+        """
+        units = []
+        for unit, row in zip(self.units, self.unit_rows):
+            num_models, alive, position, _, has_activated, shields, pending, wounds = row
+            # A shallow copy without __init__: static attributes (abilities, dice pools) stay shared
+            clone = object.__new__(type(unit))
+            state = clone.__dict__
+            state.update(unit.__dict__)
+            # The index and board belong to the original game
+            state.pop('spatial_index', None)
+            state.pop('board', None)
+            state.update(
+                num_models=num_models, alive=alive, _position=position, has_activated=has_activated,
+                shields_remaining=shields, pending_casualties=pending,
+                models=[_model(unit.wounds_per_model, current_wounds) for current_wounds in wounds],
+            )
+            units.append(clone)
+        for clone, row in zip(units, self.unit_rows):
+            clone.melee_target = None if row[3] < 0 else units[row[3]]
+
+        players = []
+        split = len(self.player_a.units)
+        for player, row, player_units in zip(
+                (self.player_a, self.player_b), self.player_rows, (units[:split], units[split:])):
+            clone = object.__new__(type(player))
+            clone.__dict__.update(player.__dict__)
+            clone.units = player_units
+            clone.turn = None
+            clone.score, clone.melee_kills, clone.missile_kills, clone.remaining_ap = row
+            players.append(clone)
+
+        if rng is None and self.rng_states is not None:
+            rng = game_rng.GameRNG.__new__(game_rng.GameRNG)
+            rng.seed_seq = self.rng.seed_seq
+            for name, (py_state, np_state) in zip(game_rng.STREAMS, self.rng_states):
+                stream = random.Random(0)
+                stream.setstate(py_state)
+                bit_generator = type(getattr(self.rng, 'np_' + name).bit_generator)(0)
+                bit_generator.state = np_state
+                setattr(rng, name, stream)
+                setattr(rng, 'np_' + name, np.random.Generator(bit_generator))
+
+        loop = None
+        if self.loop_row is not None:
+            turn_number, first_ap, second_ap, next_step, all_a_done, all_b_done = self.loop_row
+            loop = ActivationLoop(
+                players[0], players[1], self.battlefield, turn_number, first_ap, second_ap, rng,
+                next_step, all_a_done, all_b_done,
+            )
+        return players[0], players[1], self.battlefield, rng, loop
@@ -1,139 +1,554 @@
+import argparse
+import json
+import multiprocessing
+import os
 import random
+import traceback
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+import game_rng
+import main
+from genetic_ai import StrategyController
+
+GENES = ('control_point_capture', 'unit_elimination', 'missile_preference', 'melee_preference')
+# Genes closer than this are treated as the same strategy by the fitness cache
+QUANTUM = 1e-3
 
 # Step 1: Define the genes (strategy weights)
 class Strategy:
-    def __init__(self, control_point_capture, unit_elimination, missile_preference, melee_preference):
+    def __init__(self, control_point_capture, unit_elimination, missile_preference, melee_preference, **extra_genes):
+        """Extra keyword genes become attributes too, for AIs that read more weights."""
         self.control_point_capture = control_point_capture
         self.unit_elimination = unit_elimination
         self.missile_preference = missile_preference
         self.melee_preference = melee_preference
+        for name, value in extra_genes.items():
+            setattr(self, name, value)
+        self.gene_names = GENES + tuple(extra_genes)
+
+    def genes(self):
+        return tuple(getattr(self, gene) for gene in self.gene_names)
+
+    def as_dict(self):
+        return dict(zip(self.gene_names, self.genes()))
 
-    def mutate(self):
+    @classmethod
+    def from_genes(cls, genes, gene_names=GENES):
+        return cls(**{name: float(value) for name, value in zip(gene_names, genes)})
+
+    def mutate(self, rng=random):
         """Introduce small random variations."""
         mutation_rate = 0.1
-        self.control_point_capture += random.uniform(-mutation_rate, mutation_rate)
-        self.unit_elimination += random.uniform(-mutation_rate, mutation_rate)
-        self.missile_preference += random.uniform(-mutation_rate, mutation_rate)
-        self.melee_preference += random.uniform(-mutation_rate, mutation_rate)
+        for gene in self.gene_names:
+            setattr(self, gene, getattr(self, gene) + rng.uniform(-mutation_rate, mutation_rate))
 
     def normalize(self):
         """Ensure weights sum to 1."""
-        total = (
-            self.control_point_capture
-            + self.unit_elimination
-            + self.missile_preference
-            + self.melee_preference
-        )
-        self.control_point_capture /= total
-        self.unit_elimination /= total
-        self.missile_preference /= total
-        self.melee_preference /= total
-
-def evaluate_strategy(strategy, population, baseline_strategy):
-    """Evaluate the strategy by playing games against a baseline and peers."""
-    wins = 0
-
-    # Play against the baseline
-    if simulate_game(strategy, baseline_strategy) == "this_strategy":
-        wins += 1
-
-    # Play against a few random peers
-    for _ in range(3):  # Test against 3 random peers
-        opponent_strategy = random.choice(population)
-        if simulate_game(strategy, opponent_strategy) == "this_strategy":
-            wins += 1
-
-    return wins
-
-# Step 2: Generate the initial population
-def generate_population(size):
-    population = []
-    for _ in range(size):
-        strategy = Strategy(
-            control_point_capture=random.random(),
-            unit_elimination=random.random(),
-            missile_preference=random.random(),
-            melee_preference=random.random(),
-        )
-        strategy.normalize()
-        population.append(strategy)
-    return population
+        total = sum(self.genes())
+        for gene in self.gene_names:
+            setattr(self, gene, getattr(self, gene) / total)
 
-# Step 4: Selection
-def select_parents(population, fitness_scores):
-    """Select top-performing strategies."""
-    # Sort by fitness scores (descending order)
-    sorted_population = [
-        strategy for _, strategy in sorted(zip(fitness_scores, population), key=lambda x: x[0], reverse=True)
-    ]
-    return sorted_population[: len(population) // 2]
-
-# Step 5: Crossover
-def crossover(parent1, parent2):
-    """Combine genes from two parents."""
-    child = Strategy(
-        control_point_capture=(parent1.control_point_capture + parent2.control_point_capture) / 2,
-        unit_elimination=(parent1.unit_elimination + parent2.unit_elimination) / 2,
-        missile_preference=(parent1.missile_preference + parent2.missile_preference) / 2,
-        melee_preference=(parent1.melee_preference + parent2.melee_preference) / 2,
+
+# Step 2: The population, one strategy per row
+class Population:
+    """
+    Strategies as rows of an (N, genes) matrix, with every genetic operator applied to the
+    whole matrix at once. Columns follow gene_names, which may extend GENES.
+    fitness holds one score per row (NaN until evaluated).
+    """
+
+    def __init__(self, genes, gene_names=GENES):
+        self.genes = np.array(genes, dtype=np.float64, ndmin=2)
+        self.gene_names = tuple(gene_names)
+        self.fitness = np.full(len(self.genes), np.nan)
+
+    @classmethod
+    def random(cls, size, rng, gene_names=GENES):
+        population = cls(rng.random((size, len(gene_names))), gene_names)
+        population.normalize()
+        return population
+
+    def __len__(self):
+        return len(self.genes)
+
+    def strategy(self, i):
+        return Strategy.from_genes(self.genes[i], self.gene_names)
+
+    def strategies(self):
+        return [self.strategy(i) for i in range(len(self))]
+
+    def normalize(self):
+        """Ensure each row's weights sum to 1."""
+        self.genes /= self.genes.sum(axis=1, keepdims=True)
+
+    def mutate(self, rng, rate=0.1):
+        """Introduce small random variations."""
+        self.genes += rng.uniform(-rate, rate, self.genes.shape)
+
+    def ranking(self):
+        """Row indices from fittest to least fit; ties keep row order."""
+        return np.argsort(-self.fitness, kind='stable')
+
+    def best(self):
+        return self.strategy(self.ranking()[0])
+
+    def select_parents(self):
+        """Rows of the fittest half (truncation selection), best first."""
+        return self.ranking()[:max(2, len(self) // 2)]
+
+    def tournament(self, count, rng, size=2):
+        """count rows, each the fittest of size rows drawn at random."""
+        contestants = rng.integers(0, len(self), (count, size))
+        return contestants[np.arange(count), np.argmax(self.fitness[contestants], axis=1)]
+
+    def crossover(self, first, second):
+        """Children of rows first[i] and second[i]: the average of their genes."""
+        return (self.genes[first] + self.genes[second]) / 2
+
+    def next_generation(self, rng, size=None, selection='truncation', elite=0, tournament_size=2,
+                        mutation_rate=0.1):
+        """
+        Breed a new population from this evaluated one.
+
+        :param selection: 'truncation' pairs distinct parents from the fittest half;
+                          'tournament' picks each parent by tournament.
+        :param elite: Fittest rows copied over unchanged.
+        """
+        size = len(self) if size is None else size
+        children = size - elite
+        if selection == 'truncation':
+            parents = self.select_parents()
+            i = rng.integers(0, len(parents), children)
+            # A different parent for the second slot
+            j = (i + rng.integers(1, len(parents), children)) % len(parents)
+            first, second = parents[i], parents[j]
+        elif selection == 'tournament':
+            first = self.tournament(children, rng, tournament_size)
+            second = self.tournament(children, rng, tournament_size)
+        else:
+            raise ValueError(f"Unknown selection: {selection!r}")
+
+        offspring = Population(self.crossover(first, second), self.gene_names)
+        offspring.mutate(rng, mutation_rate)
+        offspring.normalize()
+        elites = self.genes[self.ranking()[:elite]]
+        return Population(np.vstack([elites, offspring.genes]), self.gene_names)
+
+
+def simulate_game(strategy, opponent_strategy, rng=None, total_value=22, strategy_first=True):
+    """
+    Play one real game (game.play_game with genetic_ai controllers) between two strategies.
+    strategy plays Player1 if strategy_first, else Player2.
+    Returns "this_strategy", "opponent" or "draw".
+    """
+    controllers = (StrategyController(strategy), StrategyController(opponent_strategy))
+    if not strategy_first:
+        controllers = controllers[::-1]
+    player1, player2 = main.play_one_game(total_value, rng, controllers=controllers)
+    mine, theirs = (player1, player2) if strategy_first else (player2, player1)
+    if mine.score > theirs.score:
+        return "this_strategy"
+    if theirs.score > mine.score:
+        return "opponent"
+    return "draw"
+
+
+def gene_key(genes, quantum=QUANTUM):
+    """Genes rounded to multiples of quantum, as a hashable tuple of ints."""
+    return tuple(int(v) for v in np.round(np.asarray(genes, dtype=np.float64) / quantum))
+
+
+def scenario_rng(seed, opponent_key, scenario):
+    """
+    Streams for one scenario. They depend only on the seed, the opponent (by gene_key) and
+    the scenario index, so every strategy facing an opponent in a scenario plays the same
+    games (common random numbers) and a cached result is exactly what a replay would give.
+    """
+    opponent_id = zlib.crc32(np.array(opponent_key, dtype=np.int64).tobytes())
+    return game_rng.GameRNG(np.random.SeedSequence(seed, spawn_key=(opponent_id, scenario)))
+
+
+def play_scenario(strategy, opponent, scenario, seed=0, total_value=22, quantum=QUANTUM):
+    """
+    Points (a win is 1, a draw 0.5) scored against one opponent in one scenario, played
+    from both sides to cancel the first player's advantage.
+    """
+    opponent_key = gene_key(opponent.genes(), quantum)
+    points = 0.0
+    for strategy_first in (True, False):
+        rng = scenario_rng(seed, opponent_key, scenario)
+        result = simulate_game(strategy, opponent, rng, total_value, strategy_first)
+        if result == "this_strategy":
+            points += 1.0
+        elif result == "draw":
+            points += 0.5
+    return points
+
+
+def play_opponent(strategy, opponent, seed=0, games_per_opponent=2, total_value=22, quantum=QUANTUM):
+    """Points scored against one opponent over scenarios 0 to games_per_opponent - 1."""
+    return sum(
+        play_scenario(strategy, opponent, scenario, seed, total_value, quantum)
+        for scenario in range(games_per_opponent)
     )
-    child.mutate()
-    child.normalize()
-    return child
-
-# Step 6: Genetic algorithm loop
-def genetic_algorithm(generations, population_size):
-    population = generate_population(population_size)
-    baseline_strategy = Strategy(
-        control_point_capture=1.0,
-        unit_elimination=1.0,
-        missile_preference=1.0,
-        melee_preference=1.0,
+
+
+def evaluate_strategy(strategy, opponents, seed=0, games_per_opponent=2, total_value=22):
+    """Points scored against each opponent in turn."""
+    return sum(play_opponent(strategy, opponent, seed, games_per_opponent, total_value) for opponent in opponents)
+
+
+class FitnessCache:
+    """
+    Points from play_scenario, keyed on the (quantized) genes of the strategy and of the
+    opponent and on the scenario index, with a running total per (strategy, opponent) pair.
+    Strategies that normalize to the same genes reuse results instead of replaying the
+    games, and elites carried over from earlier generations are scored by mean() on the
+    scenarios they already played.
+    """
+
+    def __init__(self, quantum=QUANTUM):
+        self.quantum = quantum
+        self.points = {}
+        # (strategy key, opponent key) -> [total points, scenarios]
+        self.totals = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.points)
+
+    def key(self, genes):
+        return gene_key(genes, self.quantum)
+
+    def add(self, strategy_key, opponent_key, scenario, points):
+        self.points[strategy_key, opponent_key, scenario] = points
+        total = self.totals.setdefault((strategy_key, opponent_key), [0.0, 0])
+        total[0] += points
+        total[1] += 1
+
+    def mean(self, strategy_key, opponent_key):
+        """Mean points per scenario over every scenario the strategy has played against the opponent."""
+        points, scenarios = self.totals[strategy_key, opponent_key]
+        return points / scenarios
+
+    def arrays(self):
+        """The cache as arrays, for checkpoints."""
+        keys = list(self.points)
+        width = len(keys[0][0]) if keys else 0
+        return {
+            'cache_strategies': np.array([k[0] for k in keys], dtype=np.int64).reshape(-1, width),
+            'cache_opponents': np.array([k[1] for k in keys], dtype=np.int64).reshape(-1, width),
+            'cache_scenarios': np.array([k[2] for k in keys], dtype=np.int64),
+            'cache_points': np.array(list(self.points.values()), dtype=np.float64),
+        }
+
+    @classmethod
+    def from_arrays(cls, quantum, strategies, opponents, scenarios, points):
+        cache = cls(quantum)
+        for strategy_key, opponent_key, scenario, value in zip(strategies, opponents, scenarios, points):
+            cache.add(tuple(strategy_key.tolist()), tuple(opponent_key.tolist()), int(scenario), float(value))
+        return cache
+
+
+def _evaluate_chunk(args):
+    tasks, gene_names, seed, total_value, quantum = args
+    return [
+        play_scenario(Strategy.from_genes(genes, gene_names), Strategy.from_genes(opponent_genes, gene_names),
+                      scenario, seed, total_value, quantum)
+        for genes, opponent_genes, scenario in tasks
+    ]
+
+
+def evaluate_population(population, opponents, seed=0, games_per_opponent=2, total_value=22,
+                        pool=None, cache=None, chunk_size=None, scenarios=None):
+    """
+    Play every row against opponents (a list of Strategy) in `scenarios` (scenario indices,
+    default 0 to games_per_opponent - 1), set population.fitness and return it.
+
+    A row's fitness sums, over opponents, its mean points per scenario against that opponent
+    times games_per_opponent. With a fresh cache and the default scenarios that is its
+    evaluate_strategy score. Pairs of row and opponent already in the cache (an elite facing
+    the baseline again, say) keep their mean and play no new scenarios; only new pairs
+    play `scenarios`, each (strategy, opponent, scenario) once.
+    With a process pool they are split into chunks and played in parallel; results match
+    a serial run.
+    """
+    cache = FitnessCache() if cache is None else cache
+    scenarios = range(games_per_opponent) if scenarios is None else scenarios
+    row_keys = [cache.key(genes) for genes in population.genes]
+    opponent_keys = [cache.key(opponent.genes()) for opponent in opponents]
+
+    pending = {}
+    for row, row_key in enumerate(row_keys):
+        for opponent, opponent_key in zip(opponents, opponent_keys):
+            if (row_key, opponent_key) in cache.totals:
+                cache.hits += len(scenarios)
+                continue
+            for scenario in scenarios:
+                key = (row_key, opponent_key, scenario)
+                if key not in pending:
+                    cache.misses += 1
+                    pending[key] = (population.genes[row], opponent.genes(), scenario)
+
+    tasks = list(pending.values())
+    if chunk_size is None:
+        chunk_size = len(tasks) if pool is None else max(1, len(tasks) // (4 * (os.cpu_count() or 1)))
+    chunks = [
+        (tasks[i:i + chunk_size], population.gene_names, seed, total_value, cache.quantum)
+        for i in range(0, len(tasks), chunk_size)
+    ]
+    parts = map(_evaluate_chunk, chunks) if pool is None else pool.map(_evaluate_chunk, chunks)
+    results = [points for part in parts for points in part]
+    for key, points in zip(pending, results):
+        cache.add(*key, points)
+
+    population.fitness = np.array(
+        [games_per_opponent * sum(cache.mean(row_key, opponent_key) for opponent_key in opponent_keys)
+         for row_key in row_keys],
+        dtype=np.float64,
     )
-    for generation in range(generations):
-        print(f"Generation {generation + 1}")
-        fitness_scores = [
-            evaluate_strategy(strategy, population, baseline_strategy)
-            for strategy in population
-        ]
+    return population.fitness
+
+
+def generation_scenarios(generation, games_per_opponent):
+    """
+    Scenario indices new pairs play in a generation (counted from 0); no two generations
+    share one, so strategies are not all tuned to the same few games.
+    """
+    return range(generation * games_per_opponent, (generation + 1) * games_per_opponent)
+
+
+def save_checkpoint(path, population, generation, rng, cache, config):
+    """
+    Write the last evaluated population with its fitness, the number of generations done,
+    the RNG state, the fitness cache and the run settings to an .npz file. The file is replaced atomically,
+    so an interrupted save leaves the previous checkpoint intact.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            genes=population.genes,
+            fitness=population.fitness,
+            gene_names=np.array(population.gene_names),
+            generation=generation,
+            rng_state=json.dumps(rng.bit_generator.state),
+            config=json.dumps(config),
+            quantum=cache.quantum,
+            **cache.arrays(),
+        )
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """Read a checkpoint; returns (population, generation, rng, cache, config)."""
+    with np.load(path) as data:
+        population = Population(data['genes'], data['gene_names'].tolist())
+        population.fitness = data['fitness']
+        rng = np.random.default_rng()
+        rng.bit_generator.state = json.loads(str(data['rng_state']))
+        cache = FitnessCache.from_arrays(
+            float(data['quantum']), data['cache_strategies'], data['cache_opponents'], data['cache_scenarios'],
+            data['cache_points'],
+        )
+        return population, int(data['generation']), rng, cache, json.loads(str(data['config']))
 
-        # Select parents
-        parents = select_parents(population, fitness_scores)
 
-        # Generate next generation
-        next_generation = []
-        while len(next_generation) < population_size:
-            parent1, parent2 = random.sample(parents, 2)
-            child = crossover(parent1, parent2)
-            next_generation.append(child)
+# Step 3: Genetic algorithm loop
+def genetic_algorithm(generations, population_size, seed=0, workers=None, peers=3,
+                      games_per_opponent=2, total_value=22, selection='truncation', elite=1,
+                      gene_names=GENES, quantum=QUANTUM, checkpoint=None, resume=False):
+    """
+    Evolve strategies with fitness from real games against the baseline and peers.
 
-        population = next_generation
+    Each generation every strategy plays the baseline and the same `peers` strategies drawn
+    from the population, in games_per_opponent new scenarios per opponent it has not met
+    before, from both sides. Games run on `workers` processes (default: CPU count; 1 plays
+    them in this process). selection and elite are passed to Population.next_generation.
+    Results are cached per quantized genes and scenario, so elites are scored from the
+    games they already played against an opponent instead of replaying them (see
+    evaluate_population).
 
-        # Print the best strategy of the generation
-        best_strategy = parents[0]  # After sorting, the best strategy is the first parent
-        print(f"Best strategy: {vars(best_strategy)}")
+    With a checkpoint path the run is saved after every generation; resume=True continues
+    from that file with its saved settings, up to `generations` in total.
+    """
+    config = {
+        'population_size': population_size, 'seed': seed, 'peers': peers,
+        'games_per_opponent': games_per_opponent, 'total_value': total_value,
+        'selection': selection, 'elite': elite,
+    }
+    if resume and checkpoint and os.path.exists(checkpoint):
+        population, start, rng, cache, config = load_checkpoint(checkpoint)
+        print(f"Resuming from {checkpoint} at generation {start + 1} ({len(cache)} cached results)")
+    else:
+        rng = np.random.default_rng(seed)
+        population = Population.random(population_size, rng, gene_names)
+        cache = FitnessCache(quantum)
+        start = 0
+    baseline_strategy = Strategy.from_genes(np.ones(len(population.gene_names)), population.gene_names)
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for generation in range(start, generations):
+            print(f"Generation {generation + 1}")
+            if not np.isnan(population.fitness).all():
+                population = population.next_generation(
+                    rng, config['population_size'], config['selection'], config['elite'],
+                )
+            peer_rows = rng.choice(len(population), min(config['peers'], len(population)), replace=False)
+            opponents = [baseline_strategy] + [population.strategy(i) for i in peer_rows]
+            fitness = evaluate_population(
+                population, opponents, config['seed'], config['games_per_opponent'], config['total_value'],
+                pool, cache, scenarios=generation_scenarios(generation, config['games_per_opponent']),
+            )
+
+            # Print the best strategy of the generation
+            print(f"Best strategy: {population.best().as_dict()} "
+                  f"(fitness {fitness.max()}, mean {fitness.mean():.2f}, cache hits {cache.hits})")
+
+            if checkpoint:
+                save_checkpoint(checkpoint, population, generation + 1, rng, cache, config)
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
     return population
 
-# Example: Simulate a game (simplified placeholder)
-def simulate_game(strategy, opponent_strategy):
-    """Simulate a game using the given strategy against an opponent strategy."""
-    strategy_score = (
-        strategy.control_point_capture * random.uniform(0.8, 1.2)
-        + strategy.unit_elimination * random.uniform(0.8, 1.2)
-        + strategy.missile_preference * random.uniform(0.8, 1.2)
-        + strategy.melee_preference * random.uniform(0.8, 1.2)
-    )
-    opponent_score = (
-        opponent_strategy.control_point_capture * random.uniform(0.8, 1.2)
-        + opponent_strategy.unit_elimination * random.uniform(0.8, 1.2)
-        + opponent_strategy.missile_preference * random.uniform(0.8, 1.2)
-        + opponent_strategy.melee_preference * random.uniform(0.8, 1.2)
-    )
+# Step 4: Island model
+def _run_island(island, settings, inbox, outbox, reports):
+    """
+    Evolve one island's population in this process. Every migration_interval generations its
+    fittest genomes go to outbox (the next island on the ring) and the genomes arriving in
+    inbox replace its least fit.
+    """
+    try:
+        gene_names = settings['gene_names']
+        rng = np.random.default_rng([settings['seed'], island])
+        population = Population.random(settings['population_size'], rng, gene_names)
+        cache = FitnessCache(settings['quantum'])
+        baseline_strategy = Strategy.from_genes(np.ones(len(gene_names)), gene_names)
+        generations = settings['generations']
+        interval = settings['migration_interval']
+
+        for generation in range(generations):
+            if generation:
+                population = population.next_generation(
+                    rng, settings['population_size'], settings['selection'], settings['elite'],
+                )
+            peer_rows = rng.choice(len(population), min(settings['peers'], len(population)), replace=False)
+            opponents = [baseline_strategy] + [population.strategy(i) for i in peer_rows]
+            fitness = evaluate_population(
+                population, opponents, settings['seed'], settings['games_per_opponent'],
+                settings['total_value'], None, cache,
+                scenarios=generation_scenarios(generation, settings['games_per_opponent']),
+            )
+            best = population.ranking()[0]
+            reports.put(('generation', island, generation, population.genes[best], fitness[best], fitness.mean()))
 
-    return "this_strategy" if strategy_score > opponent_score else "opponent"
+            if interval and (generation + 1) % interval == 0 and generation < generations - 1:
+                top = population.ranking()[:settings['migrants']]
+                outbox.put((population.genes[top], population.fitness[top]))
+                genes, migrant_fitness = inbox.get()
+                worst = population.ranking()[len(population) - len(genes):]
+                population.genes[worst] = genes
+                population.fitness[worst] = migrant_fitness
+
+        reports.put(('done', island, population.genes, population.fitness))
+    except BaseException:
+        reports.put(('error', island, traceback.format_exc()))
+        raise
+
+
+def genetic_islands(generations, population_size, islands=None, migration_interval=5, migrants=2,
+                    seed=0, peers=3, games_per_opponent=2, total_value=22, selection='truncation',
+                    elite=1, gene_names=GENES, quantum=QUANTUM):
+    """
+    Island model: `islands` populations of population_size each (default: one per CPU) evolve
+    in their own processes as in genetic_algorithm, each with its own RNG stream and fitness
+    cache. Every migration_interval generations each island sends its `migrants` fittest
+    genomes to the next island on a ring of queues, replacing that island's least fit.
+    Only migrants and per-generation reports cross process boundaries.
+
+    Returns the final Population of each island.
+    """
+    islands = islands or os.cpu_count() or 1
+    settings = {
+        'generations': generations, 'population_size': population_size, 'seed': seed,
+        'peers': peers, 'games_per_opponent': games_per_opponent, 'total_value': total_value,
+        'selection': selection, 'elite': elite, 'gene_names': tuple(gene_names), 'quantum': quantum,
+        'migration_interval': migration_interval, 'migrants': min(migrants, population_size),
+    }
+    queues = [multiprocessing.Queue() for _ in range(islands)]
+    reports = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=_run_island, args=(i, settings, queues[i], queues[(i + 1) % islands], reports), daemon=True,
+        )
+        for i in range(islands)
+    ]
+    for process in processes:
+        process.start()
+
+    final = [None] * islands
+    try:
+        while any(population is None for population in final):
+            message = reports.get()
+            if message[0] == 'generation':
+                _, island, generation, genes, best, mean = message
+                strategy = Strategy.from_genes(genes, gene_names)
+                print(f"Island {island + 1} generation {generation + 1}: best {strategy.as_dict()} "
+                      f"(fitness {best}, mean {mean:.2f})")
+            elif message[0] == 'done':
+                _, island, genes, fitness = message
+                final[island] = Population(genes, gene_names)
+                final[island].fitness = fitness
+            else:
+                raise RuntimeError(f"Island {message[1] + 1} failed:\n{message[2]}")
+    finally:
+        for process in processes:
+            if process.is_alive() and any(population is None for population in final):
+                process.terminate()
+            process.join()
+
+    for island, population in enumerate(final):
+        print(f"Island {island + 1} best strategy: {population.best().as_dict()} (fitness {population.fitness.max()})")
+    best_island = max(range(islands), key=lambda i: final[i].fitness.max())
+    print(f"Global best strategy: {final[best_island].best().as_dict()} "
+          f"(island {best_island + 1}, fitness {final[best_island].fitness.max()})")
+    return final
 
 # Run the genetic algorithm
 if __name__ == "__main__":
-    final_population = genetic_algorithm(generations=20, population_size=50)
+    parser = argparse.ArgumentParser(description="Evolve AI strategies with real games.")
+    parser.add_argument("--generations", type=int, default=20, help="Number of generations.")
+    parser.add_argument("--population", type=int, default=50, help="Strategies per generation.")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed.")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count).")
+    parser.add_argument("--games", type=int, default=2, help="Scenarios per opponent, each played from both sides.")
+    parser.add_argument("--value", type=int, default=22, help="Total unit value for each player.")
+    parser.add_argument("--selection", choices=("truncation", "tournament"), default="truncation", help="Parent selection.")
+    parser.add_argument("--elite", type=int, default=1, help="Fittest strategies kept unchanged each generation.")
+    parser.add_argument("--checkpoint", help="Save the run to this .npz file after every generation.")
+    parser.add_argument("--resume", action="store_true", help="Continue the run saved in --checkpoint.")
+    parser.add_argument("--islands", type=int, help="Run this many island populations in parallel processes.")
+    parser.add_argument("--migration-interval", type=int, default=5, help="Generations between island migrations.")
+    parser.add_argument("--migrants", type=int, default=2, help="Genomes each island sends per migration.")
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+    if args.islands and (args.checkpoint or args.workers):
+        parser.error("--islands runs one process per island and does not take --checkpoint or --workers")
+    if args.islands:
+        final_populations = genetic_islands(
+            generations=args.generations, population_size=args.population, islands=args.islands,
+            migration_interval=args.migration_interval, migrants=args.migrants, seed=args.seed,
+            games_per_opponent=args.games, total_value=args.value, selection=args.selection, elite=args.elite,
+        )
+    else:
+        final_population = genetic_algorithm(
+            generations=args.generations, population_size=args.population, seed=args.seed,
+            workers=args.workers, games_per_opponent=args.games, total_value=args.value,
+            selection=args.selection, elite=args.elite, checkpoint=args.checkpoint, resume=args.resume,
+        )
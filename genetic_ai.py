@@ -1,54 +1,71 @@
 import util
 import board_state
-import random
+import game_rng
+from spatial import SpatialIndex
 
-def genetic_ai_activate_unit(active_player, opposing_player, battlefield, strategy, turn_number):
+
+class StrategyController:
+    """Player.controller that activates units with genetic_ai_activate_unit under a Strategy."""
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+
+    def __call__(self, active_player, opposing_player, battlefield, active_a, turn_number, rng=None, index=None):
+        return genetic_ai_activate_unit(active_player, opposing_player, battlefield, self.strategy, turn_number, rng, index)
+
+
+def genetic_ai_activate_unit(active_player, opposing_player, battlefield, strategy, turn_number, rng=None, index=None):
     """
     Automatically:
     - Choose a unit to activate based on the strategy's preferences.
     - Move the unit towards a control point or an opposing unit.
     - Decide on missile attacks and melee engagements based on strategy weights.
     """
-    # Filter alive units for activation
-    alive_units = [u for u in active_player.units if u.is_alive()]
-    if not alive_units:
+    ai_rng = game_rng.resolve(rng).ai
+
+    # Units that can still act this turn, highest AP first
+    available_units = active_player.get_units_by_ap()
+    if not available_units:
         return None
+    if index is None:
+        index = SpatialIndex(active_player, opposing_player)
 
-    # Choose a unit to activate (for simplicity, pick the first alive unit)
-    chosen_unit = alive_units[0]
+    chosen_unit = available_units[0]
+    chosen_unit.has_activated = True
 
     # Move unit based on strategy weights
     control_points = battlefield.get_control_points()
-    enemy_units = [u for u in opposing_player.units if u.is_alive()]
 
     target_position = None
-    if random.uniform(0, 1) < strategy.control_point_capture:
+    if ai_rng.uniform(0, 1) < strategy.control_point_capture:
         # Move towards a control point
         if control_points:
             closest_cp = min(control_points, key=lambda cp: util.distance(chosen_unit.position, (cp.x, cp.y)))
             target_position = (closest_cp.x, closest_cp.y)
-    elif enemy_units:
+    else:
         # Move towards an enemy unit based on strategy
-        closest_enemy = min(enemy_units, key=lambda enemy: util.distance(chosen_unit.position, enemy.position))
-        target_position = closest_enemy.position
+        closest_enemy = index.nearest_enemy(chosen_unit)
+        if closest_enemy is not None:
+            target_position = closest_enemy.position
 
     if target_position:
         move_distance = chosen_unit.movement
         chosen_unit.position = util.move_towards(chosen_unit.position, target_position, move_distance)
 
     # Decide on missile attack
-    viable_targets = [enemy for enemy in enemy_units if util.distance(chosen_unit.position, enemy.position) <= chosen_unit.attack_range]
-    if viable_targets and random.uniform(0, 1) < strategy.missile_preference:
+    viable_targets = index.enemies_within(chosen_unit, chosen_unit.attack_range)
+    if viable_targets and ai_rng.uniform(0, 1) < strategy.missile_preference:
         target = viable_targets[0]  # Target the first viable enemy
         from fight import simulate_fight
-        simulate_fight(chosen_unit, target)
+        simulate_fight(chosen_unit, target, active_player, rng=rng)
+        viable_targets = [enemy for enemy in viable_targets if enemy.is_alive()]
 
     # Decide on melee engagement
-    if viable_targets and random.uniform(0, 1) < strategy.melee_preference:
+    if viable_targets and ai_rng.uniform(0, 1) < strategy.melee_preference:
         target = viable_targets[0]  # Engage the first viable enemy in melee
         from fight import simulate_fight, melee_favorable
         if melee_favorable(chosen_unit, target):
-            simulate_fight(chosen_unit, target, 0, 'melee')
+            simulate_fight(chosen_unit, target, active_player, 0, 'melee', rng=rng)
 
     return chosen_unit
 
@@ -69,6 +86,6 @@ def find_unit_by_id_or_name(units, identifier):
             return matches[0]
         return None
 
-def roll_2d6():
-    import random
-    return random.randint(1, 6) + random.randint(1, 6)
+def roll_2d6(rng=None):
+    dice = game_rng.resolve(rng).dice
+    return dice.randint(1, 6) + dice.randint(1, 6)
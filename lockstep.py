@@ -0,0 +1,421 @@
+import numpy as np
+from dice import DICE_TYPES, FACE_NORMAL, FACE_MORTAL, MORTAL_FACE_COUNT, DOUBLE_MORTAL_SHARE, NON_MORTAL_FACE_NORMAL, COLOR_INDEX
+from fight import melee_favorable
+
+MISSILE, MELEE = 0, 1
+TURNS = 4
+ENGAGEMENT_RANGE = 1
+CHARGE_RANGE = 12
+CONTROL_RADIUS = 6
+MAX_CONTROL_POINTS = 4
+
+# Face tables with an extra all-miss color at the end, used to pad dice pools
+_NULL = len(DICE_TYPES)
+_FACE_NORMAL = np.vstack([FACE_NORMAL, np.zeros((1, 6), dtype=np.int64)])
+_FACE_MORTAL = np.vstack([FACE_MORTAL, np.zeros((1, 6), dtype=np.int64)])
+_MORTAL_FACE_COUNT = np.append(MORTAL_FACE_COUNT, 0)
+_DOUBLE_MORTAL_SHARE = np.append(DOUBLE_MORTAL_SHARE, 0.0)
+_NON_MORTAL_FACE_NORMAL = np.vstack([NON_MORTAL_FACE_NORMAL, np.zeros((1, 6), dtype=np.int64)])
+
+
+class LockstepBattle:
+    """
+    Many independent games of one scenario (the same two armies), advanced
+    together. Every piece of game state is an array with the game on the first
+    axis, and each step of a turn is one set of NumPy operations over all games.
+
+    Turns and activations follow game.play_game/play_turn: 4 turns, AP from
+    ap.determine_ap_allocation, alternating activations starting with Player1
+    on odd turns, forced AP burn when a side has nothing left to activate, and
+    control point scoring at the end of each turn. Deployment and control
+    points are drawn per game with the rules in setup.py.
+
+    Units are tracked as a pool of wounds: every wound does 1 damage and is
+    allocated to one model until it dies, so a unit's models alive are
+    ceil(wounds / wounds_per_model), as with Unit.defend's usual allocation.
+    Assassin attackers allocate from the last model instead, which can leave two
+    models of a multi-wound unit wounded; the pool does not track that, so such a
+    unit can count one model fewer here than it would with Unit objects.
+
+    The AI is a deterministic version of ai_third_input: missile targets are the
+    nearest eligible enemy rather than a random one, a unit locked to a dead enemy
+    is freed, and Regenerate, Disengage, Last Stand and Assassin are not modelled.
+    Charges follow ai_third_input.try_charge: the nearest enemy in range, preferring
+    one that has a friendly unit trapped in melee, and only when
+    fight.melee_favorable judges the exchange worth it. Shields, Lucky, Slayer,
+    Camouflage, Sharpshooter, Withering Fire, Relentless, Attack Augmentation,
+    Crushing Charge, Degrade and Overwatch are modelled.
+    """
+
+    def __init__(self, units_a, units_b, n_games, rng=None):
+        """
+        :param units_a: Player1's units (Unit objects; only their stats are read).
+        :param units_b: Player2's units.
+        :param n_games: Number of games to play in lockstep.
+        :param rng: A numpy Generator or seed for every random draw.
+        """
+        self.rng = np.random.default_rng(rng)
+        self.n_games = n_games
+        units = list(units_a) + list(units_b)
+        self.n_units = count = len(units)
+        self.owner = np.array([0] * len(units_a) + [1] * len(units_b), dtype=np.int64)
+
+        # Static unit stats
+        self.ap_cost = np.array([u.ap_cost for u in units], dtype=np.float64)
+        self.movement = np.array([u.movement for u in units], dtype=np.float64)
+        self.attack_range = np.array([u.attack_range for u in units], dtype=np.float64)
+        self.wounds_per_model = np.array([u.wounds_per_model for u in units], dtype=np.int64)
+        self.starting_wounds = np.array([u.initial_num_models * u.wounds_per_model for u in units], dtype=np.int64)
+        self.slayer = np.array([u.abilities.slayer for u in units])
+        self.lucky = np.array([u.abilities.lucky for u in units])
+        self.overwatch = np.array([u.abilities.overwatch for u in units])
+        self.prefers_melee = np.array([len(u.base_melee_attack_dice) > len(u.base_missile_attack_dice) for u in units])
+        # Unit choice sorts by AP cost; rank it so it can be combined with the melee flag
+        self._ap_rank = np.unique(self.ap_cost, return_inverse=True)[1].reshape(-1)
+        # AP floor per side: its most expensive unit, dead or alive
+        self._ap_floor = [
+            max((u.ap_cost for u in side), default=0) for side in (units_a, units_b)
+        ]
+
+        # save[attacker, defender, phase], from Unit.get_modified_armor_save
+        self.save = np.zeros((count, count, 2), dtype=np.int64)
+        for i, attacker in enumerate(units):
+            for j, defender in enumerate(units):
+                for phase, name in ((MISSILE, 'missile'), (MELEE, 'melee')):
+                    modifier = attacker.get_armor_save_modifier(name)
+                    self.save[i, j, phase] = defender.get_modified_armor_save(modifier, name, attacker)
+
+        # pools[unit, phase, charging, models alive, degraded, die] as color indices padded with _NULL
+        max_models = max(u.initial_num_models for u in units)
+        pools = {}
+        for i, u in enumerate(units):
+            for phase, missile in ((MISSILE, True), (MELEE, False)):
+                for charging in (0, 1):
+                    table = u._attack_pools[(missile, bool(charging))]
+                    for n, pool in enumerate(table):
+                        pools[(i, phase, charging, n, 0)] = pool
+                        degraded = pool[:max(0, len(pool) - u.abilities.degrade)] if u.abilities.degrade else pool
+                        pools[(i, phase, charging, n, 1)] = degraded
+        width = max((len(p) for p in pools.values()), default=0)
+        self.pools = np.full((count, 2, 2, max_models + 1, 2, max(width, 1)), _NULL, dtype=np.intp)
+        for key, pool in pools.items():
+            self.pools[key][:len(pool)] = [COLOR_INDEX[c] for c in pool]
+        self.degrades = np.array([u.abilities.degrade > 0 for u in units])
+
+        # favorable[attacker, defender, attacker models, defender models]: fight.melee_favorable
+        # after Overwatch, at every strength a charge can be declared at
+        self.favorable = np.zeros((count, count, max_models + 1, max_models + 1), dtype=bool)
+        for i, attacker in enumerate(units):
+            for j, defender in enumerate(units):
+                if self.owner[i] == self.owner[j]:
+                    continue
+                for a_models in range(1, attacker.initial_num_models + 1):
+                    for d_models in range(1, defender.initial_num_models + 1):
+                        self.favorable[i, j, a_models, d_models] = melee_favorable(
+                            attacker, defender, overwatch=False, attacker_models=a_models, defender_models=d_models,
+                        )
+
+        # Dynamic state, one row per game
+        self.wounds = np.tile(self.starting_wounds, (n_games, 1))
+        self.shields = np.tile(np.array([u.abilities.shields for u in units], dtype=np.int64), (n_games, 1))
+        self.positions = np.zeros((n_games, count, 2))
+        self.activated = np.zeros((n_games, count), dtype=bool)
+        self.melee_target = np.full((n_games, count), -1, dtype=np.int64)
+        self.score = np.zeros((n_games, 2), dtype=np.int64)
+        # kills[game, player, phase]
+        self.kills = np.zeros((n_games, 2, 2), dtype=np.int64)
+        self.control_points = np.zeros((n_games, MAX_CONTROL_POINTS, 2))
+        self.control_point_mask = np.zeros((n_games, MAX_CONTROL_POINTS), dtype=bool)
+
+        self._deploy()
+
+    # Setup
+
+    def _deploy(self):
+        # Same rules as setup.setup_battlefield and setup.place_units_randomly
+        rng, games = self.rng, self.n_games
+        num_cps = rng.integers(2, 5, size=games)
+        self.control_point_mask = np.arange(MAX_CONTROL_POINTS) < num_cps[:, None]
+        self.control_points[:, :, 0] = rng.integers(0, 6, size=(games, MAX_CONTROL_POINTS)) * 10
+        self.control_points[:, :, 1] = 20
+
+        y_square = np.where(self.owner == 0, 0, 3)
+        x_square = rng.integers(0, 6, size=(games, self.n_units))
+        self.positions[:, :, 0] = np.round(x_square * 10 + rng.uniform(0, 10, size=(games, self.n_units)))
+        self.positions[:, :, 1] = np.round(y_square * 10 + rng.uniform(0, 10, size=(games, self.n_units)))
+
+    # State queries
+
+    def models_alive(self, rows=slice(None)):
+        wounds = self.wounds[rows]
+        return -(-wounds // self.wounds_per_model)
+
+    def alive(self, rows=slice(None)):
+        return self.wounds[rows] > 0
+
+    def _pair_distances(self, rows):
+        # Manhattan distance between every pair of units, (games, units, units)
+        positions = self.positions[rows]
+        return np.abs(positions[:, :, None, :] - positions[:, None, :, :]).sum(axis=3)
+
+    # Game loop
+
+    def play(self):
+        for turn_number in range(1, TURNS + 1):
+            self.play_turn(turn_number)
+        return self
+
+    def play_turn(self, turn_number):
+        games = self.n_games
+        ap = np.zeros((games, 2))
+        alive = self.alive()
+        largest = np.maximum(
+            (self.ap_cost * (alive & (self.owner == 0))).sum(axis=1),
+            (self.ap_cost * (alive & (self.owner == 1))).sum(axis=1),
+        )
+        ap_for_both = np.ceil(largest / 2)
+        for player in (0, 1):
+            ap[:, player] = np.maximum(ap_for_both, self._ap_floor[player])
+
+        first = 0 if turn_number % 2 == 1 else 1
+        second = 1 - first
+        self.activated[:] = False
+
+        running = np.ones(games, dtype=bool)
+        while True:
+            running &= (ap[:, first] > 0) | (ap[:, second] > 0)
+            if not running.any():
+                break
+            alive = self.alive()
+            ready = alive & ~self.activated
+            first_done = ~(ready & (self.owner == first)).any(axis=1)
+            second_done = ~(ready & (self.owner == second)).any(axis=1)
+
+            running &= ~(first_done & second_done)
+            # A side with AP but no unit to activate burns 1 AP
+            ap[:, first] -= running & (ap[:, first] > 0) & first_done
+            ap[:, second] -= running & (ap[:, second] > 0) & second_done
+
+            rows = np.flatnonzero(running & (ap[:, first] > 0) & ~first_done)
+            ap[rows, first] -= self._activate(rows, first)
+            rows = np.flatnonzero(running & (ap[:, second] > 0) & ~second_done)
+            ap[rows, second] -= self._activate(rows, second)
+
+        self._score_control_points()
+
+    def _score_control_points(self):
+        models = self.models_alive()
+        # (games, control points, units)
+        distances = np.abs(self.positions[:, None, :, :] - self.control_points[:, :, None, :]).sum(axis=3)
+        in_range = (distances <= CONTROL_RADIUS) * models[:, None, :]
+        a_models = (in_range * (self.owner == 0)).sum(axis=2)
+        b_models = (in_range * (self.owner == 1)).sum(axis=2)
+        mask = self.control_point_mask
+        self.score[:, 0] += ((a_models > b_models) & mask).sum(axis=1)
+        self.score[:, 1] += ((b_models > a_models) & mask).sum(axis=1)
+
+    # Activation
+
+    def _activate(self, rows, player):
+        """Activate one unit of player in each game of rows; returns the AP spent per row."""
+        spent = np.zeros(len(rows))
+        if not len(rows):
+            return spent
+        alive = self.alive(rows)
+        distances = self._pair_distances(rows)
+        near = (distances <= ENGAGEMENT_RANGE) & alive[:, None, :]
+        engaged = (near & (self.owner[:, None] != self.owner[None, :])).any(axis=2)
+
+        # Highest AP first, then units in melee; ties go to army order
+        available = alive & ~self.activated[rows] & (self.owner == player)
+        has_unit = available.any(axis=1)
+        key = np.where(available, self._ap_rank * 2 + engaged, -1)
+        chosen = key.argmax(axis=1)
+
+        index = np.arange(len(rows))
+        locked_to = self.melee_target[rows, chosen]
+        lock_alive = (locked_to >= 0) & alive[index, np.maximum(locked_to, 0)]
+        # Free units locked to an enemy that has since died
+        freed = has_unit & (locked_to >= 0) & ~lock_alive
+        self.melee_target[rows[freed], chosen[freed]] = -1
+
+        fight = has_unit & lock_alive
+        if fight.any():
+            self._fight(rows[fight], chosen[fight], locked_to[fight], MELEE, False, player)
+
+        act = has_unit & ~lock_alive
+        if act.any():
+            self._move(rows[act], chosen[act], player, distances[act], alive[act])
+            self._shoot(rows[act], chosen[act], player)
+            self._charge(rows[act], chosen[act], player)
+
+        self.activated[rows[has_unit], chosen[has_unit]] = True
+        spent[has_unit] = self.ap_cost[chosen[has_unit]]
+        return spent
+
+    def _move(self, rows, chosen, player, distances, alive):
+        index = np.arange(len(rows))
+        enemy = (self.owner != player) & alive
+        friendly = (self.owner == player) & alive
+        from_chosen = distances[index, chosen]
+
+        # Melee-preferring units go for the nearest enemy not already in melee with us
+        friendly_near = ((distances <= ENGAGEMENT_RANGE) & friendly[:, None, :]).any(axis=2)
+        free_enemy = enemy & (self.melee_target[rows] < 0) & ~friendly_near
+        enemy_distance = np.where(free_enemy, from_chosen, np.inf)
+        nearest = enemy_distance.argmin(axis=1)
+        go_enemy = self.prefers_melee[chosen] & np.isfinite(enemy_distance[index, nearest])
+        target = self.positions[rows, nearest].copy()
+
+        # Otherwise a control point: one with enemies near it if we prefer shooting,
+        # else the least contested, nearest first
+        cps = self.control_points[rows]
+        cp_mask = self.control_point_mask[rows]
+        positions = self.positions[rows]
+        cp_to_units = np.abs(cps[:, :, None, :] - positions[:, None, :, :]).sum(axis=3)
+        presence = ((cp_to_units <= CONTROL_RADIUS) & enemy[:, None, :]).sum(axis=2)
+        cp_distance = np.abs(cps - positions[index, chosen][:, None, :]).sum(axis=2)
+        cp_key = np.where(cp_mask, presence * 1e6 + cp_distance, np.inf)
+
+        contested_key = np.where(presence > 0, cp_key, np.inf)
+        contested = contested_key.argmin(axis=1)
+        use_contested = (
+            ~self.prefers_melee[chosen] & enemy.any(axis=1)
+            & np.isfinite(contested_key[index, contested])
+        )
+        best_cp = np.where(use_contested, contested, cp_key.argmin(axis=1))
+        cp_target = cps[index, best_cp]
+        target = np.where(go_enemy[:, None], target, cp_target)
+
+        # util.move_towards: straight line, stop at the target
+        start = positions[index, chosen]
+        delta = target - start
+        length = np.hypot(delta[:, 0], delta[:, 1])
+        scale = np.divide(self.movement[chosen], length, out=np.ones_like(length), where=length > self.movement[chosen])
+        self.positions[rows, chosen] = np.where((length <= self.movement[chosen])[:, None], target, start + delta * scale[:, None])
+
+    def _shoot(self, rows, chosen, player):
+        index = np.arange(len(rows))
+        alive = self.alive(rows)
+        distances = self._pair_distances(rows)
+        from_chosen = distances[index, chosen]
+        friendly = (self.owner == player) & alive
+        # Enemies already in melee with one of ours are not valid missile targets
+        engaged = ((distances <= ENGAGEMENT_RANGE) & friendly[:, None, :]).any(axis=2)
+        viable = alive & (self.owner != player) & ~engaged & (from_chosen <= self.attack_range[chosen][:, None])
+        target_distance = np.where(viable, from_chosen, np.inf)
+        target = target_distance.argmin(axis=1)
+        shoot = np.isfinite(target_distance[index, target])
+        if shoot.any():
+            self._fight(rows[shoot], chosen[shoot], target[shoot], MISSILE, False, player)
+
+    def _charge(self, rows, chosen, player):
+        index = np.arange(len(rows))
+        alive = self.alive(rows)
+        distances = self._pair_distances(rows)
+        from_chosen = distances[index, chosen]
+        in_range = alive & (self.owner != player) & (from_chosen <= CHARGE_RANGE)
+        # Prefer enemies next to a friendly unit that is locked in melee
+        in_melee = alive & (self.owner == player) & (self.melee_target[rows] >= 0)
+        trapping = in_range & ((distances <= ENGAGEMENT_RANGE) & in_melee[:, None, :]).any(axis=2)
+        has_trapping = trapping.any(axis=1)
+        in_range = np.where(has_trapping[:, None], trapping, in_range)
+        target_distance = np.where(in_range, from_chosen, np.inf)
+        target = target_distance.argmin(axis=1)
+        charge = np.isfinite(target_distance[index, target])
+        if not charge.any():
+            return
+        rows, chosen, target = rows[charge], chosen[charge], target[charge]
+        dist = target_distance[index[charge], target]
+        charge_roll = self.rng.integers(1, 7, size=(len(rows), 2)).sum(axis=1)
+
+        # Overwatch: the target shoots the charging unit first (kills aren't credited, as in the AI)
+        overwatch = self.overwatch[target] & ~self.activated[rows, target]
+        if overwatch.any():
+            self._attack(rows[overwatch], target[overwatch], chosen[overwatch], MISSILE, False)
+
+        # Judged after Overwatch, at the strengths the units are left with
+        models = self.models_alive(rows)
+        index = np.arange(len(rows))
+        favorable = self.favorable[chosen, target, models[index, chosen], models[index, target]]
+        success = (charge_roll >= dist) & favorable
+        if success.any():
+            rows, chosen, target = rows[success], chosen[success], target[success]
+            self._fight(rows, chosen, target, MELEE, True, player)
+            self.melee_target[rows, chosen] = target
+            self.melee_target[rows, target] = chosen
+
+    # Combat
+
+    def _fight(self, rows, attacker, defender, phase, charging, player):
+        """fight.simulate_fight: one attack, crediting kills to the attacking player."""
+        killed, wiped = self._attack(rows, attacker, defender, phase, charging)
+        self.kills[rows, player, phase] += killed
+        if phase == MELEE:
+            self.melee_target[rows[wiped], attacker[wiped]] = -1
+
+    def _attack(self, rows, attacker, defender, phase, charging):
+        """Unit.attack then Unit.defend for one attacker/defender pair per game row."""
+        rng = self.rng
+        wounds = self.wounds[rows, attacker]
+        models = -(-wounds // self.wounds_per_model[attacker])
+        degraded = self.degrades[attacker] & (2 * wounds < self.starting_wounds[attacker])
+        colors = self.pools[attacker, phase, int(charging), models, degraded.astype(np.intp)]
+        normal, mortal = roll_pools(colors, self.slayer[attacker], rng)
+
+        # Shields absorb from the end of the wound queue, which holds the normal wounds
+        shields = self.shields[rows, defender]
+        absorbed = np.minimum(shields, normal + mortal)
+        self.shields[rows, defender] = shields - absorbed
+        mortal = mortal - np.maximum(0, absorbed - normal)
+        normal = np.maximum(0, normal - absorbed)
+
+        # A save fails on a d6 roll below the save value; mortal wounds are only saved with Lucky
+        fail_chance = (self.save[attacker, defender, phase] - 1) / 6
+        hits = rng.binomial(normal, fail_chance)
+        hits += np.where(self.lucky[defender], rng.binomial(mortal, fail_chance), mortal)
+
+        before = self.wounds[rows, defender]
+        after = np.maximum(0, before - hits)
+        self.wounds[rows, defender] = after
+        per_model = self.wounds_per_model[defender]
+        killed = -(-before // per_model) - -(-after // per_model)
+        return killed, after == 0
+
+    # Results
+
+    def winners(self):
+        """Per game: 0 for a Player1 win, 1 for Player2, -1 for a draw."""
+        return np.where(self.score[:, 0] > self.score[:, 1], 0, np.where(self.score[:, 1] > self.score[:, 0], 1, -1))
+
+
+def roll_pools(colors, slayer, rng):
+    """
+    Roll one padded dice pool per row, like dice.roll_pool with n_trials=1 per row.
+
+    :param colors: (rows, dice) color indices, padded with the all-miss color.
+    :param slayer: (rows,) bool; Slayer re-rolls for that row's dice.
+    :return: (normal, mortal) wound arrays of shape (rows,).
+    """
+    normal = np.zeros(len(colors), dtype=np.int64)
+    mortal = np.zeros(len(colors), dtype=np.int64)
+
+    plain = ~slayer
+    if plain.any():
+        c = colors[plain]
+        faces = rng.integers(0, 6, size=c.shape)
+        normal[plain] = _FACE_NORMAL[c, faces].sum(axis=1)
+        mortal[plain] = _FACE_MORTAL[c, faces].sum(axis=1)
+    if slayer.any():
+        c = colors[slayer]
+        mortal_rolls = rng.geometric(1 - _MORTAL_FACE_COUNT[c] / 6) - 1
+        double_mortals = rng.binomial(mortal_rolls, _DOUBLE_MORTAL_SHARE[c])
+        last_faces = rng.integers(0, 6 - _MORTAL_FACE_COUNT[c])
+        normal[slayer] = _NON_MORTAL_FACE_NORMAL[c, last_faces].sum(axis=1)
+        mortal[slayer] = (mortal_rolls + double_mortals).sum(axis=1)
+    return normal, mortal
+
+
+def play_lockstep(units_a, units_b, n_games, rng=None):
+    """Play n_games of one scenario in lockstep and return the finished LockstepBattle."""
+    return LockstepBattle(units_a, units_b, n_games, rng).play()
@@ -1,10 +1,20 @@
+import argparse
+import functools
+import os
 import statistics
-import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import game_rng
 from unit import Unit
 import game
 from player import Player
 import battlefield
 import setup
+from events import bus, MessageEvent
+from battle_arrays import BattleArrays
+import lockstep
+from sequential import ConfidenceSequence
+from army_lists import ArmyLists
 
 # Mapping dice colors to your dice notation. Adjust as needed.
 DICE_MAPPING = {
@@ -119,70 +129,103 @@ def build_unit_from_template(name, template):
         template["ap_cost"]
     )
 
-def run_simulation(total_value):
+def _army_lists(target_value, templates):
+    # Cached per budget and set of costs, the only template field ArmyLists reads
+    return _cached_army_lists(target_value, tuple((name, t["ap_cost"]) for name, t in templates.items()))
+
+
+# Bounded, since calibration tries new costs every iteration
+@functools.lru_cache(maxsize=16)
+def _cached_army_lists(target_value, costs):
+    return ArmyLists({name: {"ap_cost": ap_cost} for name, ap_cost in costs}, target_value, tolerance=10, sizes=(5,))
+
+
+def select_units_for_value(target_value, rng=None, templates=None):
     """
-    Simulates battles with equivalently valued forces for both players and
-    evaluates win rates.
+    Selects a combination of units that matches the target value.
 
     Args:
-        total_value (int): The total value of units for each player.
+        target_value (int): The total value to match.
+        rng: Optional GameRNG; its army stream picks the units.
+        templates (dict): Unit templates to pick from; defaults to unit_templates.
+
+    Returns:
+        list: A list of 5 unit names whose combined value is within 10 of the target,
+              drawn with the same distribution as picking units one by one and
+              retrying until the total fits.
     """
-    results = []
-    i = 0
+    templates = unit_templates if templates is None else templates
+    choices = _army_lists(target_value, templates).sample(game_rng.resolve(rng).army)
+    if bus.active:
+        total_cost = sum(templates[name]["ap_cost"] for name in choices)
+        bus.emit(MessageEvent(f"makin a list cost:  {total_cost}"))
+    return choices
 
-    def select_units_for_value(target_value):
-        """
-        Selects a combination of units that matches the target value.
+def play_one_game(total_value, rng=None, backend='objects', templates=None, controllers=(None, None)):
+    """
+    Builds two armies of equivalent value, plays one game and returns both players.
+    Pass a GameRNG to make the game reproducible from its seed; without one the game
+    gets its own, seeded from the random module.
+    backend='arrays' keeps unit state in a BattleArrays struct-of-arrays store.
+    templates overrides unit_templates, e.g. with candidate AP costs.
+    controllers sets each player's Player.controller (None for the default AI).
+    """
+    templates = unit_templates if templates is None else templates
+    rng = game_rng.ensure(rng)
+    # Choose units for each player with equivalent total value
+    player1_choices = select_units_for_value(total_value, rng, templates)
+    player2_choices = select_units_for_value(total_value, rng, templates)
 
-        Args:
-            target_value (int): The total value to match.
+    player1_units = [build_unit_from_template(name, templates[name]) for name in player1_choices]
+    player2_units = [build_unit_from_template(name, templates[name]) for name in player2_choices]
 
-        Returns:
-            list: A list of unit names whose combined value matches the target.
-        """
-        unit_names = list(unit_templates.keys())
-        while True:
-            choices = [random.choice(unit_names) for _ in range(5)]
-            total_cost = sum(unit_templates[name]["ap_cost"] for name in choices)
-            print(f"makin a list cost:  {total_cost}")
-            if abs(total_cost - target_value) < 10:  # Allowing a small tolerance
-                return choices
+    player1 = Player(name="Player1", units=player1_units)
+    player2 = Player(name="Player2", units=player2_units)
+    player1.controller, player2.controller = controllers
 
-    while True:
-        i += 1
+    control_points, width, height = setup.setup_battlefield(rng)
+    bf = battlefield.Battlefield(width, height, control_points, [])
+    setup.place_units_randomly(player1, player2, rng)
+    if backend == 'arrays':
+        BattleArrays.adopt(player1, player2)
+
+    game.play_game(player1, player2, bf, rng)
+    return player1, player2
 
-        # Choose units for each player with equivalent total value
-        player1_choices = select_units_for_value(total_value)
-        player2_choices = select_units_for_value(total_value)
+def run_simulation(total_value, sink=None):
+    """
+    Simulates battles with equivalently valued forces for both players and
+    evaluates win rates.
 
-        player1_units = [build_unit_from_template(name, unit_templates[name]) for name in player1_choices]
-        player2_units = [build_unit_from_template(name, unit_templates[name]) for name in player2_choices]
+    Args:
+        total_value (int): The total value of units for each player.
+        sink: Optional event sink (e.g. events.TextSink()) to receive the game log.
+              Without one the games run headless and only the summary is printed.
+    """
+    if sink is not None:
+        bus.subscribe(sink)
 
-        player1 = Player(name="Player1", units=player1_units)
-        player2 = Player(name="Player2", units=player2_units)
+    # Running counts, so each game costs the same however long the run gets
+    results = {"Player1": 0, "Player2": 0, "Draw": 0}
+    i = 0
 
-        control_points, width, height = setup.setup_battlefield()
-        bf = battlefield.Battlefield(width, height, control_points, [])
-        setup.place_units_randomly(player1, player2)
+    while True:
+        i += 1
 
-        game.play_game(player1, player2, bf)
+        player1, player2 = play_one_game(total_value)
 
         # Determine result
         if player1.score > player2.score:
-            winner = "Player1"
-            results.append(winner)
+            results["Player1"] += 1
         elif player2.score > player1.score:
-            winner = "Player2"
-            results.append(winner)
+            results["Player2"] += 1
         else:
-            results.append("Draw")
+            results["Draw"] += 1
 
-        # Print results summary every 10 runs
-        
-        player1_wins = results.count("Player1")
-        player2_wins = results.count("Player2")
-        draws = results.count("Draw")
-        total_games = len(results)
+        player1_wins = results["Player1"]
+        player2_wins = results["Player2"]
+        draws = results["Draw"]
+        total_games = i
 
         print(f"--- After {i} Runs ---")
         print(f"Player1 Wins: {player1_wins} ({player1_wins / total_games:.2%})")
@@ -190,5 +233,217 @@ def run_simulation(total_value):
         print(f"Draws: {draws} ({draws / total_games:.2%})")
 
 
+class BatchReport:
+    """
+    Aggregate results of a batch of games. Every field is an integer count or sum,
+    so merging partial reports gives the same totals in any order.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.results = {"Player1": 0, "Player2": 0, "Draw": 0}
+        self.melee_kills = {"Player1": 0, "Player2": 0}
+        self.missile_kills = {"Player1": 0, "Player2": 0}
+        # Score margin is Player1's score minus Player2's
+        self.margin_counts = {}
+
+    def record(self, player1, player2):
+        self.games += 1
+        if player1.score > player2.score:
+            self.results["Player1"] += 1
+        elif player2.score > player1.score:
+            self.results["Player2"] += 1
+        else:
+            self.results["Draw"] += 1
+        for player in (player1, player2):
+            self.melee_kills[player.name] += player.melee_kills
+            self.missile_kills[player.name] += player.missile_kills
+        margin = player1.score - player2.score
+        self.margin_counts[margin] = self.margin_counts.get(margin, 0) + 1
+
+    def record_lockstep(self, battle):
+        """Add every game of a finished lockstep.LockstepBattle."""
+        winners = battle.winners()
+        self.games += battle.n_games
+        self.results["Player1"] += int(np.count_nonzero(winners == 0))
+        self.results["Player2"] += int(np.count_nonzero(winners == 1))
+        self.results["Draw"] += int(np.count_nonzero(winners == -1))
+        for player, name in enumerate(("Player1", "Player2")):
+            self.melee_kills[name] += int(battle.kills[:, player, lockstep.MELEE].sum())
+            self.missile_kills[name] += int(battle.kills[:, player, lockstep.MISSILE].sum())
+        margins, counts = np.unique(battle.score[:, 0] - battle.score[:, 1], return_counts=True)
+        for margin, count in zip(margins.tolist(), counts.tolist()):
+            self.margin_counts[margin] = self.margin_counts.get(margin, 0) + count
+
+    def merge(self, other):
+        self.games += other.games
+        for key in self.results:
+            self.results[key] += other.results[key]
+        for name in self.melee_kills:
+            self.melee_kills[name] += other.melee_kills[name]
+            self.missile_kills[name] += other.missile_kills[name]
+        for margin, count in other.margin_counts.items():
+            self.margin_counts[margin] = self.margin_counts.get(margin, 0) + count
+        return self
+
+    def mean_margin(self):
+        if not self.games:
+            return 0.0
+        return sum(margin * count for margin, count in self.margin_counts.items()) / self.games
+
+    def summary(self):
+        lines = [f"--- After {self.games} Runs ---"]
+        for key, label in (("Player1", "Player1 Wins"), ("Player2", "Player2 Wins"), ("Draw", "Draws")):
+            count = self.results[key]
+            lines.append(f"{label}: {count} ({count / max(self.games, 1):.2%})")
+        for name in self.melee_kills:
+            lines.append(f"{name} kills: melee {self.melee_kills[name]}, missile {self.missile_kills[name]}")
+        lines.append(f"Mean score margin (Player1 - Player2): {self.mean_margin():+.3f}")
+        margins = ", ".join(f"{margin:+d}: {count}" for margin, count in sorted(self.margin_counts.items()))
+        lines.append(f"Score margins: {margins}")
+        return "\n".join(lines)
+
+
+def run_sequential(total_value, target=0.5, margin=0.02, alpha=0.05, max_games=None, seed=0,
+                   backend='objects', tuning_games=500, report_every=0):
+    """
+    Plays games one at a time until Player1's win rate (draws count half) is clearly above
+    or below target, or clearly within target +/- margin, using an anytime-valid confidence
+    sequence, so checking after every game is safe.
+
+    Args:
+        total_value (int): The total value of units for each player.
+        target (float): Win rate to test against.
+        margin (float): Half-width of the equivalence band around target; 0 disables it.
+        alpha (float): Error probability for the whole run.
+        max_games (int): Give up after this many games; None runs until a decision.
+        seed (int): Master seed; game i uses GameRNG.for_game(seed, i).
+        backend (str): 'objects' or 'arrays'.
+        tuning_games (int): Games around which the confidence sequence is tightest.
+        report_every (int): Print progress every this many games; 0 for none.
+
+    Returns:
+        (decision, BatchReport, (low, high)); decision is 'above', 'below', 'equivalent',
+        or None if max_games ran out first.
+    """
+    report = BatchReport()
+    sequence = ConfidenceSequence(alpha, tuning_games)
+    decision = None
+    while max_games is None or report.games < max_games:
+        rng = game_rng.GameRNG.for_game(seed, report.games)
+        player1, player2 = play_one_game(total_value, rng, backend)
+        report.record(player1, player2)
+        if player1.score > player2.score:
+            sequence.update(1.0)
+        elif player2.score > player1.score:
+            sequence.update(0.0)
+        else:
+            sequence.update(0.5)
+
+        decision = sequence.decision(target, margin)
+        if report_every and report.games % report_every == 0:
+            low, high = sequence.interval()
+            print(f"After {report.games} games: Player1 win rate {sequence.mean():.3f} [{low:.3f}, {high:.3f}]")
+        if decision is not None:
+            break
+    return decision, report, sequence.interval()
+
+
+# Default games per scenario for the lockstep backend
+LOCKSTEP_CHUNK_SIZE = 1000
+
+
+def _run_chunk(args):
+    total_value, master_seed, start, stop, backend = args
+    report = BatchReport()
+    if backend == 'lockstep':
+        # The whole chunk is one scenario: one pair of armies, played stop - start times in lockstep
+        rng = game_rng.GameRNG.for_game(master_seed, start)
+        armies = [
+            [build_unit_from_template(name, unit_templates[name]) for name in select_units_for_value(total_value, rng)]
+            for _ in range(2)
+        ]
+        report.record_lockstep(lockstep.play_lockstep(armies[0], armies[1], stop - start, rng.np_dice))
+        return report
+    for game_index in range(start, stop):
+        # Each game's streams depend only on the master seed and its index,
+        # so results don't depend on which worker plays it
+        rng = game_rng.GameRNG.for_game(master_seed, game_index)
+        report.record(*play_one_game(total_value, rng, backend))
+    return report
+
+
+def run_batch(total_value, n_games, workers=None, chunk_size=None, seed=0, backend='objects'):
+    """
+    Plays a bounded batch of games spread across a process pool and returns the merged BatchReport.
+
+    Args:
+        total_value (int): The total value of units for each player.
+        n_games (int): Number of games to play.
+        workers (int): Worker processes; defaults to the CPU count. 1 runs in-process.
+        chunk_size (int): Games per task handed to a worker.
+        seed (int): Master seed. The same seed gives the same report for any worker count.
+        backend (str): 'objects' (Unit/Model objects), 'arrays' (BattleArrays views) or
+            'lockstep' (lockstep.LockstepBattle with its deterministic AI). With 'lockstep'
+            each chunk is one scenario whose armies are shared by all its games, so the
+            report depends on chunk_size (default LOCKSTEP_CHUNK_SIZE), but not on workers.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        if backend == 'lockstep':
+            chunk_size = LOCKSTEP_CHUNK_SIZE
+        else:
+            chunk_size = max(1, min(500, n_games // (workers * 4) or 1))
+    chunks = [
+        (total_value, seed, start, min(start + chunk_size, n_games), backend)
+        for start in range(0, n_games, chunk_size)
+    ]
+
+    report = BatchReport()
+    if workers == 1:
+        for chunk in chunks:
+            report.merge(_run_chunk(chunk))
+        return report
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_run_chunk, chunks):
+            report.merge(partial)
+    return report
+
+
 if __name__ == "__main__":
-    run_simulation(22)
+    parser = argparse.ArgumentParser(description="Simulate games between equally valued armies.")
+    parser.add_argument("--value", type=int, default=22, help="Total unit value for each player.")
+    parser.add_argument("--games", type=int, help="Play a bounded batch of this many games instead of running forever.")
+    parser.add_argument("--workers", type=int, help="Worker processes for batch mode (default: CPU count).")
+    parser.add_argument("--chunk-size", type=int, help="Games per worker task in batch mode.")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed for batch mode.")
+    parser.add_argument("--backend", choices=("objects", "arrays", "lockstep"), default="objects",
+                        help="Game engine for batch mode; lockstep plays each chunk's games together as one scenario.")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Play until Player1's win rate is decided against --target (at most --games games).")
+    parser.add_argument("--target", type=float, default=0.5, help="Win rate tested in sequential mode.")
+    parser.add_argument("--margin", type=float, default=0.02, help="Equivalence band around --target in sequential mode.")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Error probability in sequential mode.")
+    args = parser.parse_args()
+
+    if args.sequential:
+        if args.backend == 'lockstep':
+            parser.error("--sequential plays one game at a time; use the objects or arrays backend")
+        decision, report, (low, high) = run_sequential(
+            args.value, args.target, args.margin, args.alpha, args.games, args.seed,
+            args.backend, report_every=100,
+        )
+        print(report.summary())
+        outcome = {
+            'above': f"above {args.target}",
+            'below': f"below {args.target}",
+            'equivalent': f"within {args.target} +/- {args.margin}",
+            None: "undecided",
+        }[decision]
+        print(f"Player1 win rate {outcome} after {report.games} games; "
+              f"{1 - args.alpha:.0%} confidence sequence [{low:.3f}, {high:.3f}]")
+    elif args.games:
+        print(run_batch(args.value, args.games, args.workers, args.chunk_size, args.seed, args.backend).summary())
+    else:
+        run_simulation(args.value)
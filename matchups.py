@@ -0,0 +1,183 @@
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+from casualties import casualty_distribution
+
+PHASES = ('missile', 'melee')
+# Bump when the rules behind the table change, so old cache files are not reused
+CACHE_VERSION = 1
+# Next to the source by default; MATCHUP_CACHE_DIR overrides it, e.g. for read-only installs
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.matchup_cache')
+
+# Tables already loaded in this process, by template hash
+_loaded = {}
+
+
+# Template fields the casualty results depend on; AP cost, movement and range don't change them
+COMBAT_FIELDS = ('num_models', 'armor_save', 'wounds', 'melee_dice', 'ranged_dice', 'keywords')
+
+
+def templates_hash(templates):
+    combat = {name: {field: t.get(field) for field in COMBAT_FIELDS} for name, t in templates.items()}
+    data = json.dumps({'version': CACHE_VERSION, 'templates': combat}, sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _default_build_unit(name, template):
+    # Imported here: main imports the game modules, which may import this one
+    from main import build_unit_from_template
+    return build_unit_from_template(name, template)
+
+
+def _at_strength(unit, models):
+    # Keep the first `models` models at full wounds and kill the rest
+    for model in unit.models[models:]:
+        model.current_wounds = 0
+    unit.check_casualties()
+    return unit
+
+
+class MatchupTable:
+    """
+    Exact single-attack results for every pair of unit templates.
+
+    Arrays are indexed [attacker, defender, phase, charging, attacker_models, defender_models],
+    with phase 0 for missile and 1 for melee, and model counts of surviving full-strength
+    models (0 up to the largest starting count; counts above a template's size are unused).
+    """
+
+    def __init__(self, names, expected, wipe, variance):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.expected = expected
+        self.wipe = wipe
+        self.variance = variance
+
+    def _key(self, attacker, defender, phase, charging, attacker_models, defender_models):
+        return (
+            self.index[attacker], self.index[defender], PHASES.index(phase), int(bool(charging)),
+            attacker_models, defender_models,
+        )
+
+    def expected_casualties(self, attacker, defender, phase, charging, attacker_models, defender_models):
+        return float(self.expected[self._key(attacker, defender, phase, charging, attacker_models, defender_models)])
+
+    def kill_probability(self, attacker, defender, phase, charging, attacker_models, defender_models):
+        """Probability the attack wipes out the defending unit."""
+        return float(self.wipe[self._key(attacker, defender, phase, charging, attacker_models, defender_models)])
+
+    def casualty_variance(self, attacker, defender, phase, charging, attacker_models, defender_models):
+        return float(self.variance[self._key(attacker, defender, phase, charging, attacker_models, defender_models)])
+
+    def lookup(self, attacker, defender, phase, charging=False):
+        """Row for two units in play: (expected casualties, kill probability, variance)."""
+        key = self._key(attacker.name, defender.name, phase, charging, attacker.num_models, defender.num_models)
+        return float(self.expected[key]), float(self.wipe[key]), float(self.variance[key])
+
+    def report(self, templates, phase='melee', charging=False):
+        """Expected casualties at full strength, attackers down the side and defenders across."""
+        width = max(len(name) for name in self.names)
+        p, c = PHASES.index(phase), int(bool(charging))
+        lines = [f"Expected casualties, {phase}{' (charging)' if charging else ''}, full strength"]
+        lines.append(" " * (width + 4) + " ".join(f"{i + 1:>6}" for i in range(len(self.names))))
+        for i, attacker in enumerate(self.names):
+            a_models = templates[attacker]["num_models"]
+            row = []
+            for j, defender in enumerate(self.names):
+                d_models = templates[defender]["num_models"]
+                row.append(f"{self.expected[i, j, p, c, a_models, d_models]:>6.2f}")
+            lines.append(f"{attacker:<{width}} {i + 1:>2} " + " ".join(row))
+        return "\n".join(lines)
+
+    def save(self, path):
+        """
+        Write the table to an .npz file. The file is replaced atomically, so other processes
+        loading the same cache file never see it half written.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(f, names=np.array(self.names), expected=self.expected, wipe=self.wipe,
+                                    variance=self.variance)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['names'].tolist(), data['expected'], data['wipe'], data['variance'])
+
+
+def build_matchup_table(templates, build_unit=None):
+    """Compute the table with casualties.casualty_distribution for every entry."""
+    build_unit = build_unit or _default_build_unit
+    names = list(templates)
+    max_models = max(t["num_models"] for t in templates.values())
+    shape = (len(names), len(names), len(PHASES), 2, max_models + 1, max_models + 1)
+    expected = np.zeros(shape)
+    wipe = np.zeros(shape)
+    variance = np.zeros(shape)
+
+    for i, attacker_name in enumerate(names):
+        for j, defender_name in enumerate(names):
+            for a_models in range(1, templates[attacker_name]["num_models"] + 1):
+                attacker = _at_strength(build_unit(attacker_name, templates[attacker_name]), a_models)
+                for d_models in range(1, templates[defender_name]["num_models"] + 1):
+                    defender = _at_strength(build_unit(defender_name, templates[defender_name]), d_models)
+                    for p, phase in enumerate(PHASES):
+                        for charging in (0, 1):
+                            dist = casualty_distribution(attacker, defender, phase, charging=bool(charging))
+                            key = (i, j, p, charging, a_models, d_models)
+                            expected[key] = dist.expected_killed()
+                            wipe[key] = dist.wipe_probability()
+                            variance[key] = dist.variance_killed()
+    return MatchupTable(names, expected, wipe, variance)
+
+
+def load_matchup_table(templates=None, cache_dir=None, build_unit=None):
+    """
+    The table for templates (main.unit_templates by default): from memory if already
+    loaded, else from cache_dir, else built and saved there. Files are keyed by a hash
+    of the templates' combat fields, so edited stats never pick up a stale table while
+    AP cost tuning keeps reusing it. cache_dir defaults to $MATCHUP_CACHE_DIR, then
+    CACHE_DIR; if it can't be written the table is only kept in memory.
+    """
+    if templates is None:
+        from main import unit_templates as templates
+    if cache_dir is None:
+        cache_dir = os.environ.get('MATCHUP_CACHE_DIR') or CACHE_DIR
+    digest = templates_hash(templates)
+    table = _loaded.get(digest)
+    if table is not None:
+        return table
+
+    path = os.path.join(cache_dir, f"matchups-{digest[:16]}.npz")
+    if os.path.exists(path):
+        table = MatchupTable.load(path)
+    else:
+        table = build_matchup_table(templates, build_unit)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            table.save(path)
+        except OSError:
+            pass  # Read-only checkout or install: the next process builds it again
+    _loaded[digest] = table
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the unit template matchup table.")
+    parser.add_argument("--phase", choices=PHASES, help="Only this phase (default: both).")
+    args = parser.parse_args()
+
+    from main import unit_templates
+    table = load_matchup_table(unit_templates)
+    for phase in ([args.phase] if args.phase else PHASES):
+        for charging in ((False, True) if phase == 'melee' else (False,)):
+            print(table.report(unit_templates, phase, charging))
+            print()
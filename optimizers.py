@@ -0,0 +1,358 @@
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from genetic import GENES, QUANTUM, Population, Strategy, evaluate_population, gene_key
+
+
+def to_genes(x):
+    """Map unconstrained search points (rows of x) to Strategy weights: clipped at 0, summing to 1."""
+    genes = np.maximum(np.atleast_2d(np.asarray(x, dtype=np.float64)), 0.0)
+    totals = genes.sum(axis=1, keepdims=True)
+    uniform = np.full(genes.shape[1], 1.0 / genes.shape[1])
+    return np.where(totals > 0, genes / np.where(totals > 0, totals, 1.0), uniform)
+
+
+class Optimizer:
+    """
+    Ask/tell interface: ask() returns a (k, dim) array of points to evaluate and tell()
+    takes them back with their fitness (higher is better). refresh() gives the optimizer
+    updated fitness for points it keeps, after they were re-evaluated.
+    """
+
+    def ask(self):
+        raise NotImplementedError
+
+    def tell(self, x, fitness):
+        raise NotImplementedError
+
+    def refresh(self, fitness_of):
+        pass
+
+
+class CMAES(Optimizer):
+    """(mu/mu_w, lambda) CMA-ES (Hansen's tutorial parameters), maximizing."""
+
+    def __init__(self, mean, sigma=0.1, popsize=None, rng=None):
+        self.rng = np.random.default_rng(rng)
+        self.mean = np.array(mean, dtype=np.float64)
+        self.sigma = sigma
+        n = self.dim = len(self.mean)
+        self.popsize = popsize or 4 + int(3 * math.log(n))
+        self.mu = self.popsize // 2
+        weights = math.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / weights.sum()
+        self.mueff = 1.0 / np.sum(self.weights ** 2)
+
+        self.cc = (4 + self.mueff / n) / (n + 4 + 2 * self.mueff / n)
+        self.cs = (self.mueff + 2) / (n + self.mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + self.mueff)
+        self.cmu = min(1 - self.c1, 2 * (self.mueff - 2 + 1 / self.mueff) / ((n + 2) ** 2 + self.mueff))
+        self.damps = 1 + 2 * max(0.0, math.sqrt((self.mueff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n * n))
+
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.B = np.eye(n)
+        self.D = np.ones(n)
+        self.C = np.eye(n)
+        self.generation = 0
+
+    def ask(self):
+        z = self.rng.standard_normal((self.popsize, self.dim))
+        return self.mean + self.sigma * (z * self.D) @ self.B.T
+
+    def tell(self, x, fitness):
+        n = self.dim
+        order = np.argsort(-np.asarray(fitness), kind='stable')[:self.mu]
+        y = (np.asarray(x)[order] - self.mean) / self.sigma
+        y_w = self.weights @ y
+        self.mean = self.mean + self.sigma * y_w
+        self.generation += 1
+
+        inv_sqrt_c = self.B @ np.diag(1 / self.D) @ self.B.T
+        self.ps = (1 - self.cs) * self.ps + math.sqrt(self.cs * (2 - self.cs) * self.mueff) * inv_sqrt_c @ y_w
+        ps_norm = np.linalg.norm(self.ps)
+        h_sigma = ps_norm / math.sqrt(1 - (1 - self.cs) ** (2 * self.generation)) / self.chi_n < 1.4 + 2 / (n + 1)
+        self.pc = (1 - self.cc) * self.pc + h_sigma * math.sqrt(self.cc * (2 - self.cc) * self.mueff) * y_w
+
+        rank_one = np.outer(self.pc, self.pc) + (1 - h_sigma) * self.cc * (2 - self.cc) * self.C
+        rank_mu = (y.T * self.weights) @ y
+        self.C = (1 - self.c1 - self.cmu) * self.C + self.c1 * rank_one + self.cmu * rank_mu
+        self.sigma *= math.exp((self.cs / self.damps) * (ps_norm / self.chi_n - 1))
+
+        self.C = (self.C + self.C.T) / 2
+        eigenvalues, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+
+class DifferentialEvolution(Optimizer):
+    """DE/rand/1/bin with greedy one-to-one replacement, maximizing."""
+
+    def __init__(self, dim, popsize=None, f=0.5, cr=0.9, bounds=(0.0, 1.0), rng=None):
+        self.rng = np.random.default_rng(rng)
+        self.dim = dim
+        self.popsize = max(4, popsize or 10 * dim)
+        self.f = f
+        self.cr = cr
+        self.bounds = bounds
+        self.population = self.rng.uniform(bounds[0], bounds[1], (self.popsize, dim))
+        self.fitness = None
+
+    def ask(self):
+        if self.fitness is None:
+            return self.population.copy()
+        n = self.popsize
+        # Three distinct donors per row, none of them the row itself
+        scores = self.rng.random((n, n))
+        scores[np.arange(n), np.arange(n)] = np.inf
+        a, b, c = np.argsort(scores, axis=1)[:, :3].T
+        mutant = self.population[a] + self.f * (self.population[b] - self.population[c])
+        cross = self.rng.random((n, self.dim)) < self.cr
+        cross[np.arange(n), self.rng.integers(0, self.dim, n)] = True
+        return np.clip(np.where(cross, mutant, self.population), *self.bounds)
+
+    def tell(self, x, fitness):
+        x, fitness = np.asarray(x), np.asarray(fitness, dtype=np.float64)
+        if self.fitness is None:
+            self.population, self.fitness = x.copy(), fitness.copy()
+            return
+        better = fitness >= self.fitness
+        self.population[better] = x[better]
+        self.fitness[better] = fitness[better]
+
+    def refresh(self, fitness_of):
+        if self.fitness is not None:
+            self.fitness = fitness_of(self.population)
+
+
+class GeneticOptimizer(Optimizer):
+    """genetic.Population's generational GA behind the ask/tell interface."""
+
+    def __init__(self, gene_names=GENES, popsize=50, selection='truncation', elite=1, mutation_rate=0.1, rng=None):
+        self.rng = np.random.default_rng(rng)
+        self.popsize = popsize
+        self.selection = selection
+        self.elite = elite
+        self.mutation_rate = mutation_rate
+        self.population = Population.random(popsize, self.rng, gene_names)
+
+    def ask(self):
+        if not np.isnan(self.population.fitness).all():
+            self.population = self.population.next_generation(
+                self.rng, self.popsize, self.selection, self.elite, mutation_rate=self.mutation_rate,
+            )
+        return self.population.genes.copy()
+
+    def tell(self, x, fitness):
+        self.population.fitness = np.asarray(fitness, dtype=np.float64)
+
+    def refresh(self, fitness_of):
+        if not np.isnan(self.population.fitness).all():
+            self.population.fitness = fitness_of(self.population.genes)
+
+
+class NoisyObjective:
+    """
+    Running means of a noisy fitness, per genome (quantized as in genetic's fitness cache).
+
+    sample(genes, replicate) returns one noisy value per row of genes (Strategy weights).
+    A genome's r-th sample always uses replicate r, so every genome's r-th evaluation shares
+    the same random scenarios (common random numbers) and averaging more replicates brings
+    a lucky or unlucky first estimate back toward the true mean.
+    """
+
+    def __init__(self, sample, quantum=QUANTUM):
+        self.sample = sample
+        self.quantum = quantum
+        self.totals = {}
+        self.counts = {}
+        self.genes = {}
+        self.samples = 0
+
+    def _keys(self, x):
+        genes = to_genes(x)
+        keys = [gene_key(g, self.quantum) for g in genes]
+        for key, g in zip(keys, genes):
+            self.genes.setdefault(key, g)
+        return keys
+
+    def _sample_to(self, keys, targets):
+        # Bring each key's sample count up to its target, one replicate index at a time
+        while True:
+            wanted = {}
+            for key, target in zip(keys, targets):
+                count = self.counts.get(key, 0)
+                if count < target:
+                    wanted.setdefault(count, {})[key] = None
+            if not wanted:
+                return
+            for replicate, batch in wanted.items():
+                batch = list(batch)
+                values = self.sample(np.array([self.genes[key] for key in batch]), replicate)
+                for key, value in zip(batch, values):
+                    self.totals[key] = self.totals.get(key, 0.0) + float(value)
+                    self.counts[key] = self.counts.get(key, 0) + 1
+                self.samples += len(batch)
+
+    def evaluate(self, x, repeats=1):
+        """Mean fitness of each row of x over at least `repeats` samples."""
+        keys = self._keys(x)
+        self._sample_to(keys, [repeats] * len(keys))
+        return np.array([self.totals[key] / self.counts[key] for key in keys])
+
+    def resample(self, x):
+        """Add one more sample to each (distinct) row of x."""
+        keys = list(dict.fromkeys(self._keys(x)))
+        self._sample_to(keys, [self.counts.get(key, 0) + 1 for key in keys])
+
+    def mean(self, x):
+        keys = self._keys(x)
+        self._sample_to(keys, [1] * len(keys))
+        return np.array([self.totals[key] / self.counts[key] for key in keys])
+
+    def leaders(self, count=1, min_samples=1):
+        """The count genomes with the highest mean over at least min_samples samples, best first."""
+        keys = [k for k in self.counts if self.counts[k] >= min_samples]
+        keys = sorted(keys, key=lambda k: self.totals[k] / self.counts[k], reverse=True)[:count]
+        return [(self.genes[k], self.totals[k] / self.counts[k], self.counts[k]) for k in keys]
+
+
+class GameObjective:
+    """
+    Win rate (draws count half) of a Strategy against a fixed opponent, the all-ones
+    baseline by default. Each sample plays games_per_opponent scenarios from both sides
+    through genetic.evaluate_population; replicate r uses its own scenario set.
+    """
+
+    def __init__(self, opponent=None, gene_names=GENES, seed=0, games_per_opponent=2, total_value=22, pool=None):
+        self.gene_names = tuple(gene_names)
+        self.opponent = opponent or Strategy.from_genes(np.ones(len(self.gene_names)), self.gene_names)
+        self.seed = seed
+        self.games_per_opponent = games_per_opponent
+        self.total_value = total_value
+        self.pool = pool
+
+    def __call__(self, genes, replicate):
+        population = Population(genes, self.gene_names)
+        points = evaluate_population(
+            population, [self.opponent], [self.seed, replicate], self.games_per_opponent,
+            self.total_value, self.pool,
+        )
+        return points / (2 * self.games_per_opponent)
+
+
+class SyntheticObjective:
+    """
+    Cheap noisy stand-in for benchmarking optimizers: 1 minus the distance to a hidden
+    optimum on the simplex, plus Gaussian noise (fixed per genome and replicate).
+    """
+
+    def __init__(self, dim=len(GENES), noise=0.1, seed=0):
+        rng = np.random.default_rng(seed)
+        self.optimum = rng.dirichlet(np.ones(dim))
+        self.noise = noise
+        self.seed = seed
+
+    def __call__(self, genes, replicate):
+        values = 1.0 - np.linalg.norm(genes - self.optimum, axis=1)
+        for i, g in enumerate(genes):
+            key = gene_key(g)
+            noise_rng = np.random.default_rng([self.seed, replicate, *(abs(k) for k in key)])
+            values[i] += self.noise * noise_rng.standard_normal()
+        return values
+
+
+def optimize(optimizer, objective, budget, repeats=1, reevaluate=1, target=None, min_samples=4, progress=None):
+    """
+    Run optimizer against a NoisyObjective until `budget` samples have been used.
+
+    Each iteration asks for points, scores each by its mean over `repeats` samples, and
+    tells the optimizer. The `reevaluate` genomes with the best mean so far then get one
+    more sample each, and the optimizer sees their updated means (refresh), so an
+    incumbent that got lucky regresses instead of being kept forever.
+
+    Stops early once a genome with at least min_samples samples has a mean >= target.
+    Returns a history of (samples used, best mean, its sample count) per iteration, where
+    the best is taken over genomes with at least min_samples samples (if there are any).
+    """
+    history = []
+    while objective.samples < budget:
+        x = optimizer.ask()
+        optimizer.tell(x, objective.evaluate(x, repeats))
+        if reevaluate:
+            objective.resample(np.array([genes for genes, _, _ in objective.leaders(reevaluate)]))
+            optimizer.refresh(objective.mean)
+        _, best, count = (objective.leaders(1, min_samples) or objective.leaders(1))[0]
+        history.append((objective.samples, best, count))
+        if progress is not None:
+            progress(history[-1])
+        if target is not None and best >= target and count >= min_samples:
+            break
+    return history
+
+
+def samples_to_target(history, target, min_samples=4):
+    """Samples used when the best mean first reached target with enough samples, or None."""
+    for samples, best, count in history:
+        if best >= target and count >= min_samples:
+            return samples
+    return None
+
+
+# Benchmark contestants over the Strategy genes, each built from a seed
+OPTIMIZERS = {
+    'ga': lambda rng: GeneticOptimizer(GENES, popsize=20, rng=rng),
+    'cma-es': lambda rng: CMAES(np.full(len(GENES), 1.0 / len(GENES)), sigma=0.15, rng=rng),
+    'de': lambda rng: DifferentialEvolution(len(GENES), popsize=5 * len(GENES), rng=rng),
+}
+
+
+def benchmark(make_objective, target, budget, runs=3, repeats=1, reevaluate=2):
+    """
+    Samples each optimizer needs to reach target, over `runs` seeds.
+    make_objective(run) returns the sample function for a run; every optimizer gets the same one.
+    Returns {name: list of samples-to-target (None if not reached)}.
+    """
+    results = {}
+    for name, make_optimizer in OPTIMIZERS.items():
+        results[name] = []
+        for run in range(runs):
+            objective = NoisyObjective(make_objective(run))
+            history = optimize(make_optimizer(run), objective, budget, repeats, reevaluate, target)
+            results[name].append(samples_to_target(history, target))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Strategy optimizers by samples needed to reach a target fitness.")
+    parser.add_argument("--objective", choices=("synthetic", "games"), default="synthetic",
+                        help="Noisy synthetic function or real games against the baseline.")
+    parser.add_argument("--target", type=float, default=0.95, help="Fitness to reach (win rate for games).")
+    parser.add_argument("--budget", type=int, default=2000, help="Samples per run.")
+    parser.add_argument("--runs", type=int, default=5, help="Seeds per optimizer.")
+    parser.add_argument("--repeats", type=int, default=1, help="Samples averaged per candidate.")
+    parser.add_argument("--reevaluate", type=int, default=2, help="Leading genomes resampled each iteration.")
+    parser.add_argument("--games", type=int, default=2, help="Scenarios per sample with --objective games.")
+    parser.add_argument("--workers", type=int, help="Worker processes for --objective games (default: CPU count).")
+    args = parser.parse_args()
+
+    pool = None
+    if args.objective == "games":
+        workers = args.workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        make_objective = lambda run: GameObjective(seed=run, games_per_opponent=args.games, pool=pool)
+    else:
+        make_objective = lambda run: SyntheticObjective(seed=run)
+    try:
+        results = benchmark(make_objective, args.target, args.budget, args.runs, args.repeats, args.reevaluate)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    print(f"Samples to reach {args.target} ({args.objective}, budget {args.budget}):")
+    for name, samples in results.items():
+        reached = [s for s in samples if s is not None]
+        median = f"{int(np.median(reached))}" if reached else "-"
+        print(f"  {name:<7} reached {len(reached)}/{len(samples)}, median {median}, runs {samples}")
@@ -6,6 +6,10 @@ class Player:
         self.melee_kills = 0
         self.missile_kills = 0
         self.remaining_ap = 0  # New attribute to track unused AP
+        # Activation function with ai_third_input.ai_activate_unit's signature; None uses that AI
+        self.controller = None
+        # game.ActivationLoop of the turn being played, for controllers that look ahead
+        self.turn = None
 
     def total_ap_on_table(self):
         return sum(unit.ap_cost for unit in self.units if unit.is_alive())
@@ -0,0 +1,151 @@
+from collections import Counter
+from functools import lru_cache
+from math import comb
+import numpy as np
+from dice import DIE_FACES
+
+# Slayer dice can in principle explode forever; the chain is cut off once the
+# probability of rolling any more mortal faces drops below this.
+SLAYER_TAIL = 1e-12
+
+
+class PoolDistribution:
+    """
+    Exact joint distribution of the wounds a dice pool inflicts.
+
+    pmf[n, m] is the probability of rolling n normal and m mortal wounds.
+    Doubles are resolved into two normal wounds as in dice.roll_dice, so the
+    'double' count of a roll is always zero and needs no axis of its own.
+    """
+
+    def __init__(self, pmf):
+        self.pmf = pmf
+        self.pmf.setflags(write=False)
+        normal_values = np.arange(pmf.shape[0])
+        mortal_values = np.arange(pmf.shape[1])
+        self.normal_pmf = pmf.sum(axis=1)
+        self.mortal_pmf = pmf.sum(axis=0)
+        self.total_pmf = np.zeros(pmf.shape[0] + pmf.shape[1] - 1)
+        for m in mortal_values:
+            self.total_pmf[m:m + pmf.shape[0]] += pmf[:, m]
+        self._expected = {
+            'normal': float(normal_values @ self.normal_pmf),
+            'double': 0.0,
+            'mortal': float(mortal_values @ self.mortal_pmf),
+        }
+        self._expected['total'] = self._expected['normal'] + self._expected['mortal']
+
+    def _marginal(self, kind):
+        if kind == 'total':
+            return self.total_pmf
+        if kind == 'normal':
+            return self.normal_pmf
+        if kind == 'mortal':
+            return self.mortal_pmf
+        if kind == 'double':
+            return np.ones(1)
+        raise ValueError(f"Unknown wound kind: {kind}")
+
+    def probability(self, normal=0, mortal=0, double=0):
+        if double or normal >= self.pmf.shape[0] or mortal >= self.pmf.shape[1]:
+            return 0.0
+        return float(self.pmf[normal, mortal])
+
+    def expected(self):
+        """Expected wounds by kind, plus the 'total'."""
+        return dict(self._expected)
+
+    def variance(self, kind='total'):
+        pmf = self._marginal(kind)
+        values = np.arange(len(pmf))
+        mean = values @ pmf
+        return float(((values - mean) ** 2) @ pmf)
+
+    def percentile(self, q, kind='total'):
+        """Smallest wound count whose cumulative probability reaches q percent."""
+        cdf = np.cumsum(self._marginal(kind))
+        return int(min(np.searchsorted(cdf, q / 100.0 - 1e-12), len(cdf) - 1))
+
+    def at_least(self, wounds, kind='total'):
+        """Probability of inflicting at least this many wounds."""
+        pmf = self._marginal(kind)
+        return float(pmf[max(0, wounds):].sum())
+
+
+def _convolve(a, b):
+    # 2D convolution by shifted adds over the non-zero cells of the smaller table
+    if a.size > b.size:
+        a, b = b, a
+    out = np.zeros((a.shape[0] + b.shape[0] - 1, a.shape[1] + b.shape[1] - 1))
+    for i, j in zip(*np.nonzero(a)):
+        out[i:i + b.shape[0], j:j + b.shape[1]] += a[i, j] * b
+    return out
+
+
+@lru_cache(maxsize=None)
+def _die_pmf(dice_type, slayer):
+    faces = DIE_FACES[dice_type]
+    if not slayer or not any(mortal for _, mortal in faces):
+        pmf = np.zeros((3, 3))
+        for normal, mortal in faces:
+            pmf[normal, mortal] += 1 / 6
+        return pmf
+
+    # Slayer: K mortal faces (geometric) before the first non-mortal face.
+    # Normal wounds only come from that last face, so the two are independent.
+    mortal_faces = [mortal for _, mortal in faces if mortal]
+    kept_normals = [normal for normal, mortal in faces if not mortal]
+    p_mortal = len(mortal_faces) / 6
+    p_double = mortal_faces.count(2) / len(mortal_faces)
+
+    max_rolls = 1
+    while p_mortal ** max_rolls > SLAYER_TAIL:
+        max_rolls += 1
+
+    mortal_pmf = np.zeros(2 * max_rolls + 1)
+    for k in range(max_rolls + 1):
+        p_k = p_mortal ** k * (1 - p_mortal)
+        for doubles in range(k + 1):
+            mortal_pmf[k + doubles] += p_k * comb(k, doubles) * p_double ** doubles * (1 - p_double) ** (k - doubles)
+    mortal_pmf /= mortal_pmf.sum()
+
+    normal_pmf = np.zeros(3)
+    for normal in kept_normals:
+        normal_pmf[normal] += 1 / len(kept_normals)
+    return np.outer(normal_pmf, mortal_pmf)
+
+
+@lru_cache(maxsize=None)
+def _die_power_pmf(dice_type, count, slayer):
+    if count == 1:
+        return _die_pmf(dice_type, slayer)
+    return _convolve(_die_power_pmf(dice_type, count - 1, slayer), _die_pmf(dice_type, slayer))
+
+
+def pool_signature(pool):
+    """The color multiset of a pool, which is all its distribution depends on."""
+    return tuple(sorted(Counter(pool).items()))
+
+
+@lru_cache(maxsize=None)
+def distribution_for_signature(signature, slayer=False):
+    pmf = np.ones((1, 1))
+    for dice_type, count in signature:
+        pmf = _convolve(pmf, _die_power_pmf(dice_type, count, slayer))
+    return PoolDistribution(pmf)
+
+
+def pool_distribution(pool, slayer=False):
+    """
+    Exact wound distribution for a dice pool, e.g. ['Black', 'Green', 'Green'].
+    Results are memoized on the pool's color multiset, so repeated queries are lookups.
+    """
+    return distribution_for_signature(pool_signature(pool), bool(slayer))
+
+
+def expected_wounds(pool, slayer=False):
+    return pool_distribution(pool, slayer).expected()
+
+
+def wound_percentile(pool, q, slayer=False, kind='total'):
+    return pool_distribution(pool, slayer).percentile(q, kind)
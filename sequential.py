@@ -0,0 +1,61 @@
+import math
+
+# Outcomes in [0, 1] are sub-Gaussian with this scale
+SUB_GAUSSIAN_SIGMA = 0.5
+
+
+class ConfidenceSequence:
+    """
+    Anytime-valid confidence sequence for the mean of outcomes in [0, 1].
+
+    Uses the normal-mixture boundary for sub-Gaussian sums (Robbins; Howard et al.):
+    with probability at least 1 - alpha the interval contains the true mean at every
+    game simultaneously, so it can be checked after each game and the experiment
+    stopped whenever it is decisive without inflating the error rate.
+
+    update() is O(1); only the count and the running sum are kept.
+    """
+
+    def __init__(self, alpha=0.05, tuning_games=500):
+        """
+        :param alpha: Error probability over the whole (unbounded) experiment.
+        :param tuning_games: Number of games around which the interval is tightest.
+        """
+        self.alpha = alpha
+        # Mixing precision, in the same units as the intrinsic time sigma^2 * n
+        self.rho = SUB_GAUSSIAN_SIGMA ** 2 * tuning_games
+        self.n = 0
+        self.total = 0.0
+
+    def update(self, outcome):
+        self.n += 1
+        self.total += outcome
+
+    def mean(self):
+        return self.total / self.n if self.n else 0.5
+
+    def radius(self):
+        if not self.n:
+            return math.inf
+        v = SUB_GAUSSIAN_SIGMA ** 2 * self.n
+        boundary = math.sqrt((v + self.rho) * math.log((v + self.rho) / (self.rho * self.alpha ** 2)))
+        return boundary / self.n
+
+    def interval(self):
+        r = self.radius()
+        m = self.mean()
+        return max(0.0, m - r), min(1.0, m + r)
+
+    def decision(self, target=0.5, margin=0.0):
+        """
+        'above' or 'below' once the interval excludes target, 'equivalent' once it lies
+        within target +/- margin, otherwise None.
+        """
+        low, high = self.interval()
+        if low > target:
+            return 'above'
+        if high < target:
+            return 'below'
+        if margin > 0 and low >= target - margin and high <= target + margin:
+            return 'equivalent'
+        return None
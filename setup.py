@@ -1,7 +1,9 @@
-import random
+import game_rng
 from battlefield import ControlPoint
 
-def setup_battlefield():
+def setup_battlefield(rng=None):
+    rng = game_rng.resolve(rng).deployment
+
     # Battlefield dimensions
     battlefield_width = 60
     battlefield_height = 40
@@ -12,13 +14,13 @@ def setup_battlefield():
     square_size = 10  # 10" per square
 
     # Random number of control points between 2 and 4
-    num_control_points = random.randint(2, 4)
+    num_control_points = rng.randint(2, 4)
 
     control_points = []
     # Control points go into squares between x=0..5 and y=1..2
     # That gives a 6x2 area in the middle rows of the board
     for _ in range(num_control_points):
-        x_square = random.randint(0, 5)  # horizontal squares from 0 to 5
+        x_square = rng.randint(0, 5)  # horizontal squares from 0 to 5
         y_square = 2 # random.randint(1, 2)  # vertical squares 1 to 2
 
         # Random coordinates within the chosen square
@@ -30,27 +32,28 @@ def setup_battlefield():
 
     return control_points, battlefield_width, battlefield_height
 
-def place_units_randomly(player_a, player_b):
+def place_units_randomly(player_a, player_b, rng=None):
     """
     Place units for two players randomly within specific 10"x10" cells.
     Player A's units are placed in the top row (y=0),
     and Player B's units are placed in the bottom row (y=3).
     Coordinates are rounded to ensure exact positions.
     """
+    rng = game_rng.resolve(rng).deployment
     square_size = 10
 
     # Helper function to calculate and round position
     def calculate_position(x_square, y_square):
-        x_pos = x_square * square_size + random.uniform(0, square_size)
-        y_pos = y_square * square_size + random.uniform(0, square_size)
+        x_pos = x_square * square_size + rng.uniform(0, square_size)
+        y_pos = y_square * square_size + rng.uniform(0, square_size)
         return (round(x_pos), round(y_pos))
 
     # Place Player A units along y=0 row
     for unit in player_a.units:
-        x_square = random.randint(0, 5)
+        x_square = rng.randint(0, 5)
         unit.position = calculate_position(x_square, 0)
 
     # Place Player B units along y=3 row
     for unit in player_b.units:
-        x_square = random.randint(0, 5)
+        x_square = rng.randint(0, 5)
         unit.position = calculate_position(x_square, 3)
\ No newline at end of file
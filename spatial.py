@@ -0,0 +1,161 @@
+from math import floor
+import util
+
+# Units within this distance of an enemy are engaged in melee
+ENGAGEMENT_RANGE = 1
+# Furthest an AI unit will try to charge (the best 2D6 roll)
+CHARGE_RANGE = 12
+# Grid cell size; control point radius, and a fraction of typical weapon ranges
+CELL_SIZE = 6
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the battlefield for unit proximity queries.
+
+    Units are bucketed by the grid cell their position falls in, and the index
+    follows them as they move: each indexed unit's position setter calls move().
+    Dead units stay indexed (Regenerate can bring them back) and are filtered
+    out at query time.
+
+    Query results are in army order (player_a's units, then player_b's, each in
+    player.units order), the same order as scanning the unit lists directly, so
+    ties and random choices come out exactly as before.
+    """
+
+    def __init__(self, player_a, player_b, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self._cell_of = {}
+        self._team = {}
+        self._rank = {}
+        # Bounding box of every cell ever occupied, to stop nearest() searches
+        self._bounds = None
+
+        for team, player in enumerate((player_a, player_b)):
+            for unit in player.units:
+                self._team[unit] = team
+                self._rank[unit] = len(self._rank)
+                unit.spatial_index = self
+                self._insert(unit)
+
+    def _cell(self, point):
+        return (floor(point[0] / self.cell_size), floor(point[1] / self.cell_size))
+
+    def _insert(self, unit):
+        if unit.position is None:
+            return
+        cell = self._cell(unit.position)
+        self.cells.setdefault(cell, []).append(unit)
+        self._cell_of[unit] = cell
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[1], cell[0], cell[1]]
+        else:
+            bounds = self._bounds
+            bounds[0] = min(bounds[0], cell[0])
+            bounds[1] = min(bounds[1], cell[1])
+            bounds[2] = max(bounds[2], cell[0])
+            bounds[3] = max(bounds[3], cell[1])
+
+    def _remove(self, unit):
+        cell = self._cell_of.pop(unit, None)
+        if cell is not None:
+            bucket = self.cells[cell]
+            bucket.remove(unit)
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, unit):
+        """Re-bucket a unit after its position changed."""
+        if unit not in self._team:
+            return
+        if unit.position is not None and self._cell_of.get(unit) == self._cell(unit.position):
+            return
+        self._remove(unit)
+        self._insert(unit)
+
+    def enemy_team(self, unit):
+        return 1 - self._team[unit]
+
+    def units_within(self, point, radius, team=None):
+        """Alive units (of one team, or both) within Manhattan distance radius of point."""
+        x_lo, y_lo = self._cell((point[0] - radius, point[1] - radius))
+        x_hi, y_hi = self._cell((point[0] + radius, point[1] + radius))
+
+        # Large radii cover mostly empty cells; scan the occupied ones instead
+        if (x_hi - x_lo + 1) * (y_hi - y_lo + 1) > len(self.cells):
+            buckets = [
+                bucket for (cx, cy), bucket in self.cells.items()
+                if x_lo <= cx <= x_hi and y_lo <= cy <= y_hi
+            ]
+        else:
+            cells = self.cells
+            buckets = [
+                cells[(cx, cy)]
+                for cx in range(x_lo, x_hi + 1) for cy in range(y_lo, y_hi + 1)
+                if (cx, cy) in cells
+            ]
+
+        found = [
+            u for bucket in buckets for u in bucket
+            if (team is None or self._team[u] == team)
+            and u.is_alive() and util.distance(point, u.position) <= radius
+        ]
+        found.sort(key=self._rank.__getitem__)
+        return found
+
+    def enemies_within(self, unit, radius):
+        return self.units_within(unit.position, radius, self.enemy_team(unit))
+
+    def allies_within(self, unit, radius):
+        return self.units_within(unit.position, radius, self._team[unit])
+
+    def is_engaged(self, unit):
+        """True if an alive enemy is within engagement range of the unit."""
+        return bool(self.enemies_within(unit, ENGAGEMENT_RANGE))
+
+    def nearest(self, point, team=None, where=None):
+        """
+        Closest alive unit to point (of one team, or both) passing the optional
+        where(unit) filter, or None. Ties go to the unit earliest in army order.
+        """
+        if self._bounds is None:
+            return None
+        cx, cy = self._cell(point)
+        x_lo, y_lo, x_hi, y_hi = self._bounds
+        max_ring = max(cx - x_lo, x_hi - cx, cy - y_lo, y_hi - cy)
+
+        best = None
+        best_key = None
+        ring = 0
+        while ring <= max_ring:
+            for cell in _ring_cells(cx, cy, ring):
+                for u in self.cells.get(cell, ()):
+                    if (team is not None and self._team[u] != team) or not u.is_alive():
+                        continue
+                    if where is not None and not where(u):
+                        continue
+                    key = (util.distance(point, u.position), self._rank[u])
+                    if best_key is None or key < best_key:
+                        best, best_key = u, key
+            # Anything in a further ring is more than ring * cell_size away
+            if best_key is not None and best_key[0] <= ring * self.cell_size:
+                break
+            ring += 1
+        return best
+
+    def nearest_enemy(self, unit, where=None):
+        return self.nearest(unit.position, self.enemy_team(unit), where)
+
+
+def _ring_cells(cx, cy, ring):
+    # Cells at Chebyshev distance ring from (cx, cy)
+    if ring == 0:
+        yield (cx, cy)
+        return
+    for dx in range(-ring, ring + 1):
+        yield (cx + dx, cy - ring)
+        yield (cx + dx, cy + ring)
+    for dy in range(-ring + 1, ring):
+        yield (cx - ring, cy + dy)
+        yield (cx + ring, cy + dy)
@@ -0,0 +1,85 @@
+import ai_mcts
+import ai_third_input
+import game_rng
+import main
+from game_state import GameState
+from main import build_unit_from_template, unit_templates
+from player import Player
+
+
+def template_unit(name):
+    return build_unit_from_template(name, unit_templates[name])
+
+
+def test_options_for_a_unit_locked_in_melee():
+    unit, enemy = template_unit("Basic Infantry"), template_unit("Mech")
+    unit.melee_target, enemy.melee_target = enemy, unit
+    player = Player("A", [unit])
+    assert ai_mcts.action_options(player, ()) == [0]
+    for prefix in ((0,), (0, None), (0, None, None)):
+        assert ai_mcts.action_options(player, prefix) == (None,)
+
+    unit.keywords.append('Disengage')
+    unit.compile_abilities()
+    assert ai_mcts.action_options(player, (0,)) == ai_mcts.MOVES
+
+
+def test_options_for_a_unit_that_can_regenerate():
+    unit = template_unit("Basic Infantry")
+    unit.keywords.append('Regenerate')
+    unit.compile_abilities()
+    player = Player("A", [unit])
+    # Nothing to bring back yet
+    assert ai_mcts.action_options(player, (0,)) == ai_mcts.MOVES
+
+    unit.models[0].current_wounds = 0
+    unit.check_casualties()
+    assert ai_mcts.action_options(player, (0,)) == ai_mcts.MOVES + (ai_mcts.REGENERATE,)
+    assert ai_mcts.action_options(player, (0, ai_mcts.REGENERATE)) == (None,)
+    assert ai_mcts.action_options(player, (0, ai_mcts.REGENERATE, None)) == (None,)
+    assert ai_mcts.action_options(player, (0, 'hold')) == ai_mcts.SHOTS
+    assert ai_mcts.action_options(player, (0, 'hold', None)) == ai_mcts.CHARGES
+
+
+def test_best_action_follows_the_most_visited_options():
+    player = Player("A", [template_unit("Basic Infantry"), template_unit("Mech")])
+    stats = {
+        (): [10, 5.0],
+        (0,): [3, 2.0], (1,): [7, 3.0],
+        (1, 'objective'): [2, 2.0], (1, 'enemy'): [5, 1.0],
+        (1, 'enemy', 'nearest'): [1, 1.0], (1, 'enemy', None): [4, 0.0],
+        (1, 'enemy', None, True): [1, 0.0], (1, 'enemy', None, False): [3, 0.0],
+    }
+    assert ai_mcts.best_action(stats, player) == (1, 'enemy', None, False)
+
+
+def test_search_visits_the_root_once_per_rollout():
+    captured = {}
+
+    def controller(active, opposing, battlefield, active_a, turn, rng=None, index=None):
+        if not captured:
+            captured['state'] = GameState.of_turn(active, capture_rng=False)
+            captured['active_is_a'] = active is captured['state'].player_a
+        return ai_third_input.ai_activate_unit(active, opposing, battlefield, active_a, turn, rng, index)
+
+    main.play_one_game(22, game_rng.GameRNG.for_game(5, 0), controllers=(controller, controller))
+    stats = ai_mcts.search(captured['state'], captured['active_is_a'], seed=1, rollouts=25)
+    assert stats[()][0] == 25
+    first_choices = [prefix for prefix in stats if len(prefix) == 1]
+    assert sum(stats[prefix][0] for prefix in first_choices) == 25
+    assert all(0 <= value <= visits for visits, value in stats.values())
+
+
+def test_ai_activate_unit_activates_a_unit_in_game():
+    activated = []
+
+    def controller(active, opposing, battlefield, active_a, turn, rng=None, index=None):
+        unit = ai_mcts.ai_activate_unit(active, opposing, battlefield, active_a, turn, rng, index,
+                                        budget_ms=None, rollouts=5)
+        if unit is not None:
+            assert unit in active.units and unit.has_activated
+            activated.append(unit)
+        return unit
+
+    main.play_one_game(12, game_rng.GameRNG.for_game(5, 1), controllers=(controller, None))
+    assert activated
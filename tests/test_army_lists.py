@@ -0,0 +1,70 @@
+import itertools
+import random
+from collections import Counter
+import pytest
+import main
+from army_lists import ArmyLists, alias_table
+
+
+def alias_probabilities(prob, alias):
+    """Exact chance of each index under the alias method's draw."""
+    n = len(prob)
+    chances = [p / n for p in prob]
+    for i, p in enumerate(prob):
+        chances[alias[i]] += (1 - p) / n
+    return chances
+
+
+def rejection_sample(templates, target, tolerance, size, rng):
+    # The draw-and-retry generator ArmyLists replaced
+    names = list(templates)
+    while True:
+        army = [rng.choice(names) for _ in range(size)]
+        if abs(sum(templates[name]["ap_cost"] for name in army) - target) < tolerance:
+            return army
+
+
+def test_alias_table_is_exact():
+    rng = random.Random(6)
+    for n in (1, 2, 7, 50):
+        weights = [rng.choice([0, rng.random(), rng.randint(1, 100)]) for _ in range(n)]
+        weights[0] += 1
+        total = sum(weights)
+        chances = alias_probabilities(*alias_table(weights))
+        assert chances == pytest.approx([w / total for w in weights], abs=1e-12)
+
+
+def test_army_distribution_matches_rejection_sampling():
+    # Every ordered list the old generator could accept is equally likely, so an army's
+    # chance is its share of the accepted orderings
+    templates = main.unit_templates
+    accepted = Counter(
+        tuple(sorted(army)) for army in itertools.product(templates, repeat=5)
+        if abs(sum(templates[name]["ap_cost"] for name in army) - 22) < 10
+    )
+    total = sum(accepted.values())
+    lists = ArmyLists(templates, 22, tolerance=10, sizes=(5,))
+    assert set(lists.armies) == set(accepted)
+    chances = alias_probabilities(lists._prob, lists._alias)
+    for army, chance in zip(lists.armies, chances):
+        assert chance == pytest.approx(accepted[army] / total, abs=1e-12)
+
+
+def test_sampled_lists_match_rejection_sampling():
+    templates = {"A": {"ap_cost": 1}, "B": {"ap_cost": 2}, "C": {"ap_cost": 4}}
+    draws = 30_000
+    lists = ArmyLists(templates, 8, tolerance=2, sizes=(3,))
+    rng = random.Random(7)
+    sampled = Counter(tuple(lists.sample(rng)) for _ in range(draws))
+    rejected = Counter(tuple(rejection_sample(templates, 8, 2, 3, rng)) for _ in range(draws))
+    assert sampled.keys() == rejected.keys()
+    for army in rejected:
+        p = rejected[army] / draws
+        assert abs(sampled[army] / draws - p) < 5 * (2 * p * (1 - p) / draws) ** 0.5
+
+
+def test_impossible_budget():
+    lists = ArmyLists(main.unit_templates, 1000, tolerance=10, sizes=(5,))
+    assert len(lists) == 0
+    with pytest.raises(ValueError):
+        lists.sample()
@@ -0,0 +1,16 @@
+import pytest
+import main
+
+
+def report_fields(report):
+    return report.games, report.results, report.melee_kills, report.missile_kills, report.margin_counts
+
+
+@pytest.mark.parametrize("backend, chunk_size", [("objects", None), ("lockstep", None), ("lockstep", 15)])
+def test_report_does_not_depend_on_worker_count(backend, chunk_size):
+    reports = [
+        report_fields(main.run_batch(22, 40, workers=workers, chunk_size=chunk_size, seed=5, backend=backend))
+        for workers in (1, 2, 3)
+    ]
+    assert reports[0][0] == 40
+    assert reports[0] == reports[1] == reports[2]
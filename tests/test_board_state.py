@@ -0,0 +1,35 @@
+import pytest
+import game_rng
+import main
+from board_state import get_board_state, get_board_visualization
+from events import bus, TurnStartEvent
+
+GAMES = 300
+
+
+class BoardCheck:
+    """Compares the incremental board with a from-scratch one at every turn start."""
+
+    def __init__(self):
+        self.turns = 0
+
+    def handle(self, event):
+        if not isinstance(event, TurnStartEvent):
+            return
+        expected = get_board_state(event.player_a, event.player_b, event.battlefield, event.turn, event.active_player)
+        assert event.board.state(event.turn, event.active_player) == expected
+        assert event.board.visualization() == get_board_visualization(
+            event.player_a, event.player_b, event.battlefield, expected,
+        )
+        self.turns += 1
+
+
+@pytest.mark.parametrize("backend", ["objects", "arrays"])
+def test_incremental_board_matches_a_full_rebuild(backend):
+    check = bus.subscribe(BoardCheck())
+    try:
+        for game_index in range(GAMES):
+            main.play_one_game(22, game_rng.GameRNG.for_game(11, game_index), backend=backend)
+    finally:
+        bus.unsubscribe(check)
+    assert check.turns == 4 * GAMES
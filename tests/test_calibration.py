@@ -0,0 +1,70 @@
+from math import comb
+import numpy as np
+import pytest
+import calibration
+
+
+@pytest.mark.parametrize("successes, trials, low, high", [
+    (50, 100, 0.4038, 0.5962),
+    (3, 10, 0.1078, 0.6032),
+    (0, 10, 0.0, 0.2775),
+    (10, 10, 0.7225, 1.0),
+])
+def test_wilson_interval_known_values(successes, trials, low, high):
+    assert calibration.wilson_interval(successes, trials) == pytest.approx((low, high), abs=1e-4)
+
+
+def test_wilson_interval_without_games():
+    assert calibration.wilson_interval(0, 0) == (0.0, 1.0)
+
+
+@pytest.mark.parametrize("p", [0.1, 0.3, 0.5, 0.8])
+@pytest.mark.parametrize("trials", [20, 100])
+def test_wilson_interval_coverage(p, trials):
+    # Exact coverage over the binomial outcomes; Wilson stays close to the nominal 95%
+    coverage = 0.0
+    for k in range(trials + 1):
+        low, high = calibration.wilson_interval(k, trials)
+        if low <= p <= high:
+            coverage += comb(trials, k) * p ** k * (1 - p) ** (trials - k)
+    assert 0.92 <= coverage <= 0.99
+
+
+def test_template_win_rates():
+    # Three games (the last standing for two), two sides, three templates
+    counts = np.array([
+        [[1, 0, 0], [0, 2, 0]],
+        [[1, 1, 0], [0, 0, 1]],
+        [[0, 0, 0], [2, 0, 1]],
+    ])
+    points = np.array([[1.0, 0.0], [0.5, 0.5], [0.0, 2.0]])
+    games = np.array([1, 1, 2])
+    rates, template_points, template_games = calibration.template_win_rates(counts, points, games)
+    np.testing.assert_allclose(template_games, [4, 2, 3])
+    np.testing.assert_allclose(template_points, [3.5, 0.5, 2.5])
+    np.testing.assert_allclose(rates, [3.5 / 4, 0.25, 2.5 / 3])
+
+
+def test_template_win_rates_unplayed_template_is_even():
+    counts = np.array([[[1, 0], [1, 0]]])
+    rates, _, template_games = calibration.template_win_rates(counts, np.array([[1.0, 0.0]]), np.array([1]))
+    assert template_games[1] == 0 and rates[1] == 0.5
+
+
+@pytest.mark.parametrize("ap, budget", [
+    ([1, 2, 3, 4], 20),
+    ([0.1, 5, 5, 10], 12),
+    ([-3, 0.2, 8, 9, 10], 10),
+    ([0.01, 0.01, 100], 5),
+])
+def test_rescale_costs_keeps_budget_and_floor(ap, budget):
+    scaled = calibration.rescale_costs(ap, budget)
+    assert scaled.sum() == pytest.approx(budget)
+    assert (scaled >= calibration.MIN_AP - 1e-12).all()
+
+
+def test_rescale_costs_keeps_ratios_above_the_floor():
+    scaled = calibration.rescale_costs([0.1, 2, 4, 6], 12.5)
+    assert scaled[0] == calibration.MIN_AP
+    np.testing.assert_allclose(scaled[1:] / scaled[1], [1, 2, 3])
+    np.testing.assert_allclose(calibration.rescale_costs([1, 2, 3], 12), [2, 4, 6])
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+import game_rng
+from casualties import casualty_distribution
+from pool_stats import pool_distribution
+from unit import Unit
+
+
+def make_unit(models, wounds, armor='Unarmored', missile=(), melee=(), keywords=()):
+    return Unit('Test', models, wounds, armor, 6, 1, list(missile), list(melee), 12, keywords=list(keywords))
+
+
+def brute_force_outcomes(attacker, defender, phase):
+    """
+    (models killed, wounds remaining) -> probability, following Unit.defend wound by wound:
+    shields drop wounds from the end of the mortal-first queue, every save is rolled
+    separately and each failed wound does 1 damage to the first model left in targeting order.
+    """
+    rolled = pool_distribution(attacker.get_attack_dice(phase), attacker.abilities.slayer).pmf
+    armor_save = defender.get_modified_armor_save(attacker.get_armor_save_modifier(phase), phase, attacker)
+    fail = (armor_save - 1) / 6
+    wounds = [m.current_wounds for m in defender.models if m.is_alive()]
+    if attacker.abilities.assassin:
+        wounds.reverse()
+
+    outcomes = {}
+    for normal, mortal in zip(*np.nonzero(rolled)):
+        queue = (['mortal'] * mortal + ['normal'] * normal)[:max(0, normal + mortal - defender.shields_remaining)]
+        # Distribution over the models' remaining wounds, in targeting order
+        states = {tuple(wounds): float(rolled[normal, mortal])}
+        for wound in queue:
+            fail_chance = 1.0 if wound == 'mortal' and not defender.abilities.lucky else fail
+            step = {}
+            for state, p in states.items():
+                step[state] = step.get(state, 0.0) + p * (1 - fail_chance)
+                hit = list(state)
+                for i, left in enumerate(hit):
+                    if left:
+                        hit[i] -= 1
+                        break
+                step[tuple(hit)] = step.get(tuple(hit), 0.0) + p * fail_chance
+            states = step
+        for state, p in states.items():
+            key = (sum(1 for left in state if left == 0), sum(state))
+            outcomes[key] = outcomes.get(key, 0.0) + p
+    return outcomes
+
+
+def wounded(unit, *current_wounds):
+    for model, left in zip(unit.models, current_wounds):
+        model.current_wounds = left
+    unit.check_casualties()
+    return unit
+
+
+CASES = {
+    'plain': (make_unit(3, 1, missile=['Green'] * 3), make_unit(4, 1, 'Light Armor'), 'missile'),
+    'multi-wound': (make_unit(2, 1, melee=['Black', 'Purple']), make_unit(3, 2, 'Medium Armor'), 'melee'),
+    'slayer': (make_unit(2, 1, melee=['Silver', 'Gold'], keywords=['Slayer']), make_unit(4, 2), 'melee'),
+    'shields': (make_unit(3, 1, missile=['Blue'] * 3), make_unit(3, 2, keywords=['Shields 2']), 'missile'),
+    'lucky': (make_unit(2, 1, melee=['Gunmetal', 'Black']), make_unit(3, 1, 'Heavy Armor', keywords=['Lucky']), 'melee'),
+    'assassin': (
+        make_unit(2, 1, melee=['Black', 'Purple'], keywords=['Assassin']),
+        wounded(make_unit(3, 3, 'Light Armor'), 1, 3, 3), 'melee',
+    ),
+    'modifiers': (
+        make_unit(2, 1, missile=['Blue', 'Blue'], keywords=['Withering Fire', 'Sharpshooter']),
+        make_unit(3, 1, 'Medium Armor', keywords=['Camouflage']), 'missile',
+    ),
+}
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_matches_wound_by_wound_enumeration(case):
+    attacker, defender, phase = CASES[case]
+    actual = casualty_distribution(attacker, defender, phase).outcomes
+    expected = brute_force_outcomes(attacker, defender, phase)
+    for key in expected.keys() | actual.keys():
+        assert actual.get(key, 0.0) == pytest.approx(expected.get(key, 0.0), abs=1e-9)
+
+
+@pytest.mark.parametrize("case", ['slayer', 'shields', 'lucky', 'assassin'])
+def test_matches_simulated_attacks(case):
+    attacker, defender, phase = CASES[case]
+    distribution = casualty_distribution(attacker, defender, phase)
+    trials = 20_000
+    killed = np.zeros(len(distribution.killed_pmf))
+    rng = game_rng.GameRNG(4)
+    for _ in range(trials):
+        target = defender.clone()
+        for model, original in zip(target.models, defender.models):
+            model.current_wounds = original.current_wounds
+        target.check_casualties()
+        target.save_mode = 'sequential'
+        before = target.num_models
+        attacker.attack(target, phase, rng=rng)
+        killed[before - target.num_models] += 1
+    observed = killed / trials
+    for p, q in zip(distribution.killed_pmf, observed):
+        assert abs(p - q) < 5 * np.sqrt(p * (1 - p) / trials) + 1e-3
@@ -0,0 +1,66 @@
+import random
+import numpy as np
+import pytest
+from dice import DICE_TYPES, DIE_FACES, roll_pool
+
+
+def exact_pool_pmf(pool):
+    """(normal, mortal) -> probability, by enumerating every face of every die."""
+    pmf = {(0, 0): 1.0}
+    for dice_type in pool:
+        step = {}
+        for (normal, mortal), p in pmf.items():
+            for face_normal, face_mortal in DIE_FACES[dice_type]:
+                key = (normal + face_normal, mortal + face_mortal)
+                step[key] = step.get(key, 0.0) + p / 6
+        pmf = step
+    return pmf
+
+
+def scalar_slayer_roll(pool, rng):
+    # The re-roll loop of Unit.roll_attack_dice
+    normal = mortal = 0
+    for dice_type in pool:
+        while True:
+            face_normal, face_mortal = rng.choice(DIE_FACES[dice_type])
+            normal += face_normal
+            mortal += face_mortal
+            if not face_mortal:
+                break
+    return normal, mortal
+
+
+def test_face_tables_match_dice_types():
+    for dice_type, stats in DICE_TYPES.items():
+        faces = DIE_FACES[dice_type]
+        assert len(faces) == 6
+        assert faces.count((1, 0)) == stats['normal_wounds']
+        assert faces.count((2, 0)) == stats['double_wounds']
+        assert faces.count((0, 1)) == stats['mortal_wounds']
+        assert faces.count((0, 2)) == stats['double_mortal_wounds']
+
+
+@pytest.mark.parametrize("pool", [['Green'], ['Black', 'Green'], ['Gold', 'Purple', 'White']])
+def test_roll_pool_matches_face_enumeration(pool):
+    trials = 100_000
+    rolls = roll_pool(pool, np.random.default_rng(1), trials)
+    assert not rolls['double'].any()
+    for (normal, mortal), p in exact_pool_pmf(pool).items():
+        observed = np.count_nonzero((rolls['normal'] == normal) & (rolls['mortal'] == mortal)) / trials
+        assert abs(observed - p) < 5 * np.sqrt(p * (1 - p) / trials) + 1e-9
+
+
+@pytest.mark.parametrize("pool", [['Silver'], ['Gunmetal', 'Black'], ['Gold', 'Green']])
+def test_slayer_roll_pool_matches_reroll_loop(pool):
+    trials = 60_000
+    rolls = roll_pool(pool, np.random.default_rng(2), trials, slayer=True)
+    rng = random.Random(3)
+    loop = np.array([scalar_slayer_roll(pool, rng) for _ in range(trials)])
+    for kind, column in (('normal', 0), ('mortal', 1)):
+        a, b = rolls[kind], loop[:, column]
+        assert abs(a.mean() - b.mean()) < 5 * np.sqrt((a.var() + b.var()) / trials)
+    # Tail of the exploding mortal count
+    for k in (1, 3, 5):
+        p_vectorised = np.mean(rolls['mortal'] >= k)
+        p_loop = np.mean(loop[:, 1] >= k)
+        assert abs(p_vectorised - p_loop) < 5 * np.sqrt(2 * max(p_loop, 1e-4) / trials)
@@ -0,0 +1,109 @@
+import pytest
+import ai_third_input
+import fight
+import matchups
+from casualties import casualty_distribution
+from main import build_unit_from_template, unit_templates
+from player import Player
+from unit import Unit
+
+NAMES = ("Basic Infantry", "Super-Heavy Infantry", "Mech")
+TEMPLATES = {name: unit_templates[name] for name in NAMES}
+
+
+@pytest.fixture(autouse=True)
+def table(monkeypatch):
+    # A table for a few templates, so no test reads or writes the on-disk cache
+    table = matchups.build_matchup_table(TEMPLATES)
+    monkeypatch.setattr(fight, '_table', table)
+    return table
+
+
+def unit(name, models=None):
+    built = build_unit_from_template(name, TEMPLATES[name])
+    return built if models is None else matchups._at_strength(built, models)
+
+
+def keyword_unit(keywords, models=5, wounds=1, ap_cost=2, missile='Green', melee='Blue'):
+    return Unit('Keyword Unit', models, wounds, 'Light Armor', 6, ap_cost, [missile] * models,
+                [melee] * models, 12, keywords=list(keywords))
+
+
+@pytest.mark.parametrize("attacker_name", NAMES)
+@pytest.mark.parametrize("defender_name", NAMES)
+@pytest.mark.parametrize("phase, charging", [('missile', False), ('melee', False), ('melee', True)])
+def test_table_matches_casualty_distribution(attacker_name, defender_name, phase, charging):
+    for a_models in sorted({1, TEMPLATES[attacker_name]["num_models"]}):
+        for d_models in sorted({1, TEMPLATES[defender_name]["num_models"]}):
+            attacker, defender = unit(attacker_name, a_models), unit(defender_name, d_models)
+            exact = casualty_distribution(attacker, defender, phase, charging).expected_killed()
+            assert fight.expected_casualties(attacker, defender, phase, charging) == pytest.approx(exact)
+
+
+def test_table_interpolates_fractional_strength():
+    attacker, defender = unit("Basic Infantry"), unit("Super-Heavy Infantry")
+    low = fight.expected_casualties(attacker, defender, 'melee', attacker_models=2)
+    high = fight.expected_casualties(attacker, defender, 'melee', attacker_models=3)
+    assert fight.expected_casualties(attacker, defender, 'melee', attacker_models=2.5) == pytest.approx((low + high) / 2)
+
+
+def test_keyword_units_fall_back_to_casualty_distribution():
+    attacker, defender = keyword_unit(['Slayer']), unit("Basic Infantry")
+    exact = casualty_distribution(attacker, defender, 'melee').expected_killed()
+    assert fight.expected_casualties(attacker, defender, 'melee') == pytest.approx(exact)
+    # Reduced strength scales the full-strength result
+    assert fight.expected_casualties(attacker, defender, 'melee', attacker_models=2) == pytest.approx(exact * 2 / 5)
+    # Capped at the models the defender has left
+    assert fight.expected_casualties(attacker, defender, 'melee', defender_models=0.5) <= 0.5
+
+
+def test_dead_units_deal_and_take_nothing():
+    attacker, defender = unit("Mech"), unit("Basic Infantry")
+    assert fight.expected_casualties(attacker, defender, 'melee', attacker_models=0) == 0.0
+    assert fight.expected_casualties(attacker, defender, 'melee', defender_models=0) == 0.0
+
+
+def test_clear_matchups():
+    basic, super_heavy, mech = unit("Basic Infantry"), unit("Super-Heavy Infantry"), unit("Mech")
+    assert fight.melee_favorable(super_heavy, basic)
+    assert fight.melee_favorable(mech, basic)
+    assert not fight.melee_favorable(basic, super_heavy)
+    assert not fight.melee_favorable(basic, mech)
+
+
+def test_charger_wiped_by_overwatch_is_not_favorable():
+    attacker = unit("Super-Heavy Infantry")
+    defender = unit("Basic Infantry")
+    assert fight.melee_favorable(attacker, defender, overwatch=False)
+    assert not fight.melee_favorable(attacker, defender, overwatch=False, attacker_models=0)
+    for model in attacker.models:
+        model.current_wounds = 0
+    attacker.check_casualties()
+    assert not fight.melee_favorable(attacker, defender, overwatch=False)
+
+
+def test_overwatch_fire_counts_against_the_charge():
+    # Wins the melee outright, but loses more to the defender's fire on the way in
+    attacker = keyword_unit([], melee='Purple')
+    defender = keyword_unit(['Overwatch'], missile='Black', melee='White')
+    with_fire = fight.melee_favorable(attacker, defender)
+    without_fire = fight.melee_favorable(attacker, defender, overwatch=False)
+    assert without_fire and not with_fire
+
+
+def test_try_charge_skips_a_charger_wiped_by_overwatch(monkeypatch):
+    charger = unit("Super-Heavy Infantry")
+    target = keyword_unit(['Overwatch'])
+    charger.position, target.position = (0, 0), (2, 0)
+    active, opposing = Player("A", [charger]), Player("B", [target])
+
+    def wipe_out(target_unit, phase, charging=False, rng=None):
+        for model in target_unit.models:
+            model.current_wounds = 0
+        target_unit.check_casualties()
+
+    monkeypatch.setattr(target, 'attack', wipe_out)
+    monkeypatch.setattr(ai_third_input, 'roll_2d6', lambda rng=None: 12)
+    ai_third_input.try_charge(charger, active, opposing)
+    assert not charger.is_alive()
+    assert charger.melee_target is None and target.melee_target is None
@@ -0,0 +1,74 @@
+import pytest
+import ai_third_input
+import game
+import game_rng
+import main
+from game_state import GameState
+
+
+def end_state(player_a, player_b):
+    return (
+        player_a.score, player_b.score, player_a.melee_kills, player_b.melee_kills,
+        player_a.missile_kills, player_b.missile_kills,
+        [(u.num_models, u.position, u.shields_remaining) for u in player_a.units + player_b.units],
+    )
+
+
+def play_with_snapshot(game_index, decision, take):
+    """Play a seeded game, calling take(active_player) inside the controller at its `decision`-th call."""
+    snapshots = []
+    calls = [0]
+
+    def controller(active_player, opposing_player, battlefield, active_a, turn_number, rng=None, index=None):
+        calls[0] += 1
+        if calls[0] == decision:
+            snapshots.append(take(active_player))
+        return ai_third_input.ai_activate_unit(
+            active_player, opposing_player, battlefield, active_a, turn_number, rng, index,
+        )
+
+    rng = game_rng.GameRNG.for_game(7, game_index)
+    player1, player2 = main.play_one_game(22, rng, controllers=(controller, controller))
+    return player1, player2, snapshots
+
+
+@pytest.mark.parametrize("game_index", range(6))
+@pytest.mark.parametrize("decision", [1, 5, 9, 14])
+def test_fork_taken_mid_decision_replays_the_game(game_index, decision):
+    player1, player2, forks = play_with_snapshot(game_index, decision, lambda p: GameState.of_turn(p).fork())
+    if not forks:
+        pytest.skip("the game ended before that decision")
+    player_a, player_b, battlefield, rng, loop = forks[0]
+    game.play_game(player_a, player_b, battlefield, rng, loop)
+    assert end_state(player_a, player_b) == end_state(player1, player2)
+
+
+@pytest.mark.parametrize("game_index", range(4))
+def test_restore_replays_the_game(game_index):
+    player1, player2, states = play_with_snapshot(game_index, 6, GameState.of_turn)
+    if not states:
+        pytest.skip("the game ended before that decision")
+    state = states[0]
+    finished = end_state(player1, player2)
+
+    state.restore()
+    restored = GameState(state.player_a, state.player_b, state.battlefield, state.rng, state.loop)
+    assert restored.unit_rows == state.unit_rows
+    assert restored.player_rows == state.player_rows
+    assert restored.loop_row == state.loop_row
+    assert restored.rng_states == state.rng_states
+
+    game.play_game(state.player_a, state.player_b, state.battlefield, state.rng, state.loop)
+    assert end_state(player1, player2) == finished
+
+
+def test_fork_does_not_touch_the_original():
+    player1, player2, forks = play_with_snapshot(0, 3, lambda p: (GameState.of_turn(p), GameState.of_turn(p).fork()))
+    state, (player_a, player_b, battlefield, rng, loop) = forks[0]
+    state.restore()
+    before = GameState(state.player_a, state.player_b, state.battlefield, state.rng, state.loop)
+    game.play_game(player_a, player_b, battlefield, rng, loop)
+    after = GameState(state.player_a, state.player_b, state.battlefield, state.rng, state.loop)
+    assert after.unit_rows == before.unit_rows
+    assert after.player_rows == before.player_rows
+    assert after.rng_states == before.rng_states
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+import genetic
+
+RUN = dict(population_size=4, seed=3, workers=1, peers=1, games_per_opponent=1, total_value=12)
+
+
+def test_resumed_run_matches_an_uninterrupted_one(tmp_path):
+    full = genetic.genetic_algorithm(generations=3, **RUN)
+
+    checkpoint = str(tmp_path / "run.npz")
+    genetic.genetic_algorithm(generations=2, checkpoint=checkpoint, **RUN)
+    _, generation, _, cache, _ = genetic.load_checkpoint(checkpoint)
+    assert generation == 2 and len(cache) > 0
+    resumed = genetic.genetic_algorithm(generations=3, checkpoint=checkpoint, resume=True, **RUN)
+
+    np.testing.assert_array_equal(resumed.genes, full.genes)
+    np.testing.assert_array_equal(resumed.fitness, full.fitness)
+
+
+def test_cache_survives_a_checkpoint(tmp_path):
+    population = genetic.Population.random(3, np.random.default_rng(0))
+    cache = genetic.FitnessCache()
+    genetic.evaluate_population(population, [genetic.Strategy(1, 1, 1, 1)], games_per_opponent=2,
+                                total_value=12, cache=cache)
+    path = str(tmp_path / "run.npz")
+    genetic.save_checkpoint(path, population, 1, np.random.default_rng(0), cache, {})
+    _, _, _, loaded, _ = genetic.load_checkpoint(path)
+    assert loaded.points == cache.points
+    assert loaded.totals == cache.totals
+
+
+def test_elites_are_scored_from_the_cache():
+    rng = np.random.default_rng(1)
+    population = genetic.Population.random(4, rng)
+    opponents = [genetic.Strategy(1, 1, 1, 1)]
+    cache = genetic.FitnessCache()
+    genetic.evaluate_population(population, opponents, total_value=12, cache=cache,
+                                scenarios=genetic.generation_scenarios(0, 2))
+    played = cache.misses
+
+    children = population.next_generation(rng, elite=2)
+    fitness = genetic.evaluate_population(children, opponents, total_value=12, cache=cache,
+                                          scenarios=genetic.generation_scenarios(1, 2))
+    # Only the two new rows play; the elites keep the fitness they had
+    assert cache.misses == played + 2 * 2
+    assert cache.hits == 2 * 2
+    np.testing.assert_array_equal(fitness[:2], population.fitness[population.ranking()[:2]])
+
+
+def evaluated_population(size=12, seed=0):
+    rng = np.random.default_rng(seed)
+    population = genetic.Population.random(size, rng)
+    population.fitness = rng.random(size)
+    return population, rng
+
+
+@pytest.mark.parametrize("selection", ["truncation", "tournament"])
+def test_next_generation_rows_stay_normalized(selection):
+    population, rng = evaluated_population()
+    for _ in range(5):
+        population = population.next_generation(rng, selection=selection, elite=2, mutation_rate=0.3)
+        population.fitness = rng.random(len(population))
+        np.testing.assert_allclose(population.genes.sum(axis=1), 1.0)
+        assert population.genes.shape == (12, len(genetic.GENES))
+
+
+def test_next_generation_copies_elites_unchanged():
+    population, rng = evaluated_population()
+    children = population.next_generation(rng, elite=3, mutation_rate=0.3)
+    np.testing.assert_array_equal(children.genes[:3], population.genes[population.ranking()[:3]])
+    assert np.isnan(children.fitness).all()
+
+
+def test_next_generation_size_and_extra_genes():
+    rng = np.random.default_rng(0)
+    gene_names = genetic.GENES + ('retreat_preference',)
+    population = genetic.Population.random(6, rng, gene_names)
+    population.fitness = np.arange(6.0)
+    children = population.next_generation(rng, size=10, elite=1)
+    assert children.genes.shape == (10, 5) and children.gene_names == gene_names
+    assert children.strategy(0).retreat_preference == population.genes[5, 4]
+
+
+def test_selection():
+    population, rng = evaluated_population()
+    parents = population.select_parents()
+    assert list(parents) == list(np.argsort(-population.fitness)[:6])
+    # Tournaments this large all include, and pick, the fittest row
+    winners = population.tournament(20, rng, size=200)
+    assert (winners == np.argmax(population.fitness)).all()
+    with pytest.raises(ValueError):
+        population.next_generation(rng, selection='roulette')
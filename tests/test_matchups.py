@@ -0,0 +1,72 @@
+import copy
+import os
+import numpy as np
+import pytest
+import matchups
+from main import unit_templates
+
+TEMPLATES = {name: unit_templates[name] for name in ("Basic Infantry", "Mech")}
+
+
+@pytest.fixture(autouse=True)
+def fresh_memory(monkeypatch):
+    monkeypatch.setattr(matchups, '_loaded', {})
+    monkeypatch.delenv('MATCHUP_CACHE_DIR', raising=False)
+
+
+def assert_same(table, other):
+    assert table.names == other.names
+    for field in ('expected', 'wipe', 'variance'):
+        np.testing.assert_array_equal(getattr(table, field), getattr(other, field))
+
+
+def test_save_load_round_trip(tmp_path):
+    table = matchups.build_matchup_table(TEMPLATES)
+    path = tmp_path / "table.npz"
+    table.save(str(path))
+    assert_same(matchups.MatchupTable.load(str(path)), table)
+    assert os.listdir(tmp_path) == ["table.npz"]
+
+
+def test_load_reuses_the_cache_file(tmp_path, monkeypatch):
+    table = matchups.load_matchup_table(TEMPLATES, cache_dir=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 1
+
+    def no_build(*args):
+        raise AssertionError("table rebuilt despite the cache file")
+
+    monkeypatch.setattr(matchups, '_loaded', {})
+    monkeypatch.setattr(matchups, 'build_matchup_table', no_build)
+    assert_same(matchups.load_matchup_table(TEMPLATES, cache_dir=str(tmp_path)), table)
+
+
+def test_cache_dir_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv('MATCHUP_CACHE_DIR', str(tmp_path / "cache"))
+    matchups.load_matchup_table(TEMPLATES)
+    assert len(os.listdir(tmp_path / "cache")) == 1
+
+
+def test_unwritable_cache_dir_keeps_the_table_in_memory(tmp_path):
+    # A regular file where the directory should be: makedirs fails even for root
+    blocked = tmp_path / "blocked"
+    blocked.write_text("")
+    table = matchups.load_matchup_table(TEMPLATES, cache_dir=str(blocked / "cache"))
+    assert_same(table, matchups.build_matchup_table(TEMPLATES))
+    assert matchups.load_matchup_table(TEMPLATES, cache_dir=str(blocked / "cache")) is table
+
+
+@pytest.mark.parametrize("field, value", [("ap_cost", 99), ("movement", 1), ("range", 48)])
+def test_hash_ignores_non_combat_fields(field, value):
+    edited = copy.deepcopy(TEMPLATES)
+    edited["Mech"][field] = value
+    assert matchups.templates_hash(edited) == matchups.templates_hash(TEMPLATES)
+
+
+@pytest.mark.parametrize("field, value", [
+    ("num_models", 2), ("armor_save", 3), ("wounds", 5), ("melee_dice", ["Black"]), ("ranged_dice", []),
+    ("keywords", ["Slayer"]),
+])
+def test_hash_covers_combat_fields(field, value):
+    edited = copy.deepcopy(TEMPLATES)
+    edited["Mech"][field] = value
+    assert matchups.templates_hash(edited) != matchups.templates_hash(TEMPLATES)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import optimizers
+
+TARGET = 0.95
+BUDGET = 2000
+
+
+def test_to_genes():
+    genes = optimizers.to_genes([[1, 3, -2, 0], [-1, -1, 0, 0]])
+    np.testing.assert_allclose(genes, [[0.25, 0.75, 0, 0], [0.25, 0.25, 0.25, 0.25]])
+
+
+@pytest.mark.parametrize("name", sorted(optimizers.OPTIMIZERS))
+@pytest.mark.parametrize("seed", range(3))
+def test_optimizers_reach_the_target(name, seed):
+    objective = optimizers.NoisyObjective(optimizers.SyntheticObjective(seed=seed))
+    history = optimizers.optimize(optimizers.OPTIMIZERS[name](seed), objective, BUDGET, reevaluate=2, target=TARGET)
+    samples = optimizers.samples_to_target(history, TARGET)
+    assert samples is not None and samples <= BUDGET
+
+
+def test_cma_es_converges_without_noise():
+    objective = optimizers.SyntheticObjective(noise=0.0, seed=4)
+    cma = optimizers.CMAES(np.full(4, 0.25), sigma=0.15, rng=0)
+    for _ in range(60):
+        x = cma.ask()
+        cma.tell(x, objective(optimizers.to_genes(x), 0))
+    assert np.linalg.norm(optimizers.to_genes(cma.mean)[0] - objective.optimum) < 0.02
+
+
+def noisy_mean(noise=1.0):
+    # Sample r of a genome is its first gene plus noise fixed by r alone
+    return lambda genes, replicate: genes[:, 0] + noise * np.random.default_rng(replicate).standard_normal()
+
+
+def test_noisy_objective_averages_replicates():
+    objective = optimizers.NoisyObjective(noisy_mean())
+    x = np.array([[1.0, 1.0], [3.0, 1.0]])
+    noise = [np.random.default_rng(r).standard_normal() for r in range(3)]
+    np.testing.assert_allclose(objective.evaluate(x, repeats=3), [0.5, 0.75] + np.mean(noise))
+    assert objective.samples == 6
+
+    # Already sampled three times: nothing new to play
+    objective.evaluate(x, repeats=2)
+    assert objective.samples == 6
+    objective.resample(x[:1])
+    assert objective.samples == 7
+    np.testing.assert_allclose(objective.mean(x[:1]), 0.5 + np.mean(noise + [np.random.default_rng(3).standard_normal()]))
+
+
+def test_noisy_objective_merges_equivalent_genomes():
+    objective = optimizers.NoisyObjective(noisy_mean(0.0))
+    # Scaled copies normalize to the same Strategy weights
+    objective.evaluate(np.array([[1.0, 3.0], [2.0, 6.0], [0.5, 1.5]]))
+    assert objective.samples == 1
+
+
+def test_leaders_need_enough_samples():
+    objective = optimizers.NoisyObjective(noisy_mean(0.0))
+    objective.evaluate(np.array([[0.9, 0.1]]))
+    objective.evaluate(np.array([[0.6, 0.4]]), repeats=3)
+    assert objective.leaders(1)[0][1] == pytest.approx(0.9)
+    genes, mean, count = objective.leaders(1, min_samples=3)[0]
+    np.testing.assert_allclose(genes, [0.6, 0.4])
+    assert mean == pytest.approx(0.6) and count == 3
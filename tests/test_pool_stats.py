@@ -0,0 +1,73 @@
+import itertools
+import numpy as np
+import pytest
+from dice import DIE_FACES
+from pool_stats import SLAYER_TAIL, pool_distribution
+
+
+def brute_force_pmf(pool, slayer=False, depth=80):
+    """(normal, mortal) -> probability over every sequence of faces, Slayer chains cut at depth."""
+    def die(dice_type):
+        # Built from the deepest re-roll up: the outcomes of a die that may re-roll `level` more times
+        outcomes = {}
+        for level in range(depth + 1):
+            rerolls, outcomes = outcomes, {}
+            for normal, mortal in DIE_FACES[dice_type]:
+                if slayer and mortal and level:
+                    for (n, m), p in rerolls.items():
+                        key = (normal + n, mortal + m)
+                        outcomes[key] = outcomes.get(key, 0.0) + p / 6
+                else:
+                    outcomes[normal, mortal] = outcomes.get((normal, mortal), 0.0) + 1 / 6
+        return outcomes
+
+    pmf = {(0, 0): 1.0}
+    for dice_type in pool:
+        step = {}
+        outcomes = die(dice_type)
+        for (n1, m1), p1 in pmf.items():
+            for (n2, m2), p2 in outcomes.items():
+                step[n1 + n2, m1 + m2] = step.get((n1 + n2, m1 + m2), 0.0) + p1 * p2
+        pmf = step
+    return pmf
+
+
+def as_dict(distribution):
+    return {(int(n), int(m)): float(distribution.pmf[n, m]) for n, m in zip(*np.nonzero(distribution.pmf))}
+
+
+@pytest.mark.parametrize("pool", [['White'], ['Black', 'Green', 'Green'], ['Gold', 'Crimson', 'Silver']])
+def test_matches_face_enumeration(pool):
+    expected = {}
+    for faces in itertools.product(*(DIE_FACES[dice_type] for dice_type in pool)):
+        key = (sum(n for n, _ in faces), sum(m for _, m in faces))
+        expected[key] = expected.get(key, 0.0) + 6.0 ** -len(pool)
+    actual = as_dict(pool_distribution(pool))
+    assert actual.keys() == expected.keys()
+    for key, p in expected.items():
+        assert actual[key] == pytest.approx(p, abs=1e-12)
+
+
+@pytest.mark.parametrize("pool", [['Silver'], ['Gunmetal', 'Black'], ['Gold', 'Gold', 'Green']])
+def test_slayer_matches_reroll_enumeration(pool):
+    distribution = pool_distribution(pool, slayer=True)
+    # Truncating the chain keeps a proper distribution
+    assert distribution.pmf.sum() == pytest.approx(1.0, abs=1e-12)
+    expected = brute_force_pmf(pool, slayer=True)
+    actual = as_dict(distribution)
+    for key in expected.keys() | actual.keys():
+        assert actual.get(key, 0.0) == pytest.approx(expected.get(key, 0.0), abs=1e-9)
+    assert distribution.at_least(distribution.pmf.shape[1] - 1, 'mortal') < 100 * SLAYER_TAIL
+
+
+def test_summaries_agree_with_the_pmf():
+    distribution = pool_distribution(['Black', 'Purple', 'Green'])
+    pmf = brute_force_pmf(['Black', 'Purple', 'Green'])
+    expected_total = sum((n + m) * p for (n, m), p in pmf.items())
+    assert distribution.expected()['total'] == pytest.approx(expected_total)
+    assert distribution.at_least(0) == pytest.approx(1.0)
+    assert distribution.at_least(3) == pytest.approx(sum(p for (n, m), p in pmf.items() if n + m >= 3))
+    median = distribution.percentile(50)
+    assert distribution.at_least(median) >= 0.5 >= distribution.at_least(median + 1)
+    # Pools with the same colors share one memoized result
+    assert pool_distribution(['Green', 'Black', 'Purple']) is distribution
@@ -0,0 +1,52 @@
+import random
+from sequential import ConfidenceSequence
+
+
+def test_anytime_coverage():
+    # The interval may fail to contain the true mean at any point of a run in at most alpha of runs
+    alpha, runs, games, p = 0.1, 200, 1000, 0.3
+    rng = random.Random(5)
+    failures = 0
+    for _ in range(runs):
+        sequence = ConfidenceSequence(alpha, tuning_games=200)
+        for _ in range(games):
+            sequence.update(1.0 if rng.random() < p else 0.0)
+            low, high = sequence.interval()
+            if not low <= p <= high:
+                failures += 1
+                break
+    assert failures <= alpha * runs
+
+
+def test_interval_shrinks_around_the_mean():
+    sequence = ConfidenceSequence()
+    assert sequence.interval() == (0.0, 1.0)
+    widths = []
+    for i in range(4000):
+        sequence.update(i % 2)
+        if (i + 1) % 1000 == 0:
+            low, high = sequence.interval()
+            assert low < 0.5 < high
+            widths.append(high - low)
+    assert widths == sorted(widths, reverse=True)
+
+
+def test_decisions():
+    above = ConfidenceSequence()
+    while above.decision(0.5) is None:
+        above.update(1.0 if above.n % 4 else 0.0)
+    assert above.decision(0.5) == 'above'
+    assert above.mean() > 0.5
+
+    below = ConfidenceSequence()
+    for _ in range(200):
+        below.update(0.0)
+    assert below.decision(0.5) == 'below'
+
+    even = ConfidenceSequence()
+    for i in range(20000):
+        even.update(i % 2)
+        if even.decision(0.5, margin=0.05) is not None:
+            break
+    assert even.decision(0.5, margin=0.05) == 'equivalent'
+    assert even.decision(0.5) is None
@@ -0,0 +1,103 @@
+import random
+import pytest
+import util
+from main import build_unit_from_template, unit_templates
+from player import Player
+from spatial import SpatialIndex, CELL_SIZE, ENGAGEMENT_RANGE
+
+
+def kill(unit):
+    for model in unit.models:
+        model.current_wounds = 0
+    unit.check_casualties()
+
+
+def random_position(rng):
+    # Small integer coordinates: plenty of ties, and many units on or next to cell edges
+    return (rng.choice([rng.randint(-3, 30), rng.randrange(0, 31, CELL_SIZE)]), rng.randint(-3, 30))
+
+
+def make_game(seed, units_per_side=8):
+    rng = random.Random(seed)
+    names = list(unit_templates)
+    players = [
+        Player(name, [build_unit_from_template(n, unit_templates[n]) for n in rng.choices(names, k=units_per_side)])
+        for name in ("A", "B")
+    ]
+    for player in players:
+        for unit in player.units:
+            unit.position = random_position(rng)
+    index = SpatialIndex(*players)
+    for unit in rng.sample(players[0].units + players[1].units, 3):
+        kill(unit)
+    return rng, players, index
+
+
+def brute_within(players, point, radius, team=None):
+    return [
+        u for t, player in enumerate(players) for u in player.units
+        if (team is None or t == team) and u.is_alive() and util.distance(point, u.position) <= radius
+    ]
+
+
+def brute_nearest(players, point, team=None, where=None):
+    candidates = brute_within(players, point, float('inf'), team)
+    candidates = [u for u in candidates if where is None or where(u)]
+    # min keeps the first of equal distances, which is army order
+    return min(candidates, key=lambda u: util.distance(point, u.position), default=None)
+
+
+def check_queries(rng, players, index):
+    for _ in range(30):
+        point = random_position(rng)
+        for radius in (0, 1, CELL_SIZE - 1, CELL_SIZE, 13, 100):
+            for team in (None, 0, 1):
+                assert index.units_within(point, radius, team) == brute_within(players, point, radius, team)
+        for team in (None, 0, 1):
+            assert index.nearest(point, team) is brute_nearest(players, point, team)
+        assert index.nearest(point, where=lambda u: u.num_models > 1) is brute_nearest(
+            players, point, where=lambda u: u.num_models > 1,
+        )
+
+    for team, player in enumerate(players):
+        for unit in player.units:
+            enemies = brute_within(players, unit.position, 12, 1 - team)
+            assert index.enemies_within(unit, 12) == enemies
+            assert index.allies_within(unit, 12) == brute_within(players, unit.position, 12, team)
+            assert index.is_engaged(unit) == bool(brute_within(players, unit.position, ENGAGEMENT_RANGE, 1 - team))
+            assert index.nearest_enemy(unit) is brute_nearest(players, unit.position, 1 - team)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_queries_match_brute_force(seed):
+    check_queries(*make_game(seed))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_queries_follow_moves(seed):
+    rng, players, index = make_game(seed)
+    units = players[0].units + players[1].units
+    for _ in range(5):
+        for unit in rng.sample(units, 6):
+            # Moves of up to a few cells, often onto a cell edge
+            x, y = unit.position
+            unit.position = (x + rng.choice([-7, -6, -1, 1, 6, 13]), y + rng.randint(-8, 8))
+        check_queries(rng, players, index)
+
+
+def test_ties_go_to_army_order():
+    first, second, third = (build_unit_from_template("Mech", unit_templates["Mech"]) for _ in range(3))
+    # Same distance from (6, 6), in different cells
+    first.position, second.position, third.position = (6, 9), (3, 6), (9, 6)
+    index = SpatialIndex(Player("A", [first, second]), Player("B", [third]))
+    assert index.nearest((6, 6)) is first
+    assert index.nearest((6, 6), team=1) is third
+    assert index.units_within((6, 6), 3) == [first, second, third]
+    kill(first)
+    assert index.nearest((6, 6)) is second
+
+
+def test_empty_index():
+    index = SpatialIndex(Player("A", []), Player("B", []))
+    assert index.nearest((0, 0)) is None
+    assert index.units_within((0, 0), 50) == []
@@ -1,12 +1,25 @@
-import random
+import numpy as np
 from model import Model
 from armor import ARMOR_SAVES
-from dice import roll_dice
+import game_rng
+from dice import DIE_FACES
+from abilities import Abilities
+from events import bus, AttackEvent, DefendEvent, SaveEvent, ModelLostEvent, CasualtyEvent, MessageEvent
+
+# In 'auto' save mode, wound queues at least this long use the batched save path
+BATCHED_SAVES_MIN_WOUNDS = 32
 
 
 class Unit:
     # Class-level counter for generating unique IDs
     _id_counter = 1
+    # How Unit.defend rolls saves: 'sequential' (one roll per wound, the reference mode),
+    # 'batched' (all rolls in one vectorised draw) or 'auto' (batched for long wound queues)
+    save_mode = 'auto'
+    # SpatialIndex currently tracking this unit; told about every position change
+    spatial_index = None
+    # BoardState tracking this unit; told about moves, wounds and deaths
+    board = None
 
     def __init__(self, name, num_models, wounds_per_model, armor, movement, ap_cost,
                  missile_attack_dice, melee_attack_dice, attack_range,
@@ -34,12 +47,45 @@ class Unit:
         self.melee_target = None
         self.has_activated = False
         self.alive = True
-        self.shields_remaining = self._get_keyword_value('Shields', default=0)
+        self.compile_abilities()
+        self.shields_remaining = self.abilities.shields
 
         self.pending_casualties = 0  # For Last Stand
-        self.last_stand_active = 'Last Stand' in self.keywords
-        self.degrade_amount = self._get_keyword_value('Degrade', default=0)
-        self.commander_value = self._get_keyword_value('Commander', default=0)
+
+    def compile_abilities(self):
+        """
+        Parse keywords into self.abilities and precompute the attack dice pools.
+        Call again if keywords or base attack dice change after construction.
+        """
+        self.abilities = abilities = Abilities(self.keywords)
+        self.last_stand_active = abilities.last_stand
+        self.degrade_amount = abilities.degrade
+        self.commander_value = abilities.commander
+
+        # _attack_pools[(phase == 'missile', charging)][n] is the pool for n surviving
+        # models, before Degrade (which depends on wounds, not model count)
+        self._attack_pools = {}
+        for missile in (True, False):
+            base = self.base_missile_attack_dice if missile else self.base_melee_attack_dice
+            for charging in (False, True):
+                extra = abilities.attack_augmentation
+                if charging:
+                    extra = extra + abilities.crushing_charge
+                self._attack_pools[(missile, charging)] = tuple(
+                    self._build_attack_dice(base, extra, n) for n in range(self.initial_num_models + 1)
+                )
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position = value
+        if self.spatial_index is not None:
+            self.spatial_index.move(self)
+        if self.board is not None:
+            self.board.unit_changed(self)
 
     @classmethod
     def _generate_unique_id(cls):
@@ -50,16 +96,6 @@ class Unit:
     def is_locked_in_melee(self):
         return self.melee_target
 
-    def _get_keyword_value(self, keyword, default=None):
-        # Extract a value if keyword has a numeric parameter, e.g. "Commander 2"
-        for item in self.keywords:
-            if item.startswith(keyword):
-                parts = item.split()
-                for p in parts[1:]:
-                    if p.isdigit():
-                        return int(p)
-        return default
-
     def is_alive(self):
         # If Last Stand is active, and not yet activated this turn, treat pending casualties as not removed yet.
         return any(m.is_alive() for m in self.models) or (self.last_stand_active and self.pending_casualties > 0 and not self.has_activated)
@@ -67,120 +103,102 @@ class Unit:
     def get_armor_save(self, phase='melee', attacker=None):
         base_save = ARMOR_SAVES.get(self.armor, 6)
         # Camouflage: improves save in missile phase by 1 step (if not ignored by Sharpshooter)
-        if phase == 'missile' and 'Camouflage' in self.keywords:
-            if not (attacker and 'Sharpshooter' in attacker.keywords):
+        if phase == 'missile' and self.abilities.camouflage:
+            if not (attacker and attacker.abilities.sharpshooter):
                 base_save = base_save - 1  # Better by one step
 
         # Clamp save at best 2+
         base_save = max(2, base_save)
         return base_save
 
+    def get_modified_armor_save(self, armor_save_modifier, phase='melee', attacker=None):
+        armor_save = self.get_armor_save(phase=phase, attacker=attacker)
+        armor_save += armor_save_modifier
+        return min(6, max(2, armor_save))
+
+    def _build_attack_dice(self, base, extra, num_models):
+        # Adjust the dice pool for lost models: remove the weakest dice first
+        models_lost = self.initial_num_models - num_models
+        dice_pool = list(base[models_lost:]) if models_lost > 0 else list(base)
+
+        # Attack Augmentation [Die] and, when charging, Crushing Charge [Die]: add one die per model
+        for die in extra:
+            dice_pool.extend([die] * num_models)
+        return dice_pool
+
     def get_attack_dice(self, phase, charging=False):
-        # Start with base dice for the given phase
-        if phase == 'missile':
-            dice_pool = self.base_missile_attack_dice.copy()
+        pools = self._attack_pools[(phase == 'missile', bool(charging))]
+        if 0 <= self.num_models < len(pools):
+            dice_pool = list(pools[self.num_models])
         else:
-            dice_pool = self.base_melee_attack_dice.copy()
-
-        # Adjust the dice pool for lost models
-        models_lost = self.initial_num_models - self.num_models
-        if models_lost > 0:
-            # Remove the weakest dice first
-            dice_pool = dice_pool[models_lost:]
-
-        # Attack Augmentation [Die]: add one die per model
-        for keyword in self.keywords:
-            if keyword.startswith('Attack Augmentation'):
-                parts = keyword.split()
-                if len(parts) > 2:
-                    aug_die = parts[2]
-                    for _ in range(self.num_models):
-                        dice_pool.append(aug_die)
-
-        # Crushing Charge [Die]: If charging, add one die per model
-        if charging:
-            for keyword in self.keywords:
-                if keyword.startswith('Crushing Charge'):
-                    parts = keyword.split()
-                    if len(parts) > 2:
-                        charge_die = parts[2]
-                        for _ in range(self.num_models):
-                            dice_pool.append(charge_die)
+            abilities = self.abilities
+            extra = abilities.attack_augmentation + (abilities.crushing_charge if charging else ())
+            base = self.base_missile_attack_dice if phase == 'missile' else self.base_melee_attack_dice
+            dice_pool = self._build_attack_dice(base, extra, self.num_models)
 
         # Degrade N: If less than half wounds remain, remove N dice
         if self.degrade_amount > 0:
             total_starting_wounds = self.initial_num_models * self.wounds_per_model
-            current_wounds = sum(m.current_wounds for m in self.models)
+            current_wounds = self.current_wounds_sum()
             if current_wounds < (total_starting_wounds / 2.0):
                 # Remove N dice from the end
-                for _ in range(self.degrade_amount):
-                    if dice_pool:
-                        dice_pool.pop()
+                del dice_pool[max(0, len(dice_pool) - self.degrade_amount):]
 
         return dice_pool
 
-    def roll_attack_dice(self, dice_pool, slayer=False):
+    def roll_attack_dice(self, dice_pool, slayer=False, rng=None):
         """
         Roll the dice pool. If slayer is True, re-roll dice that generate mortal wounds until they generate no more.
         """
-        total_wounds = {'normal': 0, 'double': 0, 'mortal': 0}
+        choice = game_rng.resolve(rng).dice.choice
+        normal = 0
+        mortal = 0
 
         for dice_type in dice_pool:
-            if slayer:
-                # Keep rolling this die until it produces no mortal wound
-                while True:
-                    dice_result = roll_dice(dice_type)
-                    # Add results
-                    for k in total_wounds:
-                        total_wounds[k] += dice_result.get(k, 0)
-                    # If it did not produce a mortal wound this time, break
-                    if dice_result.get('mortal', 0) == 0:
-                        break
-            else:
-                dice_result = roll_dice(dice_type)
-                for k in total_wounds:
-                    total_wounds[k] += dice_result.get(k, 0)
-
-        return total_wounds
-
-    def attack(self, target_unit, phase, charging=False):
-        # Determine if Withering Fire or Relentless applies
+            faces = DIE_FACES[dice_type]
+            while True:
+                face_normal, face_mortal = choice(faces)
+                normal += face_normal
+                mortal += face_mortal
+                # Only Slayer keeps rolling, and only while the die produces mortal wounds
+                if not (slayer and face_mortal):
+                    break
+
+        return {'normal': normal, 'double': 0, 'mortal': mortal}
+
+    def get_armor_save_modifier(self, phase):
+        # Withering Fire (missile) and Relentless (melee) worsen the target's save by one
         armor_save_modifier = 0
-        if 'Withering Fire' in self.keywords and phase == 'missile':
+        if self.abilities.withering_fire and phase == 'missile':
             armor_save_modifier += 1
-        if 'Relentless' in self.keywords and phase == 'melee':
+        if self.abilities.relentless and phase == 'melee':
             armor_save_modifier += 1
+        return armor_save_modifier
 
-        print(f"{self.name} ({self.num_models} models) is attacking {target_unit.name} in the {phase} phase.")
-        if charging:
-            print(f"{self.name} is charging into combat!")
+    def attack(self, target_unit, phase, charging=False, rng=None):
+        # Determine if Withering Fire or Relentless applies
+        armor_save_modifier = self.get_armor_save_modifier(phase)
 
         dice_pool = self.get_attack_dice(phase, charging=charging)
-        print(f"{self.name} is rolling {len(dice_pool)} dice: {dice_pool}")
-
-        total_wounds = self.roll_attack_dice(dice_pool, slayer='Slayer' in self.keywords)
-        print(f"{self.name} inflicted the following wounds: {total_wounds}")
+        total_wounds = self.roll_attack_dice(dice_pool, slayer=self.abilities.slayer, rng=rng)
+        if bus.active:
+            bus.emit(AttackEvent(self.name, target_unit.name, phase, charging, self.num_models, dice_pool, dict(total_wounds)))
 
-        target_unit.defend(total_wounds, armor_save_modifier, attacker=self, phase=phase)
+        target_unit.defend(total_wounds, armor_save_modifier, attacker=self, phase=phase, rng=rng)
 
-    def defend(self, incoming_wounds, armor_save_modifier, attacker=None, phase='melee'):
+    def defend(self, incoming_wounds, armor_save_modifier, attacker=None, phase='melee', rng=None):
         # Calculate armor save with modifications
-        armor_save = self.get_armor_save(phase=phase, attacker=attacker)
-        armor_save += armor_save_modifier
-        armor_save = min(6, max(2, armor_save))
+        armor_save = self.get_modified_armor_save(armor_save_modifier, phase=phase, attacker=attacker)
 
-        can_save_mortal = 'Lucky' in self.keywords
+        can_save_mortal = self.abilities.lucky
         total_incoming = sum(incoming_wounds.values())
 
-        print(f"{self.name} is defending against {total_incoming} incoming wounds: {incoming_wounds}")
-        print(f"{self.name}'s armor save is {armor_save} (modifier: {armor_save_modifier}).")
-
         # Shields
         wounds_to_ignore = min(self.shields_remaining, total_incoming)
         self.shields_remaining -= wounds_to_ignore
         wounds_to_assign = total_incoming - wounds_to_ignore
-        if wounds_to_ignore > 0:
-            print(f"{self.name} absorbed {wounds_to_ignore} wounds with shields.")
+        if bus.active:
+            bus.emit(DefendEvent(self.name, dict(incoming_wounds), armor_save, armor_save_modifier, wounds_to_ignore))
 
         wound_queue = (
             ['mortal'] * incoming_wounds['mortal'] +
@@ -189,13 +207,39 @@ class Unit:
         )[:wounds_to_assign]
 
         # If Assassin: attacker chooses casualties. We simulate by removing from the last model first.
-        reverse_removal = ('Assassin' in (attacker.keywords if attacker else []))
+        reverse_removal = attacker is not None and attacker.abilities.assassin
 
         # Collect all alive models
         model_indices = [i for i, m in enumerate(self.models) if m.is_alive()]
         if reverse_removal:
             model_indices = list(reversed(model_indices))
 
+        save_mode = self.save_mode
+        if save_mode == 'auto':
+            save_mode = 'batched' if len(wound_queue) >= BATCHED_SAVES_MIN_WOUNDS else 'sequential'
+
+        if save_mode == 'batched':
+            casualties = self._resolve_wounds_batched(wound_queue, armor_save, can_save_mortal, model_indices, rng)
+        else:
+            casualties = self._resolve_wounds_sequential(wound_queue, armor_save, can_save_mortal, model_indices, rng)
+
+        # Handle Last Stand: if unit has not activated and has Last Stand,
+        # do not remove casualties now, just store them.
+        if self.last_stand_active and not self.has_activated:
+            self.pending_casualties += casualties
+        else:
+            # Apply casualties immediately if no Last Stand or after they've activated.
+            self.apply_pending_casualties()
+
+        self.check_casualties()
+        if self.board is not None:
+            self.board.unit_changed(self)
+        if bus.active:
+            bus.emit(CasualtyEvent(self.name, casualties, self.num_models))
+
+    def _resolve_wounds_sequential(self, wound_queue, armor_save, can_save_mortal, model_indices, rng=None):
+        """Reference path: roll one save per wound, in queue order."""
+        randint = game_rng.resolve(rng).saves.randint
         casualties = 0
 
         for wound_type in wound_queue:
@@ -205,7 +249,7 @@ class Unit:
             model = self.models[target_index]
 
             # Roll save (except if mortal and no Lucky)
-            save_roll = random.randint(1, 6)
+            save_roll = randint(1, 6)
             is_mortal = (wound_type == 'mortal')
             save_successful = (save_roll >= armor_save) if (not is_mortal or can_save_mortal) else False
 
@@ -215,35 +259,80 @@ class Unit:
                 if not model.is_alive():
                     casualties += 1
                     model_indices.pop(0)  # model dead
-                    print(f"{self.name} lost a model to {wound_type} damage.")
+                    if bus.active:
+                        bus.emit(ModelLostEvent(self.name, wound_type))
+            elif bus.active:
+                bus.emit(SaveEvent(self.name, wound_type, save_roll))
+
+        return casualties
+
+    def _resolve_wounds_batched(self, wound_queue, armor_save, can_save_mortal, model_indices, rng=None):
+        """
+        Batched path: draw every save roll at once, then apply the failed wounds of each
+        wound type to the models in targeting order with array operations.
+        Gives the same outcome distribution as _resolve_wounds_sequential.
+        """
+        if not model_indices or not wound_queue:
+            return 0
+
+        # A d6 save roll fails when it is below armor_save, i.e. when 6u < armor_save - 1 for uniform u
+        failed = game_rng.resolve(rng).np_saves.random(len(wound_queue)) * 6 < armor_save - 1
+        wounds = np.array([self.models[i].current_wounds for i in model_indices])
+        first_alive = 0
+        casualties = 0
+
+        # The queue is ordered mortal, double, normal; resolve it one run of a type at a time
+        start = 0
+        for wound_type, damage in (('mortal', 1), ('double', 2), ('normal', 1)):
+            count = wound_queue.count(wound_type)
+            if not count:
+                continue
+            if wound_type == 'mortal' and not can_save_mortal:
+                hits = count
             else:
-                print(f"{self.name} saved against {wound_type} damage with a roll of {save_roll}.")
+                hits = int(np.count_nonzero(failed[start:start + count]))
+            start += count
+            if hits < count and bus.active:
+                bus.emit(SaveEvent(self.name, wound_type, None, count - hits))
+            if hits == 0:
+                continue
+
+            # Each model absorbs ceil(wounds / damage) hits before dying; excess damage is lost
+            hits_to_kill = -(-wounds[first_alive:] // damage)
+            hits_needed = np.cumsum(hits_to_kill)
+            killed = int(np.searchsorted(hits_needed, hits, side='right'))
+            if killed:
+                wounds[first_alive:first_alive + killed] -= hits_to_kill[:killed] * damage
+                hits -= int(hits_needed[killed - 1])
+            first_alive += killed
+            casualties += killed
+            if bus.active:
+                for _ in range(killed):
+                    bus.emit(ModelLostEvent(self.name, wound_type))
+
+            if first_alive == len(wounds):
+                break
+            wounds[first_alive] -= hits * damage
 
-        print(f"{self.name} took {casualties} casualties this phase.")
+        for i, current_wounds in zip(model_indices, wounds.tolist()):
+            self.models[i].current_wounds = current_wounds
 
-        # Handle Last Stand: if unit has not activated and has Last Stand,
-        # do not remove casualties now, just store them.
-        if self.last_stand_active and not self.has_activated:
-            self.pending_casualties += casualties
-        else:
-            # Apply casualties immediately if no Last Stand or after they've activated.
-            self.apply_pending_casualties()
+        return casualties
 
-        self.check_casualties()
     def check_casualties(self):
         alive_models = sum(1 for model in self.models if model.is_alive())
         self.num_models = alive_models
         if alive_models == 0:
             self.alive = False
-            print(f"{self.name} has been wiped out.")
-        else:
-            print(f"{self.name} has {self.num_models} models remaining.")
 
     def apply_pending_casualties(self):
         # Pending casualties represent models already killed but not removed due to Last Stand.
         # Once we apply them, we run check_casualties() which cleans up dead models.
         pass
 
+    def current_wounds_sum(self):
+        return sum(m.current_wounds for m in self.models)
+
     def calculate_total_wounds(self):
         total_possible_wounds = len(self.models) * self.wounds_per_model
         total_current_wounds = sum(model.current_wounds for model in self.models if model.current_wounds > 0)
@@ -264,16 +353,22 @@ class Unit:
             keywords=self.keywords.copy(),
         )
 
-    def regenerate(self):
+    def regenerate(self, rng=None):
         # If unit does nothing else this activation, restore 1D6 destroyed models
         # Only possible if some models were destroyed
         destroyed_count = self.initial_num_models - self.num_models
         if destroyed_count > 0:
-            amount = random.randint(1, 6)
+            amount = game_rng.resolve(rng).dice.randint(1, 6)
             amount = min(amount, destroyed_count)
-            print(f"{self.name} is regenerating {amount} models.")
+            if bus.active:
+                bus.emit(MessageEvent(f"{self.name} is regenerating {amount} models."))
             # Restore that many models at full wounds
-            for _ in range(amount):
-                self.models.append(Model(self.wounds_per_model))
+            self._restore_models(amount)
             self.num_models += amount
             self.alive = True
+            if self.board is not None:
+                self.board.unit_changed(self)
+
+    def _restore_models(self, amount):
+        for _ in range(amount):
+            self.models.append(Model(self.wounds_per_model))
@@ -1,8 +1,8 @@
 import util
 import board_state
-import random
+import game_rng
 
-def user_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number):
+def user_activate_unit(active_player, opposing_player, battlefield, active_a, turn_number, rng=None, board=None):
     """
     Interactively:
     - Handle melee-only activation for units in melee range.
@@ -10,9 +10,13 @@ def user_activate_unit(active_player, opposing_player, battlefield, active_a, tu
     - Move towards control points or enemy units.
     - Skip shooting and charging for additional movement.
     - Prevent shooting at units engaged in melee.
+
+    Pass the game's board_state.BoardState as board to draw from its cached grid.
     """
 
-    if active_a:
+    if board is not None:
+        print(board.visualization())
+    elif active_a:
         print(board_state.get_board_visualization(
             active_player, opposing_player, battlefield,
             board_state.get_board_state(active_player, opposing_player, battlefield, turn_number, active_player)
@@ -51,7 +55,7 @@ def user_activate_unit(active_player, opposing_player, battlefield, active_a, tu
 
     if enemy_target:
         print(f"{chosen_unit.name} is in melee combat with {enemy_target.name}.")
-        melee_fight(chosen_unit, enemy_target)
+        melee_fight(chosen_unit, enemy_target, active_player, rng)
 
         # If the melee target is destroyed, allow normal activation
         if not enemy_target.is_alive():
@@ -98,7 +102,7 @@ def user_activate_unit(active_player, opposing_player, battlefield, active_a, tu
     # Offer the option to skip shooting and charging to move an additional D6
     skip_option = input("Do you want to skip shooting and charging to move an additional D6? (y/n): ").strip().lower()
     if skip_option == 'y':
-        extra_move = roll_2d6()
+        extra_move = roll_2d6(rng)
         target_position = util.move_towards(chosen_unit.position, target_position, extra_move)
         chosen_unit.position = target_position
         print(f"{chosen_unit.name} moved an additional {extra_move} inches to position {chosen_unit.position}.")
@@ -133,7 +137,7 @@ def user_activate_unit(active_player, opposing_player, battlefield, active_a, tu
         if enemy_target:
             print(f"Attacking {enemy_target.name} with missile attack!")
             from fight import simulate_fight
-            simulate_fight(chosen_unit, enemy_target)
+            simulate_fight(chosen_unit, enemy_target, active_player, rng=rng)
     else:
         print("No valid enemies in missile range. Skipping missile attack.")
 
@@ -144,22 +148,22 @@ def user_activate_unit(active_player, opposing_player, battlefield, active_a, tu
         if charge_input == 'y':
             from fight import simulate_fight, melee_favorable
             dist = util.distance(chosen_unit.position, enemy_target.position)
-            charge_roll = roll_2d6()
+            charge_roll = roll_2d6(rng)
             print(f"Charge roll: {charge_roll}, Distance: {dist}")
             if charge_roll >= dist and melee_favorable(chosen_unit, enemy_target):
                 print(f"Charging {enemy_target.name} and fighting melee!")
-                simulate_fight(chosen_unit, enemy_target, 0, 'melee')
+                simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', rng=rng)
             else:
                 print("Charge failed or not favorable. No melee attack.")
 
     chosen_unit.has_activated = True
     return chosen_unit
 
-def melee_fight(chosen_unit, enemy_target):
+def melee_fight(chosen_unit, enemy_target, active_player, rng=None):
     """Handle melee combat."""
     from fight import simulate_fight
     print(f"{chosen_unit.name} is engaging in melee combat with {enemy_target.name}.")
-    simulate_fight(chosen_unit, enemy_target, 0, 'melee')
+    simulate_fight(chosen_unit, enemy_target, active_player, 0, 'melee', rng=rng)
 
 def find_unit_by_id_or_name(units, identifier):
     try:
@@ -174,5 +178,6 @@ def find_unit_by_id_or_name(units, identifier):
             return matches[0]
         return None
 
-def roll_2d6():
-    return random.randint(1, 6) + random.randint(1, 6)
+def roll_2d6(rng=None):
+    dice = game_rng.resolve(rng).dice
+    return dice.randint(1, 6) + dice.randint(1, 6)